@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from .hashing import acheck_password, amake_password
 from .models import User
+from .usercache import user_cache
 
 
 def generate_token(user):
@@ -40,8 +42,31 @@ class JWTAuthentication(BaseAuthentication):
         payload = decode_token(token)
 
         try:
-            user = User.objects.get(id=payload['user_id'])
+            user = user_cache.get(payload['user_id'])
         except User.DoesNotExist:
             raise AuthenticationFailed('Пользователь не найден.')
+        if not user.is_active:
+            raise AuthenticationFailed('Пользователь деактивирован.')
 
         return (user, token)
+
+
+async def authenticate_credentials(username, password):
+    """Пользователь с такими логином и паролем или None (как ModelBackend.authenticate).
+
+    Пароль проверяется в пуле хэширования (accounts.hashing); хэш,
+    сделанный не текущим профилем хэшера, заменяется новым.
+    """
+    user = await User.objects.filter(**{User.USERNAME_FIELD: username}).afirst()
+    if user is None:
+        # Хэширование и для несуществующего логина: время ответа не выдаёт,
+        # зарегистрирован ли пользователь.
+        await amake_password(password)
+        return None
+    valid, new_encoded = await acheck_password(password, user.password)
+    if not valid or not user.is_active:
+        return None
+    if new_encoded:
+        user.password = new_encoded
+        await user.asave(update_fields=['password'])
+    return user
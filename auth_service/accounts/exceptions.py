@@ -0,0 +1,17 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .hashing import HashingUnavailable
+
+
+def exception_handler(exc, context):
+    """Обработчик DRF: занятый пул хэширования — 503 с Retry-After."""
+    if isinstance(exc, HashingUnavailable):
+        return Response(
+            {'error': 'Сервис перегружен, повторите позже.'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(settings.LOAD_SHED_RETRY_AFTER)},
+        )
+    return drf_exception_handler(exc, context)
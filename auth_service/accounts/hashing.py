@@ -0,0 +1,169 @@
+"""Хэширование паролей в отдельном пуле процессов.
+
+Проверка и хэширование пароля (PBKDF2 — сотни миллисекунд процессора)
+выполняются не в воркере сервиса, а в пуле из ``AUTH_HASH_WORKERS``
+процессов: всплеск входов занимает только пул, а валидация токенов
+продолжает обслуживаться. Одновременно в пуле (в работе и в очереди)
+не больше ``AUTH_HASH_MAX_PENDING`` задач; сверх этого запрос сразу
+получает ``HashingUnavailable`` (в API — 503 с Retry-After), а не ждёт.
+При ``AUTH_HASH_WORKERS=0`` хэширование выполняется в вызывающем потоке
+(с тем же ограничением очереди), а для корутин — в отдельном потоке, чтобы
+не останавливать цикл событий.
+
+Новые пароли хэшируются первым хэшером ``PASSWORD_HASHERS`` (профиль
+``PASSWORD_HASHER_PROFILE``). Пароль, сохранённый другим хэшером или с
+устаревшими параметрами, при успешном входе перехэшируется тем же
+вызовом пула.
+
+Процессы пула запускаются через spawn (fork процесса с потоками
+небезопасен) и не загружают Django: хэшер передаётся путём к классу.
+"""
+import asyncio
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, identify_hasher, is_password_usable
+from django.utils.module_loading import import_string
+
+
+class HashingUnavailable(Exception):
+    """Очередь пула хэширования заполнена."""
+
+
+def hasher_path(hasher):
+    return f'{type(hasher).__module__}.{type(hasher).__qualname__}'
+
+
+def encode_password(path, password):
+    """Хэш пароля хэшером ``path`` (выполняется в процессе пула)."""
+    hasher = import_string(path)()
+    return hasher.encode(password, hasher.salt())
+
+
+def verify_password(path, preferred_path, password, encoded):
+    """Проверка пароля (выполняется в процессе пула).
+
+    Возвращает (пароль верен, новый хэш или None): новый хэш вычисляется,
+    если ``encoded`` сделан не предпочтительным хэшером или с устаревшими
+    параметрами.
+    """
+    hasher = import_string(path)()
+    if not hasher.verify(password, encoded):
+        return False, None
+    preferred = import_string(preferred_path)()
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(encoded):
+        return True, preferred.encode(password, preferred.salt())
+    return True, None
+
+
+class HashingPool:
+    """Пул процессов хэширования с ограниченной очередью."""
+
+    def __init__(self):
+        self.executor = None
+        self.pending = 0
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        with self.lock:
+            if self.pending >= settings.AUTH_HASH_MAX_PENDING:
+                self.counters['rejected'] += 1
+                raise HashingUnavailable()
+            self.pending += 1
+            self.counters['submitted'] += 1
+            if settings.AUTH_HASH_WORKERS and self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    settings.AUTH_HASH_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                )
+            executor = self.executor if settings.AUTH_HASH_WORKERS else None
+
+        if executor is None:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # Процесс пула завершился аварийно: следующий вызов создаст пул заново.
+                with self.lock:
+                    if self.executor is executor:
+                        self.executor = None
+                self._done(None)
+                raise HashingUnavailable()
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    def metrics(self):
+        with self.lock:
+            return {
+                **dict.fromkeys(('submitted', 'rejected'), 0),
+                **self.counters,
+                'pending': self.pending,
+                'workers': settings.AUTH_HASH_WORKERS,
+            }
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+hashing_pool = HashingPool()
+
+
+def _submit_encode(password):
+    return hashing_pool.submit(encode_password, hasher_path(get_hasher()), password)
+
+
+def _submit_verify(password, encoded):
+    if not encoded or not is_password_usable(encoded):
+        return None
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return None
+    return hashing_pool.submit(
+        verify_password, hasher_path(hasher), hasher_path(get_hasher()), password, encoded,
+    )
+
+
+def make_password(password):
+    """Хэш нового пароля в пуле (блокирует вызывающий поток до результата)."""
+    return _submit_encode(password).result()
+
+
+async def _asubmit(submit, *args):
+    """Отправка в пул из корутины.
+
+    Без пула процессов ``submit`` хэширует в вызывающем потоке, поэтому
+    вызывается вне цикла событий.
+    """
+    if settings.AUTH_HASH_WORKERS:
+        return submit(*args)
+    return await sync_to_async(submit, thread_sensitive=False)(*args)
+
+
+async def amake_password(password):
+    return await asyncio.wrap_future(await _asubmit(_submit_encode, password))
+
+
+async def acheck_password(password, encoded):
+    """(пароль верен, новый хэш или None) — см. verify_password."""
+    future = await _asubmit(_submit_verify, password, encoded)
+    if future is None:
+        return False, None
+    return await asyncio.wrap_future(future)
@@ -1,35 +1,229 @@
 import logging
+import math
+import re
+import threading
 import time
+from collections import Counter, OrderedDict
+
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
 
 logger = logging.getLogger('http')
 
+# Числовые сегменты пути заменяются на {id}: лимит общий для всех объектов маршрута.
+ROUTE_ID_RE = re.compile(r'/\d+(?=/|$)')
+
+active_middleware = None
+
 
 class RequestLoggingMiddleware:
     """Middleware для логирования HTTP-подключений: время, IP-адрес клиента."""
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         start_time = time.time()
-        client_ip = self._get_client_ip(request)
-
         response = self.get_response(request)
+        self._log(request, response, start_time)
+        return response
 
-        duration = time.time() - start_time
+    async def __acall__(self, request):
+        start_time = time.time()
+        response = await self.get_response(request)
+        self._log(request, response, start_time)
+        return response
+
+    def _log(self, request, response, start_time):
         logger.info(
             'HTTP %s %s | IP: %s | Status: %s | Duration: %.3fs',
             request.method,
             request.get_full_path(),
-            client_ip,
+            self._get_client_ip(request),
             response.status_code,
-            duration,
+            time.time() - start_time,
         )
 
-        return response
-
     def _get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
             return x_forwarded_for.split(',')[0].strip()
         return request.META.get('REMOTE_ADDR')
+
+
+class TokenBuckets:
+    """Token bucket'ы по произвольному ключу; хранится не более ``max_keys`` ключей.
+
+    Bucket вмещает ``burst`` токенов и пополняется со скоростью ``rate``
+    токенов в секунду; каждый запрос списывает один токен. Давно не
+    использованные ключи вытесняются (их bucket снова полон).
+    """
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def take(self, key, rate, burst, now):
+        """Списание токена: 0, если он есть, иначе секунды до его появления."""
+        with self.lock:
+            state = self.buckets.pop(key, None)
+            tokens = burst if state is None else min(burst, state[0] + (now - state[1]) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+            return wait
+
+
+class LoadSheddingMiddleware:
+    """Ограничение частоты запросов и сброс нагрузки.
+
+    Запросы пользователя (``user_id`` из JWT, без токена — IP-адрес)
+    ограничиваются двумя token bucket'ами: общим и по маршруту (метод и
+    путь с id, заменёнными на ``{id}``); при исчерпании — 429. Если запрос
+    ждал в очереди перед воркером (заголовок ``X-Request-Start`` от nginx)
+    дольше ``LOAD_SHED_MAX_QUEUE_WAIT`` или одновременно обрабатывается
+    ``LOAD_SHED_MAX_IN_FLIGHT`` запросов — 503. Оба ответа содержат
+    ``Retry-After``. Лимиты и счётчики действуют в пределах процесса.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        global active_middleware
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.buckets = TokenBuckets(settings.RATE_LIMIT_MAX_KEYS)
+        self.counters = Counter()
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        active_middleware = self
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._limited(request):
+            return self.get_response(request)
+        rejected = self._admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            return self.get_response(request)
+        finally:
+            self._release()
+
+    async def __acall__(self, request):
+        if not self._limited(request):
+            return await self.get_response(request)
+        rejected = self._admit(request)
+        if rejected is not None:
+            return rejected
+        try:
+            return await self.get_response(request)
+        finally:
+            self._release()
+
+    @staticmethod
+    def _limited(request):
+        return settings.RATE_LIMIT_ENABLED and request.path not in settings.RATE_LIMIT_EXEMPT_PATHS
+
+    def _admit(self, request):
+        """Проверки перед обработкой: ответ-отказ или None (запрос учтён в in_flight)."""
+        queue_wait = self._queue_wait(request)
+        if queue_wait is not None and queue_wait > settings.LOAD_SHED_MAX_QUEUE_WAIT:
+            return self._reject('shed_queue_wait', 503, settings.LOAD_SHED_RETRY_AFTER)
+
+        retry_after = self._throttle(request)
+        if retry_after:
+            return self._reject('throttled', 429, retry_after)
+
+        with self.lock:
+            admitted = self.in_flight < settings.LOAD_SHED_MAX_IN_FLIGHT
+            if admitted:
+                self.in_flight += 1
+                self.counters['admitted'] += 1
+        if not admitted:
+            return self._reject('shed_in_flight', 503, settings.LOAD_SHED_RETRY_AFTER)
+        return None
+
+    def _release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def metrics(self):
+        return {
+            **dict.fromkeys(('admitted', 'throttled', 'shed_in_flight', 'shed_queue_wait'), 0),
+            **self.counters,
+            'in_flight': self.in_flight,
+            'buckets': len(self.buckets),
+        }
+
+    def _throttle(self, request):
+        now = time.monotonic()
+        client = self._client_key(request)
+        route = f'{request.method} {ROUTE_ID_RE.sub("/{id}", request.path)}'
+        rate, burst = settings.RATE_LIMIT_ROUTES.get(
+            route, (settings.RATE_LIMIT_ROUTE_RATE, settings.RATE_LIMIT_ROUTE_BURST),
+        )
+        wait = self.buckets.take((client, route), rate, burst, now)
+        if not wait:
+            wait = self.buckets.take(
+                client, settings.RATE_LIMIT_USER_RATE, settings.RATE_LIMIT_USER_BURST, now,
+            )
+        return wait
+
+    def _client_key(self, request):
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header.startswith('Bearer '):
+            try:
+                payload = jwt.decode(auth_header[7:], settings.JWT_SECRET, algorithms=['HS256'])
+                return f'user:{payload["user_id"]}'
+            except (jwt.InvalidTokenError, KeyError):
+                pass
+        # X-Real-IP выставляет nginx; первый адрес X-Forwarded-For задаёт клиент.
+        return f'ip:{request.META.get("HTTP_X_REAL_IP") or request.META.get("REMOTE_ADDR")}'
+
+    @staticmethod
+    def _queue_wait(request):
+        """Ожидание в очереди по X-Request-Start (``t=<секунды>``), None без заголовка."""
+        value = request.headers.get('X-Request-Start', '')
+        try:
+            return time.time() - float(value.removeprefix('t='))
+        except ValueError:
+            return None
+
+    def _reject(self, reason, status, retry_after):
+        # Сам отказ попадает в журнал RequestLoggingMiddleware (он стоит раньше).
+        with self.lock:
+            self.counters[reason] += 1
+        message = (
+            'Слишком много запросов, повторите позже.' if status == 429
+            else 'Сервис перегружен, повторите позже.'
+        )
+        response = JsonResponse({'error': message}, status=status)
+        response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+
+def throttling_metrics():
+    """Счётчики LoadSheddingMiddleware текущего процесса."""
+    return active_middleware.metrics() if active_middleware is not None else {}
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+def install_search(apps, schema_editor):
+    # Выражение индекса описано в accounts.search (только PostgreSQL).
+    from accounts.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['department', 'username'], name='user_department_idx'),
+        ),
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
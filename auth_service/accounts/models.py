@@ -15,6 +15,10 @@ class User(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['-created_at']
+        indexes = [
+            # Справочник с фильтром по отделу (см. accounts.pagination).
+            models.Index(fields=['department', 'username'], name='user_department_idx'),
+        ]
 
     def __str__(self):
         return f"{self.last_name} {self.first_name}" if self.last_name else self.username
@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """Курсорная (keyset) пагинация справочника пользователей по логину.
+
+    Позиция курсора фильтрует по уникальному индексу username (с фильтром
+    по отделу — по индексу (department, username)), поэтому стоимость
+    страницы не растёт с глубиной листания.
+    """
+    ordering = ('username',)
+    page_size = settings.USER_DIRECTORY_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.USER_DIRECTORY_MAX_PAGE_SIZE
@@ -0,0 +1,73 @@
+"""Поиск пользователей в справочнике (выбор исполнителя задачи).
+
+В PostgreSQL по выражению ``SEARCH_TEXT`` — логин, ФИО, отдел и должность
+в нижнем регистре — построен GIN-индекс с классом операторов
+gin_trgm_ops (расширение pg_trgm). Он обслуживает и поиск по началу слова
+(LIKE), и нечёткий поиск по сходству триграмм (оператор ``<%``), поэтому
+запрос не просматривает таблицу целиком. Расширение и индекс создаёт
+миграция ``0002_user_directory``.
+
+На других СУБД (SQLite в тестах) используется поиск через LIKE (в SQLite
+без учёта регистра только для латиницы).
+"""
+import logging
+
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ('username', 'first_name', 'last_name', 'patronymic', 'department', 'position')
+
+# Выражение должно в точности совпадать с выражением индекса.
+SEARCH_TEXT = 'lower({})'.format(" || ' ' || ".join(f'"{column}"' for column in SEARCH_COLUMNS))
+
+INSTALL_SQL = f"""
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS accounts_user_search_trgm_idx
+    ON accounts_user USING gin (({SEARCH_TEXT}) gin_trgm_ops);
+"""
+
+
+def install_search_index(db):
+    """Расширение pg_trgm и GIN-индекс поиска на соединении ``db`` (миграция)."""
+    if db.vendor != 'postgresql':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(INSTALL_SQL)
+
+
+def _like_escape(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_users(queryset, query):
+    """Пользователи, у которых слово начинается с ``query`` или похоже на него.
+
+    Возвращает queryset с аннотацией ``search_rank`` (совпадения по началу
+    слова выше нечётких), упорядоченный по ней и по логину.
+    """
+    query = query.strip().lower()
+    if connection.vendor == 'postgresql':
+        prefix = _like_escape(query)
+        starts = f"({SEARCH_TEXT} LIKE %s OR {SEARCH_TEXT} LIKE %s)"
+        starts_params = (f'{prefix}%', f'% {prefix}%')
+        return queryset.filter(
+            RawSQL(f'({starts} OR %s <%% {SEARCH_TEXT})', (*starts_params, query),
+                   output_field=BooleanField()),
+        ).annotate(
+            search_rank=RawSQL(
+                f'(CASE WHEN {starts} THEN 1 ELSE 0 END) + word_similarity(%s, {SEARCH_TEXT})',
+                (*starts_params, query), output_field=FloatField(),
+            ),
+        ).order_by('-search_rank', 'username')
+
+    starts = Q()
+    contains = Q()
+    for column in SEARCH_COLUMNS:
+        starts |= Q(**{f'{column}__istartswith': query})
+        contains |= Q(**{f'{column}__icontains': query})
+    return queryset.filter(contains).annotate(
+        search_rank=Case(When(starts, then=Value(1.0)), default=Value(0.5), output_field=FloatField()),
+    ).order_by('-search_rank', 'username')
@@ -1,4 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
+from .hashing import make_password
 from .models import User
 
 
@@ -20,10 +22,11 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
+        """Создание пользователя; ``save(password_hash=...)`` передаёт готовый хэш."""
         validated_data.pop('password_confirm')
         password = validated_data.pop('password')
-        user = User(**validated_data)
-        user.set_password(password)
+        encoded = validated_data.pop('password_hash', None) or make_password(password)
+        user = User(**validated_data, password=encoded)
         user.save()
         return user
 
@@ -39,6 +42,40 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class UserPickerSerializer(serializers.ModelSerializer):
+    """Пользователь в справочнике: только поля для выбора исполнителя."""
+    full_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'full_name', 'department', 'position']
+        # Столбцы, которые читаются из БД (full_name собирается из ФИО).
+        columns = ['id', 'username', 'last_name', 'first_name', 'patronymic', 'department', 'position']
+
+    def get_full_name(self, user):
+        return ' '.join(filter(None, (user.last_name, user.first_name, user.patronymic)))
+
+
+class UserCardSerializer(UserPickerSerializer):
+    """Карточка пользователя для подстановки имён в другие сервисы."""
+
+    class Meta(UserPickerSerializer.Meta):
+        fields = UserPickerSerializer.Meta.fields + ['is_active']
+        columns = UserPickerSerializer.Meta.columns + ['is_active']
+
+
+class UserResolveSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1))
+
+    def validate_ids(self, ids):
+        if len(ids) > settings.USER_RESOLVE_MAX_IDS:
+            raise serializers.ValidationError(
+                f'Не больше {settings.USER_RESOLVE_MAX_IDS} идентификаторов за запрос.'
+            )
+        # Порядок первого вхождения, без повторов.
+        return list(dict.fromkeys(ids))
+
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField()
@@ -1,9 +1,16 @@
+import threading
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import MD5PasswordHasher
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 
 from .models import User
 from .authentication import generate_token, decode_token
+from .hashing import amake_password, encode_password, hashing_pool
+from .usercache import user_cache
 
 
 TEST_DATABASES = {
@@ -75,7 +82,8 @@ class JWTTokenTest(TestCase):
         self.assertEqual(payload['username'], self.user.username)
 
 
-@override_settings(DATABASES=TEST_DATABASES)
+# Хэширование без пула процессов: запуск процессов пула не влияет на тайминги.
+@override_settings(DATABASES=TEST_DATABASES, AUTH_HASH_WORKERS=0)
 class AuthAPITest(TestCase):
     """Тесты API аутентификации."""
 
@@ -131,6 +139,14 @@ class AuthAPITest(TestCase):
         response = self.client.post(reverse('login'), data, format='json')
         self.assertEqual(response.status_code, 401)
 
+    def test_login_methods(self):
+        """Тест OPTIONS и запрета GET на асинхронном представлении входа."""
+        response = self.client.options(reverse('login'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Allow'], 'OPTIONS, POST')
+        response = self.client.get(reverse('login'))
+        self.assertEqual(response.status_code, 405)
+
     def test_profile_authenticated(self):
         """Тест получения профиля авторизованным пользователем."""
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
@@ -150,8 +166,201 @@ class AuthAPITest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.data['valid'])
 
+    def test_user_cache(self):
+        """Повторная аутентификация не читает БД; обновление профиля и деактивация сбрасывают снимок."""
+        before = user_cache.metrics()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.client.post(reverse('validate-token'))
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('validate-token'))
+        self.assertEqual(response.data['user']['username'], 'testuser')
+
+        response = self.client.patch(reverse('profile-update'), {'position': 'Инженер'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('profile')).data['position'], 'Инженер')
+        # Снимок без пароля: сохранение профиля не затирает хэш.
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password('testpass123'))
+
+        metrics = self.client.get(reverse('metrics')).data['user_cache']
+        self.assertEqual(metrics['misses'] - before['misses'], 2)
+        self.assertEqual(metrics['hits'] - before['hits'], 3)
+        self.assertEqual(metrics['invalidations'] - before['invalidations'], 1)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(reverse('validate-token'))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['detail'], 'Пользователь деактивирован.')
+
     def test_user_list(self):
         """Тест получения списка пользователей."""
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
         response = self.client.get(reverse('user-list'))
         self.assertEqual(response.status_code, 200)
+
+    @override_settings(RATE_LIMIT_ROUTES={'POST /api/auth/login/': (0.1, 2)})
+    def test_login_rate_limit(self):
+        """Тест ограничения частоты попыток входа."""
+        data = {'username': 'testuser', 'password': 'wrong'}
+        for _ in range(2):
+            response = self.client.post(reverse('login'), data, format='json')
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post(reverse('login'), data, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+        # Входы через frontend различаются по X-Real-IP пользователя.
+        response = self.client.post(reverse('login'), data, format='json', HTTP_X_REAL_IP='203.0.113.7')
+        self.assertEqual(response.status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.data['throttling']['throttled'], 1)
+        self.assertEqual(response.data['throttling']['admitted'], 3)
+
+
+@override_settings(DATABASES=TEST_DATABASES, PASSWORD_HASHERS=[
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+])
+class PasswordHashingTest(TestCase):
+    """Тесты пула хэширования паролей."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(username='hasher')
+        self.user.password = MD5PasswordHasher().encode('secret123', 'salt')
+        self.user.save()
+
+    def test_login_in_process_pool_rehashes(self):
+        """Вход через пул процессов; хэш старого профиля заменяется текущим."""
+        self.addCleanup(hashing_pool.shutdown)
+        data = {'username': 'hasher', 'password': 'secret123'}
+        response = self.client.post(reverse('login'), data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertTrue(self.user.check_password('secret123'))
+
+        data['password'] = 'wrong'
+        self.assertEqual(self.client.post(reverse('login'), data, format='json').status_code, 401)
+        self.assertEqual(hashing_pool.metrics()['pending'], 0)
+
+    @override_settings(AUTH_HASH_WORKERS=0)
+    def test_inline_hashing_off_event_loop(self):
+        """Без пула процессов хэш считается не в потоке цикла событий."""
+        threads = []
+
+        def encode(path, password):
+            threads.append(threading.get_ident())
+            return encode_password(path, password)
+
+        async def hash_in_loop():
+            threads.append(threading.get_ident())
+            return await amake_password('secret123')
+
+        with patch('accounts.hashing.encode_password', side_effect=encode):
+            encoded = async_to_sync(hash_in_loop)()
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$'))
+        self.assertEqual(len(threads), 2)
+        self.assertNotEqual(threads[0], threads[1])
+
+    @override_settings(AUTH_HASH_MAX_PENDING=0)
+    def test_saturated_pool_rejects(self):
+        """Заполненная очередь пула — сразу 503 с Retry-After."""
+        rejected = hashing_pool.metrics()['rejected']
+        data = {'username': 'hasher', 'password': 'secret123'}
+        response = self.client.post(reverse('login'), data, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        response = self.client.post(reverse('register'), {
+            'username': 'newuser', 'email': 'new@example.com',
+            'password': 'newpass123', 'password_confirm': 'newpass123',
+        }, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(User.objects.filter(username='newuser').exists())
+        self.assertEqual(hashing_pool.metrics()['rejected'] - rejected, 2)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class UserDirectoryTest(TestCase):
+    """Тесты справочника пользователей."""
+
+    def setUp(self):
+        self.client = APIClient()
+        people = [
+            ('ivanov', 'Иван', 'Иванов', 'Разработка', 'Инженер'),
+            ('petrova', 'Анна', 'Петрова', 'Разработка', 'Тестировщик'),
+            ('sidorov', 'Пётр', 'Сидоров', 'Продажи', 'Менеджер'),
+            ('smirnova', 'Ольга', 'Смирнова', 'Продажи', 'Руководитель отдела'),
+            ('kuznetsov', 'Олег', 'Кузнецов', 'Разработка', 'Архитектор'),
+        ]
+        for username, first_name, last_name, department, position in people:
+            User.objects.create(
+                username=username, first_name=first_name, last_name=last_name,
+                department=department, position=position,
+            )
+        User.objects.create(username='inactive', is_active=False)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {generate_token(User.objects.get(username="ivanov"))}',
+        )
+
+    def test_cursor_pagination(self):
+        response = self.client.get(reverse('user-list'), {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        usernames = [user['username'] for user in response.data['results']]
+        self.assertEqual(usernames, ['ivanov', 'kuznetsov'])
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'username', 'full_name', 'department', 'position'},
+        )
+        self.assertEqual(response.data['results'][0]['full_name'], 'Иванов Иван')
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            usernames += [user['username'] for user in response.data['results']]
+        self.assertEqual(usernames, ['ivanov', 'kuznetsov', 'petrova', 'sidorov', 'smirnova'])
+
+    def test_department_filter(self):
+        response = self.client.get(reverse('user-list'), {'department': 'Продажи'})
+        self.assertEqual(
+            [user['username'] for user in response.data['results']], ['sidorov', 'smirnova'],
+        )
+
+    def test_search(self):
+        # Совпадения по началу слова идут раньше совпадений внутри слова.
+        response = self.client.get(reverse('user-list'), {'q': 'S'})
+        self.assertEqual(
+            [user['username'] for user in response.data['results']],
+            ['sidorov', 'smirnova', 'kuznetsov'],
+        )
+        self.assertIsNone(response.data['next'])
+        response = self.client.get(reverse('user-list'), {'q': 'отдел', 'department': 'Продажи'})
+        self.assertEqual([user['username'] for user in response.data['results']], ['smirnova'])
+        response = self.client.get(reverse('user-list'), {'q': 'ova', 'page_size': 1})
+        self.assertEqual([user['username'] for user in response.data['results']], ['petrova'])
+
+    def test_resolve(self):
+        ivanov = User.objects.get(username='ivanov')
+        inactive = User.objects.get(username='inactive')
+        sidorov = User.objects.get(username='sidorov')
+        response = self.client.post(
+            reverse('user-resolve'),
+            {'ids': [sidorov.id, 999999, ivanov.id, sidorov.id, inactive.id]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [user['id'] for user in response.data['results']], [sidorov.id, ivanov.id, inactive.id],
+        )
+        self.assertEqual(response.data['results'][0]['full_name'], 'Сидоров Пётр')
+        self.assertFalse(response.data['results'][2]['is_active'])
+        self.assertEqual(response.data['missing'], [999999])
+
+    @override_settings(USER_RESOLVE_MAX_IDS=3)
+    def test_resolve_validation(self):
+        response = self.client.post(reverse('user-resolve'), {'ids': [1, 2, 3, 4]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('user-resolve'), {'ids': ['abc']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.credentials()
+        response = self.client.post(reverse('user-resolve'), {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
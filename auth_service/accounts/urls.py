@@ -2,10 +2,12 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    path('register/', views.RegisterView.as_view(), name='register'),
+    path('register/', views.register_view, name='register'),
     path('login/', views.login_view, name='login'),
     path('profile/', views.profile_view, name='profile'),
     path('profile/update/', views.profile_update_view, name='profile-update'),
     path('validate/', views.validate_token_view, name='validate-token'),
     path('users/', views.UserListView.as_view(), name='user-list'),
+    path('users/resolve/', views.resolve_users_view, name='user-resolve'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -0,0 +1,100 @@
+"""Кэш снимков пользователей для JWTAuthentication.
+
+Каждый запрос к auth_service с JWT (валидация токена другими сервисами,
+профиль, список пользователей) раньше читал пользователя из БД. Кэш
+хранит значения полей пользователя по id в пределах процесса: не более
+``AUTH_USER_CACHE_SIZE`` записей (вытесняются давно не использованные),
+каждая живёт ``AUTH_USER_CACHE_TTL`` секунд (0 — кэш выключен).
+
+Сохранение и удаление пользователя (обновление профиля, деактивация)
+сбрасывают его запись сигналами модели в своём процессе; в остальных
+процессах снимок устаревает не позднее чем через TTL. Массовые
+``QuerySet.update()`` сигналов не отправляют — после них нужен
+``user_cache.invalidate()``.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+from .models import User
+
+# Хэш пароля представлениям с JWT-аутентификацией не нужен: поле остаётся
+# отложенным и при обращении догружается из БД.
+SNAPSHOT_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields if field.attname != 'password'
+)
+
+
+class UserCache:
+    """LRU-кэш снимков пользователей с TTL."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.counters = Counter()
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        """Пользователь по id (User.DoesNotExist, если его нет).
+
+        Каждый вызов возвращает новый экземпляр модели: изменения,
+        сделанные в одном запросе, не попадают в кэш и в другие запросы.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(user_id)
+                self.counters['hits'] += 1
+                values = entry[0]
+            else:
+                self.counters['misses'] += 1
+                values = None
+                generation = self.generation
+
+        if values is None:
+            values = User.objects.filter(pk=user_id).values_list(*SNAPSHOT_FIELDS).first()
+            if values is None:
+                raise User.DoesNotExist()
+            self._put(user_id, values, now, generation)
+        return User.from_db('default', SNAPSHOT_FIELDS, values)
+
+    def _put(self, user_id, values, now, generation):
+        ttl = settings.AUTH_USER_CACHE_TTL
+        with self.lock:
+            # Снимок, прочитанный до сброса кэша, мог устареть.
+            if ttl <= 0 or generation != self.generation:
+                return
+            self.entries[user_id] = (values, now + ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > settings.AUTH_USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.generation += 1
+            self.counters['invalidations'] += 1
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def metrics(self):
+        with self.lock:
+            return {
+                **dict.fromkeys(('hits', 'misses', 'invalidations'), 0),
+                **self.counters,
+                'size': len(self.entries),
+            }
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(sender, instance, **kwargs):
+    """Обработчик post_save/post_delete модели User."""
+    user_cache.invalidate(instance.pk)
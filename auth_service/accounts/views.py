@@ -1,41 +1,48 @@
+from asgiref.sync import sync_to_async
 from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from django.contrib.auth import authenticate
 
 from .models import User
-from .serializers import UserRegistrationSerializer, UserSerializer, LoginSerializer
-from .authentication import generate_token
-
-
-class RegisterView(generics.CreateAPIView):
+from .serializers import (
+    UserRegistrationSerializer, UserSerializer, UserPickerSerializer, UserCardSerializer,
+    UserResolveSerializer, LoginSerializer,
+)
+from .asyncviews import async_api_view
+from .authentication import authenticate_credentials, generate_token
+from .dbslots import connection_slots
+from .hashing import amake_password, hashing_pool
+from .middleware import throttling_metrics
+from .pagination import UserCursorPagination
+from .search import search_users
+from .usercache import user_cache
+
+
+@async_api_view(['POST'], permission_classes=[AllowAny], authentication_classes=[])
+async def register_view(request):
     """Регистрация нового пользователя."""
-    queryset = User.objects.all()
-    serializer_class = UserRegistrationSerializer
-    permission_classes = [AllowAny]
-
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        token = generate_token(user)
-        return Response({
-            'user': UserSerializer(user).data,
-            'token': token,
-        }, status=status.HTTP_201_CREATED)
+    serializer = UserRegistrationSerializer(data=request.data)
+    # Проверка уникальности логина обращается к БД.
+    await sync_to_async(serializer.is_valid)(raise_exception=True)
+    encoded = await amake_password(serializer.validated_data['password'])
+    user = await sync_to_async(serializer.save)(password_hash=encoded)
+    token = generate_token(user)
+    return Response({
+        'user': UserSerializer(user).data,
+        'token': token,
+    }, status=status.HTTP_201_CREATED)
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def login_view(request):
+@async_api_view(['POST'], permission_classes=[AllowAny], authentication_classes=[])
+async def login_view(request):
     """Аутентификация пользователя и выдача JWT-токена."""
     serializer = LoginSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
-    user = authenticate(
-        username=serializer.validated_data['username'],
-        password=serializer.validated_data['password'],
+    user = await authenticate_credentials(
+        serializer.validated_data['username'],
+        serializer.validated_data['password'],
     )
     if user is None:
         return Response(
@@ -78,7 +85,65 @@ def validate_token_view(request):
 
 
 class UserListView(generics.ListAPIView):
-    """Список всех пользователей."""
-    queryset = User.objects.filter(is_active=True)
-    serializer_class = UserSerializer
+    """Справочник активных пользователей для выбора исполнителя.
+
+    Курсорная пагинация по логину, ``?department=`` — фильтр по отделу.
+    С ``?q=`` результаты упорядочены по релевантности, поэтому курсора нет:
+    возвращается не более ``?page_size=`` лучших совпадений в том же
+    формате ответа.
+    """
+    serializer_class = UserPickerSerializer
+    pagination_class = UserCursorPagination
     permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = User.objects.filter(is_active=True).only(*UserPickerSerializer.Meta.columns)
+        department = self.request.query_params.get('department')
+        if department:
+            queryset = queryset.filter(department=department)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+        limit = self.paginator.get_page_size(request)
+        users = search_users(self.get_queryset(), query)[:limit]
+        return Response({
+            'next': None,
+            'previous': None,
+            'results': self.get_serializer(users, many=True).data,
+        })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def resolve_users_view(request):
+    """Карточки пользователей по списку id (для подстановки имён).
+
+    Все пользователи читаются одним запросом ``id IN (...)`` по первичному
+    ключу, включая деактивированных: их имена остаются в истории задач.
+    Карточки не зависят от запроса, поэтому клиенты кэшируют их по id.
+    ``missing`` — id, которых нет в БД.
+    """
+    serializer = UserResolveSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['ids']
+
+    users = User.objects.filter(pk__in=ids).only(*UserCardSerializer.Meta.columns).in_bulk()
+    return Response({
+        'results': UserCardSerializer([users[pk] for pk in ids if pk in users], many=True).data,
+        'missing': [pk for pk in ids if pk not in users],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def metrics_view(request):
+    """Метрики сервиса для мониторинга."""
+    return Response({
+        'throttling': throttling_metrics(),
+        'user_cache': user_cache.metrics(),
+        'password_hashing': hashing_pool.metrics(),
+        'database': connection_slots.metrics(),
+    })
@@ -34,6 +34,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'accounts.middleware.RequestLoggingMiddleware',
+    'accounts.middleware.LoadSheddingMiddleware',
 ]
 
 ROOT_URLCONF = 'auth_service.urls'
@@ -58,7 +59,7 @@ WSGI_APPLICATION = 'auth_service.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'accounts.postgresql',
         'NAME': os.environ.get('DB_NAME', 'auth_db'),
         'USER': os.environ.get('DB_USER', 'postgres'),
         'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
@@ -67,6 +68,30 @@ DATABASES = {
     }
 }
 
+# Не больше DB_MAX_CONNECTIONS соединений с БД на процесс (accounts.dbslots);
+# ожидание свободного, сек. Сумма по процессам всех сервисов должна
+# оставаться ниже max_connections PostgreSQL (по умолчанию 100).
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '10'))
+DB_CONNECTION_WAIT = float(os.environ.get('DB_CONNECTION_WAIT', '10'))
+
+# Профиль хэширования паролей: первый хэшер списка хэширует новые пароли,
+# остальные проверяют старые хэши (при входе пароль перехэшируется).
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+    if profile != PASSWORD_HASHER_PROFILE
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Пул процессов хэширования паролей (accounts.hashing): число процессов
+# (0 — в потоке запроса) и задач в работе и очереди, сверх которых — 503.
+AUTH_HASH_WORKERS = int(os.environ.get('AUTH_HASH_WORKERS', '2'))
+AUTH_HASH_MAX_PENDING = int(os.environ.get('AUTH_HASH_MAX_PENDING', '16'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -81,6 +106,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'EXCEPTION_HANDLER': 'accounts.exceptions.exception_handler',
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -100,6 +126,37 @@ AUTH_USER_MODEL = 'accounts.User'
 JWT_SECRET = os.environ.get('JWT_SECRET', 'jwt-secret-key-change-in-production')
 JWT_EXPIRATION_HOURS = 24
 
+# Справочник пользователей /api/auth/users/: размер страницы по умолчанию и
+# максимальный ?page_size=.
+USER_DIRECTORY_PAGE_SIZE = int(os.environ.get('USER_DIRECTORY_PAGE_SIZE', '50'))
+USER_DIRECTORY_MAX_PAGE_SIZE = int(os.environ.get('USER_DIRECTORY_MAX_PAGE_SIZE', '200'))
+# Не больше id в одном запросе /api/auth/users/resolve/.
+USER_RESOLVE_MAX_IDS = int(os.environ.get('USER_RESOLVE_MAX_IDS', '5000'))
+
+# Кэш снимков пользователей JWTAuthentication в пределах процесса
+# (accounts.usercache): число записей и время жизни снимка, сек. (0 — выключен).
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', '10000'))
+AUTH_USER_CACHE_TTL = float(os.environ.get('AUTH_USER_CACHE_TTL', '30'))
+
+# Ограничение частоты запросов и сброс нагрузки (accounts.middleware.LoadSheddingMiddleware).
+# Лимиты действуют в пределах одного процесса gunicorn: token bucket на
+# пользователя (JWT user_id, без токена — IP) и на пару пользователь + маршрут
+# ("МЕТОД /путь/{id}/"); RATE_LIMIT_ROUTES переопределяет (скорость в секунду,
+# ёмкость) для отдельных маршрутов.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', '20'))
+RATE_LIMIT_USER_BURST = int(os.environ.get('RATE_LIMIT_USER_BURST', '60'))
+RATE_LIMIT_ROUTE_RATE = float(os.environ.get('RATE_LIMIT_ROUTE_RATE', '10'))
+RATE_LIMIT_ROUTE_BURST = int(os.environ.get('RATE_LIMIT_ROUTE_BURST', '30'))
+RATE_LIMIT_ROUTES = {}
+RATE_LIMIT_EXEMPT_PATHS = ('/api/auth/metrics/',)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))
+# Сброс нагрузки (503): одновременных запросов в процессе и ожидание в
+# очереди по заголовку X-Request-Start от nginx, сек.
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get('LOAD_SHED_MAX_IN_FLIGHT', '32'))
+LOAD_SHED_MAX_QUEUE_WAIT = float(os.environ.get('LOAD_SHED_MAX_QUEUE_WAIT', '10'))
+LOAD_SHED_RETRY_AFTER = int(os.environ.get('LOAD_SHED_RETRY_AFTER', '5'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
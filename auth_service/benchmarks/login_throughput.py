@@ -0,0 +1,111 @@
+"""Входов в секунду на ядро для профилей хэширования паролей.
+
+Запуск внутри контейнера auth_service:
+
+    docker-compose exec auth_service python benchmarks/login_throughput.py
+
+Для каждого профиля из PASSWORD_HASHER_PROFILES создаётся пользователь с
+паролем, захэшированным этим профилем, после чего печатаются:
+
+- проверок пароля в секунду в одном потоке без пула (одно ядро);
+- входов в секунду через authenticate_credentials (поиск пользователя и
+  проверка пароля в пуле из ``--workers`` процессов) при ``--concurrency``
+  одновременных входах, всего и на процесс пула.
+
+Профили, библиотека хэшера которых не установлена (argon2-cffi),
+пропускаются. Пользователи бенчмарка удаляются.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auth_service.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import get_hasher  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from accounts.authentication import authenticate_credentials  # noqa: E402
+from accounts.hashing import hashing_pool  # noqa: E402
+from accounts.models import User  # noqa: E402
+
+PASSWORD = 'bench-password-123'
+
+
+def profile_hashers(profile):
+    preferred = settings.PASSWORD_HASHER_PROFILES[profile]
+    return [preferred] + [
+        hasher for hasher in settings.PASSWORD_HASHERS if hasher != preferred
+    ]
+
+
+def verify_rate(encoded, seconds):
+    """Проверок пароля в секунду в текущем потоке."""
+    hasher = get_hasher()
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        assert hasher.verify(PASSWORD, encoded)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+async def login_rate(username, concurrency, seconds):
+    """Входов в секунду при ``concurrency`` одновременных входах."""
+    deadline = time.perf_counter() + seconds
+    count = 0
+
+    async def client():
+        nonlocal count
+        while time.perf_counter() < deadline:
+            assert await authenticate_credentials(username, PASSWORD) is not None
+            count += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='процессов пула')
+    parser.add_argument('--concurrency', type=int, default=32, help='одновременных входов')
+    parser.add_argument('--seconds', type=float, default=10.0, help='длительность замера')
+    args = parser.parse_args()
+    logging.getLogger('accounts').setLevel(logging.WARNING)
+
+    print(f'{"profile":>8} {"verify/s 1 core":>16} {"logins/s":>9} {"logins/s/core":>14}')
+    for profile in settings.PASSWORD_HASHER_PROFILES:
+        overrides = override_settings(
+            PASSWORD_HASHERS=profile_hashers(profile),
+            AUTH_HASH_WORKERS=args.workers,
+            AUTH_HASH_MAX_PENDING=args.concurrency,
+        )
+        with overrides:
+            try:
+                encoded = get_hasher().encode(PASSWORD, get_hasher().salt())
+            except ValueError as e:
+                print(f'{profile:>8} пропущен: {e}')
+                continue
+            user = User.objects.create(username=f'bench-{profile}', password=encoded)
+            try:
+                single = verify_rate(encoded, args.seconds)
+                # Прогрев: запуск процессов пула не входит в замер.
+                asyncio.run(login_rate(user.username, args.workers, 1))
+                logins = asyncio.run(login_rate(user.username, args.concurrency, args.seconds))
+            finally:
+                user.delete()
+                hashing_pool.shutdown()
+        print(f'{profile:>8} {single:>16.1f} {logins:>9.1f} {logins / args.workers:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
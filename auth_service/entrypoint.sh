@@ -8,11 +8,13 @@ while ! python -c "import psycopg2; psycopg2.connect(dbname='$DB_NAME', user='$D
 done
 echo "PostgreSQL готов!"
 
-echo "Генерация миграций..."
-python manage.py makemigrations accounts --noinput
-
 echo "Применение миграций..."
 python manage.py migrate --noinput
 
 echo "Запуск auth_service..."
-exec gunicorn auth_service.wsgi:application --bind 0.0.0.0:8000 --workers 2 --timeout 120
+# APP_SERVER=wsgi — прежние синхронные воркеры (для сравнения и отката).
+if [ "${APP_SERVER:-asgi}" = "wsgi" ]; then
+    exec gunicorn auth_service.wsgi:application --bind 0.0.0.0:8000 --workers 2 --timeout 120
+fi
+exec gunicorn auth_service.asgi:application -k uvicorn.workers.UvicornWorker \
+    --bind 0.0.0.0:8000 --workers 2 --timeout 120
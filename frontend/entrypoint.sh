@@ -5,4 +5,9 @@ echo "Применение миграций frontend..."
 python manage.py migrate --noinput
 
 echo "Запуск frontend..."
-exec gunicorn frontend.wsgi:application --bind 0.0.0.0:8000 --workers 2 --timeout 120
+# APP_SERVER=wsgi — прежние синхронные воркеры (для сравнения и отката).
+if [ "${APP_SERVER:-asgi}" = "wsgi" ]; then
+    exec gunicorn frontend.wsgi:application --bind 0.0.0.0:8000 --workers 2 --timeout 120
+fi
+exec gunicorn frontend.asgi:application -k uvicorn.workers.UvicornWorker \
+    --bind 0.0.0.0:8000 --workers 2 --timeout 120
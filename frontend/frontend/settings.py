@@ -31,6 +31,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'web.middleware.RequestLoggingMiddleware',
+    'web.middleware.LoadSheddingMiddleware',
 ]
 
 ROOT_URLCONF = 'frontend.urls'
@@ -75,8 +76,33 @@ AUTH_SERVICE_URL = os.environ.get('AUTH_SERVICE_URL', 'http://auth-service:8000'
 TASK_SERVICE_URL = os.environ.get('TASK_SERVICE_URL', 'http://task-service:8000')
 NOTIFICATION_SERVICE_URL = os.environ.get('NOTIFICATION_SERVICE_URL', 'http://notification-service:8000')
 
+# Время хранения ответов task_service для условных запросов (If-None-Match), сек.
+TASK_SERVICE_CACHE_TIMEOUT = int(os.environ.get('TASK_SERVICE_CACHE_TIMEOUT', '300'))
+
+# Время хранения карточек пользователей из /api/auth/users/resolve/, сек.
+USER_CARD_CACHE_TIMEOUT = int(os.environ.get('USER_CARD_CACHE_TIMEOUT', '300'))
+
 JWT_SECRET = os.environ.get('JWT_SECRET', 'jwt-secret-key-change-in-production')
 
+# Ограничение частоты запросов и сброс нагрузки (web.middleware.LoadSheddingMiddleware).
+# Лимиты действуют в пределах одного процесса gunicorn: token bucket на
+# пользователя (user_id из JWT в сессии, без входа — IP) и на пару пользователь + маршрут
+# ("МЕТОД /путь/{id}/"); RATE_LIMIT_ROUTES переопределяет (скорость в секунду,
+# ёмкость) для отдельных маршрутов.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', '20'))
+RATE_LIMIT_USER_BURST = int(os.environ.get('RATE_LIMIT_USER_BURST', '60'))
+RATE_LIMIT_ROUTE_RATE = float(os.environ.get('RATE_LIMIT_ROUTE_RATE', '10'))
+RATE_LIMIT_ROUTE_BURST = int(os.environ.get('RATE_LIMIT_ROUTE_BURST', '30'))
+RATE_LIMIT_ROUTES = {}
+RATE_LIMIT_EXEMPT_PATHS = ('/metrics/',)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))
+# Сброс нагрузки (503): одновременных запросов в процессе и ожидание в
+# очереди по заголовку X-Request-Start от nginx, сек.
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get('LOAD_SHED_MAX_IN_FLIGHT', '32'))
+LOAD_SHED_MAX_QUEUE_WAIT = float(os.environ.get('LOAD_SHED_MAX_QUEUE_WAIT', '10'))
+LOAD_SHED_RETRY_AFTER = int(os.environ.get('LOAD_SHED_RETRY_AFTER', '5'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
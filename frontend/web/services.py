@@ -1,7 +1,9 @@
 """Сервисный слой для взаимодействия с микросервисами через REST API."""
+import hashlib
 import logging
 import requests
 from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
@@ -9,17 +11,30 @@ logger = logging.getLogger(__name__)
 class AuthServiceClient:
     """Клиент для взаимодействия с auth_service."""
 
+    # Не больше USER_RESOLVE_MAX_IDS auth_service.
+    RESOLVE_BATCH_SIZE = 1000
+
     def __init__(self):
         self.base_url = settings.AUTH_SERVICE_URL
 
-    def register(self, data):
-        resp = requests.post(f'{self.base_url}/api/auth/register/', json=data, timeout=10)
+    @staticmethod
+    def _client_headers(client_ip):
+        # Вход и регистрация идут без токена: auth_service ограничивает их
+        # частоту по IP пользователя из X-Real-IP, а не по адресу frontend.
+        return {'X-Real-IP': client_ip} if client_ip else {}
+
+    def register(self, data, client_ip=None):
+        resp = requests.post(
+            f'{self.base_url}/api/auth/register/',
+            json=data, headers=self._client_headers(client_ip), timeout=10,
+        )
         return resp.json(), resp.status_code
 
-    def login(self, username, password):
+    def login(self, username, password, client_ip=None):
         resp = requests.post(
             f'{self.base_url}/api/auth/login/',
             json={'username': username, 'password': password},
+            headers=self._client_headers(client_ip),
             timeout=10,
         )
         return resp.json(), resp.status_code
@@ -41,14 +56,45 @@ class AuthServiceClient:
         )
         return resp.json(), resp.status_code
 
-    def get_users(self, token):
+    def get_users(self, token, **params):
+        """Страница справочника пользователей (q, department, page_size)."""
         resp = requests.get(
             f'{self.base_url}/api/auth/users/',
+            params={key: value for key, value in params.items() if value},
             headers={'Authorization': f'Bearer {token}'},
             timeout=10,
         )
         return resp.json(), resp.status_code
 
+    def resolve_users(self, token, ids):
+        """Карточки пользователей по id: {id: карточка}.
+
+        Повторы и None в ``ids`` отбрасываются. Карточки кэшируются по id
+        (они одинаковы для всех пользователей), в auth_service
+        запрашиваются только отсутствующие в кэше. Неизвестных id в
+        результате нет.
+        """
+        ids = {int(user_id) for user_id in ids if user_id is not None}
+        keys = {f'user_card:{user_id}': user_id for user_id in ids}
+        users = {keys[key]: card for key, card in cache.get_many(keys).items()}
+
+        missing = sorted(ids - users.keys())
+        for start in range(0, len(missing), self.RESOLVE_BATCH_SIZE):
+            resp = requests.post(
+                f'{self.base_url}/api/auth/users/resolve/',
+                json={'ids': missing[start:start + self.RESOLVE_BATCH_SIZE]},
+                headers={'Authorization': f'Bearer {token}'},
+                timeout=10,
+            )
+            resp.raise_for_status()
+            cards = {card['id']: card for card in resp.json()['results']}
+            cache.set_many(
+                {f'user_card:{user_id}': card for user_id, card in cards.items()},
+                settings.USER_CARD_CACHE_TIMEOUT,
+            )
+            users.update(cards)
+        return users
+
 
 class TaskServiceClient:
     """Клиент для взаимодействия с task_service."""
@@ -59,6 +105,27 @@ class TaskServiceClient:
     def _headers(self, token):
         return {'Authorization': f'Bearer {token}'}
 
+    def _conditional_get(self, token, url):
+        """GET с повторным использованием закэшированного тела при ответе 304."""
+        cache_key = 'task_service:' + hashlib.sha256(f'{token}:{url}'.encode()).hexdigest()
+        cached = cache.get(cache_key)
+        headers = self._headers(token)
+        if cached:
+            headers['If-None-Match'] = cached['etag']
+
+        resp = requests.get(url, headers=headers, timeout=10)
+        if resp.status_code == 304 and cached:
+            return cached['body'], 200
+
+        body = resp.json()
+        etag = resp.headers.get('ETag')
+        if resp.status_code == 200 and etag:
+            cache.set(
+                cache_key, {'etag': etag, 'body': body},
+                settings.TASK_SERVICE_CACHE_TIMEOUT,
+            )
+        return body, resp.status_code
+
     # --- Проекты ---
     def get_projects(self, token):
         resp = requests.get(
@@ -68,11 +135,9 @@ class TaskServiceClient:
         return resp.json(), resp.status_code
 
     def get_project(self, token, project_id):
-        resp = requests.get(
-            f'{self.base_url}/api/tasks/projects/{project_id}/',
-            headers=self._headers(token), timeout=10,
+        return self._conditional_get(
+            token, f'{self.base_url}/api/tasks/projects/{project_id}/',
         )
-        return resp.json(), resp.status_code
 
     def create_project(self, token, data):
         resp = requests.post(
@@ -96,11 +161,9 @@ class TaskServiceClient:
         return resp.status_code
 
     def get_project_statistics(self, token, project_id):
-        resp = requests.get(
-            f'{self.base_url}/api/tasks/projects/{project_id}/statistics/',
-            headers=self._headers(token), timeout=10,
+        return self._conditional_get(
+            token, f'{self.base_url}/api/tasks/projects/{project_id}/statistics/',
         )
-        return resp.json(), resp.status_code
 
     # --- Задачи ---
     def get_tasks(self, token, **params):
@@ -111,11 +174,9 @@ class TaskServiceClient:
         return resp.json(), resp.status_code
 
     def get_task(self, token, task_id):
-        resp = requests.get(
-            f'{self.base_url}/api/tasks/tasks/{task_id}/',
-            headers=self._headers(token), timeout=10,
+        return self._conditional_get(
+            token, f'{self.base_url}/api/tasks/tasks/{task_id}/',
         )
-        return resp.json(), resp.status_code
 
     def create_task(self, token, data):
         resp = requests.post(
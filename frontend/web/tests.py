@@ -1,6 +1,11 @@
-from django.test import TestCase, RequestFactory
+import threading
+
+from django.test import TestCase, RequestFactory, override_settings
 from unittest.mock import patch, MagicMock
 from django.test import Client
+from django.core.cache import cache
+
+from .services import auth_client, task_client
 
 
 class FrontendViewsTest(TestCase):
@@ -51,6 +56,35 @@ class FrontendViewsTest(TestCase):
         response = self.client.get('/logout/')
         self.assertEqual(response.status_code, 302)
 
+    @patch('web.views.notification_client')
+    @patch('web.views.task_client')
+    def test_dashboard_fetches_concurrently(self, mock_tasks, mock_notifications):
+        """Дашборд запрашивает сервисы одновременно; ошибка одного не мешает остальным."""
+        # Последовательные вызовы не дождались бы друг друга на барьере.
+        barrier = threading.Barrier(2, timeout=5)
+
+        def get_projects(token):
+            barrier.wait()
+            return [{'id': 1, 'name': 'Проект Альфа', 'status': 'active'}], 200
+
+        def get_tasks(token, assignee=None):
+            barrier.wait()
+            return [{'id': 2, 'title': 'Задача Бета', 'priority': 'high', 'status': 'todo'}], 200
+
+        mock_tasks.get_projects.side_effect = get_projects
+        mock_tasks.get_tasks.side_effect = get_tasks
+        mock_notifications.get_unread_count.side_effect = ConnectionError('недоступен')
+        session = self.client.session
+        session['token'] = 'test-token'
+        session['user'] = {'id': 5, 'username': 'user'}
+        session.save()
+
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Проект Альфа')
+        self.assertContains(response, 'Задача Бета')
+        mock_tasks.get_tasks.assert_called_once_with('test-token', assignee=5)
+
     @patch('web.views.auth_client')
     def test_login_success(self, mock_auth):
         """Тест успешного входа."""
@@ -64,8 +98,9 @@ class FrontendViewsTest(TestCase):
         response = self.client.post('/login/', {
             'username': 'testuser',
             'password': 'testpass123',
-        })
+        }, HTTP_X_REAL_IP='203.0.113.7')
         self.assertEqual(response.status_code, 302)
+        mock_auth.login.assert_called_once_with('testuser', 'testpass123', client_ip='203.0.113.7')
 
     @patch('web.views.auth_client')
     def test_login_failure(self, mock_auth):
@@ -97,3 +132,82 @@ class FrontendViewsTest(TestCase):
             'password_confirm': 'newpass123',
         })
         self.assertEqual(response.status_code, 302)
+
+    @override_settings(RATE_LIMIT_USER_BURST=2)
+    def test_rate_limit(self):
+        """Тест ограничения частоты запросов."""
+        self.assertEqual(self.client.get('/login/').status_code, 200)
+        self.assertEqual(self.client.get('/').status_code, 200)
+        response = self.client.get('/login/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertContains(response, 'Слишком много запросов', status_code=429)
+
+
+class TaskServiceClientTest(TestCase):
+    """Тесты HTTP-клиента task_service."""
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('web.services.requests.get')
+    def test_statistics_reuses_cached_body_on_304(self, mock_get):
+        """При ответе 304 возвращается ранее полученное тело."""
+        mock_get.return_value = MagicMock(
+            status_code=200, headers={'ETag': '"abc"'},
+            json=MagicMock(return_value={'total': 3}),
+        )
+        self.assertEqual(task_client.get_project_statistics('token', 1), ({'total': 3}, 200))
+
+        mock_get.return_value = MagicMock(status_code=304, headers={'ETag': '"abc"'})
+        self.assertEqual(task_client.get_project_statistics('token', 1), ({'total': 3}, 200))
+        self.assertEqual(mock_get.call_args.kwargs['headers']['If-None-Match'], '"abc"')
+
+    @patch('web.services.requests.get')
+    def test_task_revalidated_with_etag(self, mock_get):
+        """Повторный запрос задачи отправляет If-None-Match и принимает новое тело."""
+        mock_get.return_value = MagicMock(
+            status_code=200, headers={'ETag': '"v1"'},
+            json=MagicMock(return_value={'id': 7, 'status': 'todo'}),
+        )
+        task_client.get_task('token', 7)
+
+        mock_get.return_value = MagicMock(
+            status_code=200, headers={'ETag': '"v2"'},
+            json=MagicMock(return_value={'id': 7, 'status': 'done'}),
+        )
+        self.assertEqual(task_client.get_task('token', 7), ({'id': 7, 'status': 'done'}, 200))
+        self.assertEqual(mock_get.call_args.kwargs['headers']['If-None-Match'], '"v1"')
+
+        mock_get.return_value = MagicMock(status_code=304, headers={})
+        self.assertEqual(task_client.get_task('token', 7), ({'id': 7, 'status': 'done'}, 200))
+
+
+class AuthServiceClientTest(TestCase):
+    """Тесты HTTP-клиента auth_service."""
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('web.services.requests.post')
+    def test_resolve_users_dedups_and_caches(self, mock_post):
+        """Повторы id отбрасываются, закэшированные карточки не запрашиваются."""
+        mock_post.return_value = MagicMock(
+            status_code=200,
+            json=MagicMock(return_value={
+                'results': [{'id': 2, 'username': 'ivanov'}, {'id': 5, 'username': 'petrova'}],
+                'missing': [9],
+            }),
+        )
+        users = auth_client.resolve_users('token', [5, 2, None, 5, '2', 9])
+        self.assertEqual(set(users), {2, 5})
+        self.assertEqual(mock_post.call_args.kwargs['json'], {'ids': [2, 5, 9]})
+
+        mock_post.return_value.json.return_value = {'results': [{'id': 3, 'username': 'sidorov'}]}
+        users = auth_client.resolve_users('token', [2, 3, 5])
+        self.assertEqual(users[3]['username'], 'sidorov')
+        self.assertEqual(users[5]['username'], 'petrova')
+        self.assertEqual(mock_post.call_args.kwargs['json'], {'ids': [3]})
+
+        auth_client.resolve_users('token', [2, 3])
+        self.assertEqual(mock_post.call_count, 2)
@@ -14,4 +14,5 @@ urlpatterns = [
     path('tasks/<int:task_id>/', views.task_detail, name='task-detail'),
     path('notifications/', views.notifications_view, name='notifications'),
     path('profile/', views.profile_view, name='profile'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
@@ -1,7 +1,13 @@
+import asyncio
 import logging
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 
+from .middleware import throttling_metrics
 from .services import auth_client, task_client, notification_client
 
 logger = logging.getLogger(__name__)
@@ -13,7 +19,14 @@ def get_token(request):
 
 
 def login_required_custom(view_func):
-    """Декоратор для проверки аутентификации."""
+    """Декоратор для проверки аутентификации (синхронных и async-представлений)."""
+    if iscoroutinefunction(view_func):
+        async def async_wrapper(request, *args, **kwargs):
+            if not await sync_to_async(get_token)(request):
+                return redirect('login')
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
     def wrapper(request, *args, **kwargs):
         if not get_token(request):
             return redirect('login')
@@ -21,6 +34,24 @@ def login_required_custom(view_func):
     return wrapper
 
 
+async def fetch_concurrently(**calls):
+    """Параллельные вызовы клиентов сервисов: {имя: (функция, аргументы...)}.
+
+    Клиенты синхронные (requests), поэтому каждый вызов выполняется в
+    отдельном потоке пула. Результат — {имя: ответ или None при ошибке}.
+    """
+    async def call(name, func, *args):
+        try:
+            result, _ = await sync_to_async(func, thread_sensitive=False)(*args)
+            return result
+        except Exception as e:
+            logger.error('Error fetching %s: %s', name, e)
+            return None
+
+    results = await asyncio.gather(*(call(name, *spec) for name, spec in calls.items()))
+    return dict(zip(calls, results))
+
+
 def index(request):
     """Главная страница."""
     token = get_token(request)
@@ -29,6 +60,11 @@ def index(request):
     return render(request, 'web/index.html')
 
 
+def client_ip(request):
+    """IP пользователя: X-Real-IP выставляет nginx."""
+    return request.META.get('HTTP_X_REAL_IP') or request.META.get('REMOTE_ADDR')
+
+
 def register_view(request):
     """Регистрация пользователя."""
     if request.method == 'POST':
@@ -41,7 +77,7 @@ def register_view(request):
             'last_name': request.POST.get('last_name', ''),
         }
         try:
-            result, status_code = auth_client.register(data)
+            result, status_code = auth_client.register(data, client_ip=client_ip(request))
             if status_code == 201:
                 request.session['token'] = result['token']
                 request.session['user'] = result['user']
@@ -66,7 +102,7 @@ def login_view(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
         try:
-            result, status_code = auth_client.login(username, password)
+            result, status_code = auth_client.login(username, password, client_ip=client_ip(request))
             if status_code == 200:
                 request.session['token'] = result['token']
                 request.session['user'] = result['user']
@@ -88,35 +124,35 @@ def logout_view(request):
 
 
 @login_required_custom
-def dashboard(request):
-    """Главная панель управления."""
+async def dashboard(request):
+    """Главная панель управления.
+
+    Три запроса к сервисам выполняются одновременно: время ответа —
+    самый долгий из них, а не сумма.
+    """
+    # Сессия уже загружена декоратором, повторное чтение не обращается к БД.
     token = get_token(request)
+    user = request.session.get('user', {})
+    results = await fetch_concurrently(
+        projects=(task_client.get_projects, token),
+        tasks=(partial(task_client.get_tasks, assignee=user.get('id')), token),
+        notifications=(notification_client.get_unread_count, token),
+    )
+    projects, tasks, unread = results['projects'], results['tasks'], results['notifications']
     context = {
-        'user': request.session.get('user', {}),
+        'user': user,
         'projects': [],
         'my_tasks': [],
         'unread_count': 0,
     }
-    try:
-        projects, _ = task_client.get_projects(token)
+    if projects is not None:
         context['projects'] = projects if isinstance(projects, list) else projects.get('results', [])
-    except Exception as e:
-        logger.error('Error fetching projects: %s', e)
-
-    try:
-        user_id = request.session.get('user', {}).get('id')
-        tasks, _ = task_client.get_tasks(token, assignee=user_id)
+    if tasks is not None:
         context['my_tasks'] = tasks if isinstance(tasks, list) else tasks.get('results', [])
-    except Exception as e:
-        logger.error('Error fetching tasks: %s', e)
-
-    try:
-        unread, _ = notification_client.get_unread_count(token)
+    if unread is not None:
         context['unread_count'] = unread.get('unread_count', 0)
-    except Exception as e:
-        logger.error('Error fetching notifications: %s', e)
-
-    return render(request, 'web/dashboard.html', context)
+    # Контекстные процессоры (сообщения) читают сессию синхронно.
+    return await sync_to_async(render)(request, 'web/dashboard.html', context)
 
 
 @login_required_custom
@@ -229,17 +265,21 @@ def task_create(request):
 
     projects = []
     users = []
+    assignee_q = request.GET.get('assignee_q', '').strip()
     try:
         proj_result, _ = task_client.get_projects(token)
         projects = proj_result if isinstance(proj_result, list) else proj_result.get('results', [])
-        users_result, _ = auth_client.get_users(token)
-        users = users_result if isinstance(users_result, list) else users_result.get('results', [])
+        # В список исполнителей попадает первая страница справочника
+        # (или лучшие совпадения поиска), а не все пользователи.
+        users_result, _ = auth_client.get_users(token, q=assignee_q)
+        users = users_result.get('results', [])
     except Exception as e:
         logger.error('Error fetching data for task creation: %s', e)
 
     return render(request, 'web/task_create.html', {
         'projects': projects,
         'users': users,
+        'assignee_q': assignee_q,
     })
 
 
@@ -277,6 +317,21 @@ def task_detail(request, task_id):
         messages.error(request, 'Ошибка загрузки задачи.')
         return redirect('tasks')
 
+    # Имена автора, исполнителя и авторов комментариев — одним запросом.
+    comments = task.get('comments', [])
+    try:
+        users = auth_client.resolve_users(token, [
+            task.get('creator_id'), task.get('assignee_id'),
+            *(comment.get('author_id') for comment in comments),
+        ])
+    except Exception as e:
+        logger.error('Error resolving users: %s', e)
+        users = {}
+    task['creator'] = users.get(task.get('creator_id'))
+    task['assignee'] = users.get(task.get('assignee_id'))
+    for comment in comments:
+        comment['author'] = users.get(comment.get('author_id'))
+
     return render(request, 'web/task_detail.html', {'task': task})
 
 
@@ -335,3 +390,9 @@ def profile_view(request):
         user_data = request.session.get('user', {})
 
     return render(request, 'web/profile.html', {'profile': user_data})
+
+
+@login_required_custom
+def metrics_view(request):
+    """Метрики frontend для мониторинга."""
+    return JsonResponse({'throttling': throttling_metrics()})
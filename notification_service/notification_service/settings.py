@@ -34,6 +34,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'notifications.middleware.RequestLoggingMiddleware',
+    'notifications.middleware.LoadSheddingMiddleware',
 ]
 
 ROOT_URLCONF = 'notification_service.urls'
@@ -58,7 +59,7 @@ WSGI_APPLICATION = 'notification_service.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'notifications.postgresql',
         'NAME': os.environ.get('DB_NAME', 'notifications_db'),
         'USER': os.environ.get('DB_USER', 'postgres'),
         'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
@@ -67,6 +68,12 @@ DATABASES = {
     }
 }
 
+# Не больше DB_MAX_CONNECTIONS соединений с БД на процесс (notifications.dbslots);
+# ожидание свободного, сек. Сумма по процессам всех сервисов должна
+# оставаться ниже max_connections PostgreSQL (по умолчанию 100).
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '10'))
+DB_CONNECTION_WAIT = float(os.environ.get('DB_CONNECTION_WAIT', '10'))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'notifications.authentication.JWTAuthentication',
@@ -90,6 +97,32 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'jwt-secret-key-change-in-production')
 
+# Проверенных JWT-токенов в кэше процесса (notifications.tokencache), 0 — кэш выключен.
+JWT_TOKEN_CACHE_SIZE = int(os.environ.get('JWT_TOKEN_CACHE_SIZE', '10000'))
+
+# Ограничение частоты запросов и сброс нагрузки (notifications.middleware.LoadSheddingMiddleware).
+# Лимиты действуют в пределах одного процесса gunicorn: token bucket на
+# пользователя (JWT user_id, без токена — IP) и на пару пользователь + маршрут
+# ("МЕТОД /путь/{id}/"); RATE_LIMIT_ROUTES переопределяет (скорость в секунду,
+# ёмкость) для отдельных маршрутов.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', '20'))
+RATE_LIMIT_USER_BURST = int(os.environ.get('RATE_LIMIT_USER_BURST', '60'))
+RATE_LIMIT_ROUTE_RATE = float(os.environ.get('RATE_LIMIT_ROUTE_RATE', '10'))
+RATE_LIMIT_ROUTE_BURST = int(os.environ.get('RATE_LIMIT_ROUTE_BURST', '30'))
+RATE_LIMIT_ROUTES = {}
+RATE_LIMIT_EXEMPT_PATHS = (
+    '/api/notifications/metrics/',
+    # Вызывается outbox-процессом task_service, у которого свои повторы.
+    '/api/notifications/create/',
+)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))
+# Сброс нагрузки (503): одновременных запросов в процессе и ожидание в
+# очереди по заголовку X-Request-Start от nginx, сек.
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get('LOAD_SHED_MAX_IN_FLIGHT', '32'))
+LOAD_SHED_MAX_QUEUE_WAIT = float(os.environ.get('LOAD_SHED_MAX_QUEUE_WAIT', '10'))
+LOAD_SHED_RETRY_AFTER = int(os.environ.get('LOAD_SHED_RETRY_AFTER', '5'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
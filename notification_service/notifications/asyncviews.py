@@ -0,0 +1,74 @@
+"""Async-представления на механизме DRF.
+
+DRF 3.15 не поддерживает корутины в обработчиках APIView. AsyncAPIView
+повторяет APIView.dispatch с ожиданием обработчика: разбор запроса,
+аутентификация, права, согласование формата, обработка исключений и
+заголовки ответа — те же, что у синхронных представлений DRF; OPTIONS
+обслуживается метаданными DRF. Аутентификация и права должны обходиться
+без синхронных запросов к БД: их выполняет цикл событий.
+"""
+import asyncio
+
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView с async-обработчиками методов."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # APIView.as_view оборачивает представление в csrf_exempt(), который
+        # в Django 4.2 превращает корутину в синхронную функцию.
+        view = view.__wrapped__
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        # Рендеринг в цикле событий: Django иначе выполнит его в потоке.
+        return self.response.render()
+
+
+def async_api_view(http_method_names, permission_classes=None, authentication_classes=None):
+    """Аналог @api_view для корутин: представление — подкласс AsyncAPIView.
+
+    HEAD разрешён вместе с GET (обрабатывается им же), OPTIONS — всегда.
+    """
+    def decorator(func):
+        async def handler(self, request, *args, **kwargs):
+            return await func(request, *args, **kwargs)
+
+        methods = {method.lower() for method in http_method_names} | {'options'}
+        if 'get' in methods:
+            methods.add('head')
+        attrs = {
+            '__doc__': func.__doc__,
+            '__module__': func.__module__,
+            'http_method_names': sorted(methods),
+            **{method: handler for method in methods - {'options', 'head'}},
+        }
+        if permission_classes is not None:
+            attrs['permission_classes'] = permission_classes
+        if authentication_classes is not None:
+            attrs['authentication_classes'] = authentication_classes
+        return type(func.__name__, (AsyncAPIView,), attrs).as_view()
+    return decorator
@@ -3,15 +3,55 @@ from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
+from .tokencache import token_cache
+
 
 class JWTUser:
-    """Объект пользователя из JWT-токена."""
+    """Объект пользователя из JWT-токена.
+
+    Неизменяемый: один экземпляр из кэша токенов получают все запросы
+    с этим токеном.
+    """
+    __slots__ = ('id', 'username')
+    is_authenticated = True
 
     def __init__(self, payload):
-        self.id = payload['user_id']
-        self.pk = payload['user_id']
-        self.username = payload['username']
-        self.is_authenticated = True
+        object.__setattr__(self, 'id', payload['user_id'])
+        object.__setattr__(self, 'username', payload['username'])
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} нельзя изменить.')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} нельзя изменить.')
+
+    def __repr__(self):
+        return f'<JWTUser {self.id} {self.username}>'
+
+
+def decode_token(token):
+    """Пользователь из токена; AuthenticationFailed, если токен недействителен.
+
+    Подпись проверяется при первом предъявлении токена, дальше до его exp
+    пользователь берётся из кэша.
+    """
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        raise AuthenticationFailed('Токен истёк.')
+    except jwt.InvalidTokenError:
+        raise AuthenticationFailed('Недействительный токен.')
+
+    user = JWTUser(payload)
+    token_cache.put(token, user, payload.get('exp'))
+    return user
 
 
 class JWTAuthentication(BaseAuthentication):
@@ -23,12 +63,4 @@ class JWTAuthentication(BaseAuthentication):
             return None
 
         token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Токен истёк.')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Недействительный токен.')
-
-        user = JWTUser(payload)
-        return (user, token)
+        return (decode_token(token), token)
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('task_created', 'Задача создана'), ('task_status_changed', 'Статус задачи изменён'), ('task_assigned', 'Задача назначена'), ('comment_added', 'Добавлен комментарий'), ('project_created', 'Проект создан')], max_length=50, verbose_name='Тип события')),
+                ('recipient_id', models.IntegerField(verbose_name='ID получателя')),
+                ('sender_id', models.IntegerField(blank=True, null=True, verbose_name='ID отправителя')),
+                ('title', models.CharField(max_length=300, verbose_name='Заголовок')),
+                ('message', models.TextField(verbose_name='Сообщение')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('metadata', models.JSONField(blank=True, default=dict, verbose_name='Метаданные')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Уведомление',
+                'verbose_name_plural': 'Уведомления',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
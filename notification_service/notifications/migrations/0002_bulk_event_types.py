@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='event_type',
+            field=models.CharField(choices=[('task_created', 'Задача создана'), ('task_status_changed', 'Статус задачи изменён'), ('task_assigned', 'Задача назначена'), ('comment_added', 'Добавлен комментарий'), ('project_created', 'Проект создан'), ('tasks_bulk_created', 'Задачи созданы пакетом'), ('tasks_bulk_status_changed', 'Статусы задач изменены пакетом')], max_length=50, verbose_name='Тип события'),
+        ),
+    ]
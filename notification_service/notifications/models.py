@@ -10,6 +10,8 @@ class Notification(models.Model):
         TASK_ASSIGNED = 'task_assigned', 'Задача назначена'
         COMMENT_ADDED = 'comment_added', 'Добавлен комментарий'
         PROJECT_CREATED = 'project_created', 'Проект создан'
+        TASKS_BULK_CREATED = 'tasks_bulk_created', 'Задачи созданы пакетом'
+        TASKS_BULK_STATUS_CHANGED = 'tasks_bulk_status_changed', 'Статусы задач изменены пакетом'
 
     event_type = models.CharField(
         'Тип события', max_length=50,
@@ -0,0 +1,8 @@
+"""PostgreSQL с ограничением соединений процесса (см. notifications.dbslots)."""
+from django.db.backends.postgresql import base
+
+from ..dbslots import ConnectionLimitMixin
+
+
+class DatabaseWrapper(ConnectionLimitMixin, base.DatabaseWrapper):
+    pass
@@ -21,3 +21,6 @@ class CreateNotificationSerializer(serializers.Serializer):
     creator_id = serializers.IntegerField(required=False)
     old_status = serializers.CharField(required=False)
     new_status = serializers.CharField(required=False)
+    task_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    project_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    changes = serializers.ListField(child=serializers.DictField(), required=False)
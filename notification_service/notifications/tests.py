@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from django.conf import settings
 
 from .models import Notification
+from .tokencache import token_cache
 
 
 TEST_DATABASES = {
@@ -95,6 +96,18 @@ class NotificationAPITest(TestCase):
         response = self.client.post('/api/notifications/create/', data, format='json')
         self.assertEqual(response.status_code, 201)
 
+    def test_create_bulk_notification(self):
+        """Пакетное событие создаёт одно сводное уведомление."""
+        data = {
+            'event_type': 'tasks_bulk_created',
+            'task_ids': [1, 2, 3],
+            'project_ids': [1],
+        }
+        response = self.client.post('/api/notifications/create/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(response.data['metadata']['task_ids'], [1, 2, 3])
+
     def test_unread_count(self):
         """Тест подсчёта непрочитанных уведомлений."""
         Notification.objects.create(
@@ -138,3 +151,62 @@ class NotificationAPITest(TestCase):
         client = APIClient()
         response = client.get('/api/notifications/')
         self.assertEqual(response.status_code, 403)
+        client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        response = client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data, {'detail': 'Недействительный токен.'})
+        self.assertEqual(self.client.post('/api/notifications/').status_code, 405)
+
+    async def test_asgi_request(self):
+        """Тест async-представлений через ASGI-обработчик."""
+        await Notification.objects.acreate(
+            event_type='task_created', recipient_id=1, sender_id=2,
+            title='Новая задача', message='Создана задача',
+        )
+        headers = {'Authorization': f'Bearer {make_token()}'}
+        response = await self.async_client.get('/api/notifications/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['title'], 'Новая задача')
+        response = await self.async_client.get('/api/notifications/unread-count/', headers=headers)
+        self.assertEqual(response.json(), {'unread_count': 1})
+
+        response = await self.async_client.head('/api/notifications/unread-count/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        response = await self.async_client.options('/api/notifications/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Allow'], 'GET, HEAD, OPTIONS')
+        response = await self.async_client.delete('/api/notifications/', headers=headers)
+        self.assertEqual(response.status_code, 405)
+
+    @override_settings(RATE_LIMIT_ROUTE_BURST=2)
+    def test_rate_limit(self):
+        """Тест ограничения частоты запросов пользователя по маршруту."""
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/notifications/unread-count/').status_code, 200)
+        response = self.client.get('/api/notifications/unread-count/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.client.get('/api/notifications/').status_code, 200)
+
+        # Вызовы из task_service не ограничиваются.
+        for _ in range(3):
+            response = self.client.post('/api/notifications/create/', {
+                'event_type': 'task_created', 'task_id': 1, 'title': 'Задача',
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+        metrics = self.client.get('/api/notifications/metrics/').data['throttling']
+        self.assertEqual(metrics['throttled'], 1)
+
+    def test_token_cache(self):
+        """Тест повторного использования проверенного токена."""
+        token_cache.clear()
+        before = token_cache.metrics()
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/notifications/').status_code, 200)
+        metrics = token_cache.metrics()
+        self.assertEqual(metrics['size'], 1)
+        # Подпись проверяется только на первом запросе (в middleware).
+        self.assertEqual(metrics['misses'] - before['misses'], 1)
+        self.assertEqual(metrics['hits'] - before['hits'], 5)
+        self.assertIn('token_cache', self.client.get('/api/notifications/metrics/').data)
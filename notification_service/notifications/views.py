@@ -1,18 +1,24 @@
-from rest_framework import status, generics
+from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
+from .asyncviews import async_api_view
+from .dbslots import connection_slots
+from .middleware import throttling_metrics
 from .models import Notification
 from .serializers import NotificationSerializer, CreateNotificationSerializer
+from .tokencache import token_cache
 
 
-class NotificationListView(generics.ListAPIView):
+@async_api_view(['GET'])
+async def notification_list_view(request):
     """Список уведомлений текущего пользователя."""
-    serializer_class = NotificationSerializer
-
-    def get_queryset(self):
-        return Notification.objects.filter(recipient_id=self.request.user.id)
+    notifications = [
+        notification async for notification
+        in Notification.objects.filter(recipient_id=request.user.id)
+    ]
+    return Response(NotificationSerializer(notifications, many=True).data)
 
 
 @api_view(['POST'])
@@ -44,6 +50,26 @@ def create_notification_view(request):
             message=f'Задача "{task_title}": {data.get("old_status")} → {data.get("new_status")}',
             metadata={'task_id': data.get('task_id')},
         )
+    elif event_type == 'tasks_bulk_created':
+        task_ids = data.get('task_ids', [])
+        notification = Notification.objects.create(
+            event_type=event_type,
+            recipient_id=request.user.id,
+            sender_id=request.user.id,
+            title='Задачи созданы',
+            message=f'Создано задач: {len(task_ids)}',
+            metadata={'task_ids': task_ids, 'project_ids': data.get('project_ids', [])},
+        )
+    elif event_type == 'tasks_bulk_status_changed':
+        changes = data.get('changes', [])
+        notification = Notification.objects.create(
+            event_type=event_type,
+            recipient_id=request.user.id,
+            sender_id=request.user.id,
+            title='Статусы задач изменены',
+            message=f'Изменён статус задач: {len(changes)}',
+            metadata={'changes': changes},
+        )
     else:
         notification = Notification.objects.create(
             event_type=event_type,
@@ -84,11 +110,19 @@ def mark_all_read_view(request):
     return Response({'marked_read': count})
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def unread_count_view(request):
+@async_api_view(['GET'])
+async def unread_count_view(request):
     """Количество непрочитанных уведомлений."""
-    count = Notification.objects.filter(
-        recipient_id=request.user.id, is_read=False
-    ).count()
+    count = await Notification.objects.filter(recipient_id=request.user.id, is_read=False).acount()
     return Response({'unread_count': count})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def metrics_view(request):
+    """Метрики сервиса для мониторинга."""
+    return Response({
+        'throttling': throttling_metrics(),
+        'token_cache': token_cache.metrics(),
+        'database': connection_slots.metrics(),
+    })
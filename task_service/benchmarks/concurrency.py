@@ -0,0 +1,151 @@
+"""Пропускная способность и хвостовые задержки под 500 одновременными соединениями.
+
+Запуск внутри контейнера task_service (запросы идут через nginx ко всем
+сервисам):
+
+    docker-compose exec task_service python benchmarks/concurrency.py --label asgi
+
+Сравнение с прежними синхронными воркерами: перезапустить сервисы с
+``APP_SERVER=wsgi`` и повторить замер с ``--label wsgi``. Ограничение
+частоты запросов на время замера выключается (``RATE_LIMIT_ENABLED=False``),
+иначе один пользователь бенчмарка получит в основном 429/503.
+
+Для каждого адреса (список задач, список и счётчик уведомлений, с
+``--session`` — дашборд frontend) открывается ``--connections`` соединений
+keep-alive, каждое последовательно отправляет запросы в течение
+``--seconds``. Печатаются запросы в секунду, перцентили задержки и число
+ответов по статусам; ошибки соединения и таймауты считаются отдельно.
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+import jwt
+
+ENDPOINTS = (
+    '/api/tasks/tasks/',
+    '/api/notifications/',
+    '/api/notifications/unread-count/',
+)
+
+
+def make_token(user_id):
+    now = datetime.now(timezone.utc)
+    return jwt.encode(
+        {'user_id': user_id, 'username': f'bench{user_id}', 'exp': now + timedelta(hours=1), 'iat': now},
+        os.environ['JWT_SECRET'], algorithm='HS256',
+    )
+
+
+async def read_response(reader):
+    """(статус, можно ли продолжать соединение); тело читается и отбрасывается."""
+    version, status = (await reader.readline()).split()[:2]
+    keep_alive = version == b'HTTP/1.1'
+    length, chunked = 0, False
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+        elif name == 'connection':
+            keep_alive = value == 'keep-alive'
+    if not chunked:
+        await reader.readexactly(length)
+        return int(status), keep_alive
+    while size := int((await reader.readline()).split(b';')[0], 16):
+        await reader.readexactly(size + 2)
+    await reader.readline()
+    return int(status), keep_alive
+
+
+async def connection_loop(host, port, request, deadline, timeout, latencies, statuses):
+    """Одно keep-alive соединение: запросы подряд до ``deadline``."""
+    writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            started = time.monotonic()
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            statuses[type(e).__name__] += 1
+            if writer is not None:
+                writer.close()
+                writer = None
+            continue
+        latencies.append(time.monotonic() - started)
+        statuses[status] += 1
+        if not keep_alive:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run(url, path, headers, connections, seconds, timeout):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    latencies, statuses = [], Counter()
+    deadline = time.monotonic() + seconds
+    started = time.monotonic()
+    await asyncio.gather(*(
+        connection_loop(
+            host, port,
+            (
+                f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+                + ''.join(f'{name}: {value}\r\n' for name, value in headers(i).items())
+                + 'Connection: keep-alive\r\n\r\n'
+            ).encode(),
+            deadline, timeout, latencies, statuses,
+        )
+        for i in range(connections)
+    ))
+    return latencies, statuses, time.monotonic() - started
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://nginx', help='адрес nginx')
+    parser.add_argument('--label', default='', help='подпись режима в отчёте (asgi / wsgi)')
+    parser.add_argument('--connections', type=int, default=500, help='одновременных соединений')
+    parser.add_argument('--seconds', type=float, default=30.0, help='длительность замера одного адреса')
+    parser.add_argument('--timeout', type=float, default=30.0, help='таймаут одного запроса, сек.')
+    parser.add_argument('--users', type=int, default=50, help='разных user_id в токенах')
+    parser.add_argument('--session', help='cookie sessionid frontend для замера /dashboard/')
+    args = parser.parse_args()
+
+    tokens = [make_token(user_id) for user_id in range(1, args.users + 1)]
+    targets = [(path, lambda i: {'Authorization': f'Bearer {tokens[i % len(tokens)]}'}) for path in ENDPOINTS]
+    if args.session:
+        targets.append(('/dashboard/', lambda i: {'Cookie': f'sessionid={args.session}'}))
+
+    print(
+        f'{"mode":>6} {"endpoint":<34} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+        f'{"p99 ms":>8} {"max ms":>8}  statuses'
+    )
+    for path, headers in targets:
+        latencies, statuses, elapsed = asyncio.run(
+            run(args.url, path, headers, args.connections, args.seconds, args.timeout),
+        )
+        latencies.sort()
+        ms = [percentile(latencies, q) * 1000 for q in (0.5, 0.95, 0.99, 1.0)]
+        print(
+            f'{args.label:>6} {path:<34} {len(latencies) / elapsed:>8.1f} '
+            + ' '.join(f'{value:>8.0f}' for value in ms)
+            + '  ' + ', '.join(f'{key}: {count}' for key, count in sorted(statuses.items(), key=str))
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Планы запросов TaskViewSet до и после составных/частичных индексов.
+
+Скрипт работает только с PostgreSQL. Запуск внутри контейнера task_service:
+
+    docker-compose exec task_service python benchmarks/explain_task_indexes.py --seed 1000000
+
+С флагом --seed база предварительно наполняется указанным числом задач
+(и комментариями к ним). Для каждого запроса печатается EXPLAIN ANALYZE
+сначала с индексами из Task.Meta/Comment.Meta, затем без них: индексы
+удаляются внутри транзакции, которая после замера откатывается.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_service.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from tasks.models import Comment, Project, Task  # noqa: E402
+from tasks.search import search_tasks  # noqa: E402
+
+BATCH_SIZE = 10000
+PROJECTS = 200
+USERS = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(task_count):
+    """Наполнение базы задачами с реалистичным распределением статусов."""
+    rng = random.Random(42)
+    now = timezone.now()
+    projects = Project.objects.bulk_create(
+        Project(name=f'Bench project {i}', owner_id=rng.randint(1, USERS))
+        for i in range(PROJECTS)
+    )
+    statuses = Task.Status.values
+    weights = [15, 10, 5, 60, 10]
+    created = 0
+    while created < task_count:
+        size = min(BATCH_SIZE, task_count - created)
+        batch = Task.objects.bulk_create(
+            Task(
+                project=rng.choice(projects),
+                title=f'Bench task {created + i}',
+                status=rng.choices(statuses, weights)[0],
+                priority=rng.choice(Task.Priority.values),
+                assignee_id=rng.randint(1, USERS),
+                creator_id=rng.randint(1, USERS),
+            )
+            for i in range(size)
+        )
+        # auto_now_add проставляет одинаковое время всей пачке — разносим
+        # created_at по году, чтобы сортировка была содержательной.
+        for task in batch:
+            task.created_at = now - timedelta(minutes=rng.randint(0, 525600))
+        Task.objects.bulk_update(batch, ['created_at'], batch_size=1000)
+        Comment.objects.bulk_create(
+            Comment(task=task, author_id=task.creator_id, text='Bench comment')
+            for task in batch[::4]
+        )
+        created += size
+        print(f'seeded {created}/{task_count}', file=sys.stderr)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def benchmark_queries():
+    project = Project.objects.order_by('pk').first()
+    task = Task.objects.filter(comments__isnull=False).first()
+    assignee_id = Task.objects.values_list('assignee_id', flat=True).first()
+    return [
+        ('project tasks', Task.objects.filter(project=project)[:50]),
+        ('project tasks by status',
+         Task.objects.filter(project=project, status=Task.Status.IN_PROGRESS)[:50]),
+        ('my tasks by status',
+         Task.objects.filter(assignee_id=assignee_id, status=Task.Status.REVIEW)[:50]),
+        ('my open tasks',
+         Task.objects.filter(
+             assignee_id=assignee_id,
+             status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS, Task.Status.REVIEW],
+         )[:50]),
+        ('task comments', Comment.objects.filter(task=task)[:50]),
+        ('full-text search', search_tasks(Task.objects.all(), 'Bench task 4242')[:50]),
+    ]
+
+
+def explain_all(title):
+    print(f'\n===== {title} =====')
+    for name, queryset in benchmark_queries():
+        print(f'\n--- {name} ---')
+        print(queryset.explain(analyze=True, buffers=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0, help='число задач для наполнения базы')
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit('Бенчмарк рассчитан на PostgreSQL.')
+    if args.seed:
+        seed(args.seed)
+
+    explain_all('с индексами')
+    try:
+        with transaction.atomic():
+            with connection.schema_editor(atomic=False) as editor:
+                for model in (Task, Comment):
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+            explain_all('без индексов')
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
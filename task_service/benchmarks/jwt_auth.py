@@ -0,0 +1,105 @@
+"""Накладные расходы JWT-аутентификации на запрос.
+
+Запуск внутри контейнера task_service:
+
+    docker-compose exec task_service python benchmarks/jwt_auth.py
+
+Печатаются микросекунды на вызов JWTAuthentication.authenticate для
+``--tokens`` разных токенов, предъявляемых по кругу: с выключенным кэшем
+токенов (каждый раз jwt.decode) и с прогретым кэшем, — а также байты на
+экземпляр JWTUser со __slots__ и прежнего JWTUser с __dict__
+(tracemalloc). К базе данных бенчмарк не обращается.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_service.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import jwt  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from tasks.authentication import JWTAuthentication, JWTUser  # noqa: E402
+from tasks.tokencache import token_cache  # noqa: E402
+
+
+class DictJWTUser:
+    """JWTUser до введения __slots__ (для сравнения памяти)."""
+
+    def __init__(self, payload):
+        self.id = payload['user_id']
+        self.pk = payload['user_id']
+        self.username = payload['username']
+        self.is_authenticated = True
+
+
+def make_requests(count):
+    now = timezone.now()
+    factory = RequestFactory()
+    return [
+        factory.get('/api/tasks/tasks/', HTTP_AUTHORIZATION='Bearer ' + jwt.encode(
+            {'user_id': user_id, 'username': f'bench{user_id}', 'exp': now + timedelta(hours=24), 'iat': now},
+            settings.JWT_SECRET, algorithm='HS256',
+        ))
+        for user_id in range(1, count + 1)
+    ]
+
+
+def authenticate_rate(requests, calls):
+    """Микросекунд на вызов authenticate."""
+    authentication = JWTAuthentication()
+    started = time.perf_counter()
+    for i in range(calls):
+        authentication.authenticate(requests[i % len(requests)])
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def bytes_per_user(cls, count):
+    payloads = [{'user_id': i, 'username': f'bench{i}'} for i in range(count)]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    users = [cls(payload) for payload in payloads]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del users
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=1000, help='разных токенов по кругу')
+    parser.add_argument('--calls', type=int, default=200000, help='вызовов authenticate на замер')
+    args = parser.parse_args()
+
+    requests = make_requests(args.tokens)
+    with override_settings(JWT_TOKEN_CACHE_SIZE=0):
+        token_cache.clear()
+        uncached = authenticate_rate(requests, args.calls)
+    with override_settings(JWT_TOKEN_CACHE_SIZE=max(args.tokens, settings.JWT_TOKEN_CACHE_SIZE)):
+        token_cache.clear()
+        authenticate_rate(requests, args.tokens)
+        cached = authenticate_rate(requests, args.calls)
+        token_cache.clear()
+
+    print(f'{"mode":<16} {"us/request":>10}')
+    print(f'{"jwt.decode":<16} {uncached:>10.2f}')
+    print(f'{"token cache":<16} {cached:>10.2f}')
+    print(f'{"speedup":<16} {uncached / cached:>9.1f}x')
+    print()
+    print(f'{"JWTUser":<16} {"bytes":>10}')
+    print(f'{"__dict__":<16} {bytes_per_user(DictJWTUser, 10000):>10.0f}')
+    print(f'{"__slots__":<16} {bytes_per_user(JWTUser, 10000):>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Сравнение GET /api/tasks/tasks/ через TaskSerializer и через быстрый путь.
+
+Запуск внутри контейнера task_service:
+
+    docker-compose exec task_service python benchmarks/list_fast_path.py
+
+Для каждого размера списка (по умолчанию 100, 1000 и 10000 задач) в
+отдельном проекте создаются задачи, после чего список запрашивается через
+тестовый клиент Django в обоих режимах (TASKS_LIST_FAST_PATH выключен и
+включён). Печатаются запросы в секунду, пиковый объём выделенной памяти и
+число выделенных блоков на запрос (tracemalloc). Созданные данные
+удаляются: всё выполняется в транзакции, которая откатывается.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_service.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import jwt  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from tasks.models import Comment, Project, Task  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def make_client():
+    now = timezone.now()
+    token = jwt.encode(
+        {'user_id': 1, 'username': 'bench', 'exp': now + timedelta(hours=1), 'iat': now},
+        settings.JWT_SECRET, algorithm='HS256',
+    )
+    return Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+def seed(size):
+    project = Project.objects.create(name=f'Bench list {size}', owner_id=1)
+    tasks = Task.objects.bulk_create(
+        Task(
+            project=project, title=f'Bench task {i}', description='Описание задачи ' * 10,
+            creator_id=1, assignee_id=i % 50 or None,
+        )
+        for i in range(size)
+    )
+    Comment.objects.bulk_create(
+        Comment(task=task, author_id=1, text='Bench comment') for task in tasks[::3]
+    )
+    return project
+
+
+def measure(client, url, seconds):
+    """Запросов в секунду и память одного запроса (пик в КиБ, блоков)."""
+    client.get(url)  # прогрев
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    client.get(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    blocks = sum(
+        stat.count_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename')
+        if stat.count_diff > 0
+    )
+    tracemalloc.stop()
+
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+        count += 1
+    return count / (time.perf_counter() - started), peak / 1024, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000', help='размеры списков через запятую')
+    parser.add_argument('--seconds', type=float, default=5.0, help='длительность замера одного режима')
+    args = parser.parse_args()
+    logging.getLogger('http').setLevel(logging.WARNING)
+
+    client = make_client()
+    print(f'{"rows":>6} {"path":>10} {"req/s":>9} {"peak KiB":>10} {"blocks":>9}')
+    try:
+        with transaction.atomic():
+            for size in (int(value) for value in args.sizes.split(',')):
+                project = seed(size)
+                url = f'/api/tasks/tasks/?project={project.id}'
+                for label, enabled in (('serializer', False), ('fast', True)):
+                    with override_settings(TASKS_LIST_FAST_PATH=enabled):
+                        rps, peak, blocks = measure(client, url, args.seconds)
+                    print(f'{size:>6} {label:>10} {rps:>9.1f} {peak:>10.0f} {blocks:>9}')
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -34,6 +34,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'tasks.middleware.RequestLoggingMiddleware',
+    'tasks.middleware.LoadSheddingMiddleware',
 ]
 
 ROOT_URLCONF = 'task_service.urls'
@@ -58,7 +59,7 @@ WSGI_APPLICATION = 'task_service.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'tasks.postgresql',
         'NAME': os.environ.get('DB_NAME', 'tasks_db'),
         'USER': os.environ.get('DB_USER', 'postgres'),
         'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
@@ -67,6 +68,74 @@ DATABASES = {
     }
 }
 
+# Не больше DB_MAX_CONNECTIONS соединений с БД на процесс (tasks.dbslots);
+# ожидание свободного, сек. Сумма по процессам всех сервисов должна
+# оставаться ниже max_connections PostgreSQL (по умолчанию 100).
+DB_MAX_CONNECTIONS = int(os.environ.get('DB_MAX_CONNECTIONS', '10'))
+DB_CONNECTION_WAIT = float(os.environ.get('DB_CONNECTION_WAIT', '10'))
+
+# Курсорная пагинация списков: размер страницы по умолчанию и максимальный
+# размер, который клиент может запросить через ?page_size=.
+PAGINATION_PAGE_SIZE = int(os.environ.get('PAGINATION_PAGE_SIZE', '50'))
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', '500'))
+
+# Максимальное число задач в одном запросе к /api/tasks/tasks/bulk/.
+TASKS_BULK_MAX_ITEMS = int(os.environ.get('TASKS_BULK_MAX_ITEMS', '1000'))
+
+# Быстрый путь GET /api/tasks/tasks/: строки из values_list() без TaskSerializer.
+TASKS_LIST_FAST_PATH = os.environ.get('TASKS_LIST_FAST_PATH', 'True').lower() == 'true'
+
+# Число задач в колонке канбан-доски по умолчанию (?limit=).
+TASKS_BOARD_COLUMN_LIMIT = int(os.environ.get('TASKS_BOARD_COLUMN_LIMIT', '20'))
+
+# Ручной порядок задач на доске: длина ключа, после которой колонка
+# перебалансируется, и пауза между проходами manage.py rebalance_ranks.
+TASKS_RANK_MAX_LENGTH = int(os.environ.get('TASKS_RANK_MAX_LENGTH', '24'))
+TASKS_RANK_REBALANCE_INTERVAL = float(os.environ.get('TASKS_RANK_REBALANCE_INTERVAL', '5'))
+
+# Число строк, забираемых из серверного курсора за раз при выгрузке
+# /api/tasks/tasks/export/.
+TASKS_EXPORT_CHUNK_SIZE = int(os.environ.get('TASKS_EXPORT_CHUNK_SIZE', '2000'))
+
+# Дельта-синхронизация /api/tasks/sync/: максимум строк каждой сущности за
+# запрос, окно (в секундах) для незафиксированных транзакций и срок
+# хранения отметок удаления.
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', '1000'))
+SYNC_SAFETY_WINDOW = float(os.environ.get('SYNC_SAFETY_WINDOW', '2'))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', '30'))
+
+# Конфигурация полнотекстового поиска PostgreSQL (?q=).
+TASKS_SEARCH_CONFIG = os.environ.get('TASKS_SEARCH_CONFIG', 'russian')
+
+# Ограничение частоты запросов и сброс нагрузки (tasks.middleware.LoadSheddingMiddleware).
+# Лимиты действуют в пределах одного процесса gunicorn: token bucket на
+# пользователя (JWT user_id, без токена — IP) и на пару пользователь + маршрут
+# ("МЕТОД /путь/{id}/"); RATE_LIMIT_ROUTES переопределяет (скорость в секунду,
+# ёмкость) для отдельных маршрутов.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', '20'))
+RATE_LIMIT_USER_BURST = int(os.environ.get('RATE_LIMIT_USER_BURST', '60'))
+RATE_LIMIT_ROUTE_RATE = float(os.environ.get('RATE_LIMIT_ROUTE_RATE', '10'))
+RATE_LIMIT_ROUTE_BURST = int(os.environ.get('RATE_LIMIT_ROUTE_BURST', '30'))
+RATE_LIMIT_ROUTES = {
+    'POST /api/tasks/tasks/bulk/': (1, 5),
+    'PATCH /api/tasks/tasks/bulk/': (1, 5),
+    'DELETE /api/tasks/tasks/bulk/': (1, 5),
+    'GET /api/tasks/tasks/export/': (0.2, 3),
+}
+RATE_LIMIT_EXEMPT_PATHS = ('/api/tasks/metrics/',)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))
+# Сброс нагрузки (503): одновременных запросов в процессе и ожидание в
+# очереди по заголовку X-Request-Start от nginx, сек.
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get('LOAD_SHED_MAX_IN_FLIGHT', '32'))
+LOAD_SHED_MAX_QUEUE_WAIT = float(os.environ.get('LOAD_SHED_MAX_QUEUE_WAIT', '10'))
+LOAD_SHED_RETRY_AFTER = int(os.environ.get('LOAD_SHED_RETRY_AFTER', '5'))
+
+# Фоновая очистка удалённых проектов (manage.py purge_projects): строк за
+# одну транзакцию и пауза при пустой очереди.
+TASKS_PURGE_BATCH_SIZE = int(os.environ.get('TASKS_PURGE_BATCH_SIZE', '1000'))
+TASKS_PURGE_INTERVAL = float(os.environ.get('TASKS_PURGE_INTERVAL', '5'))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'tasks.authentication.JWTAuthentication',
@@ -74,6 +143,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'tasks.pagination.OptInCursorPagination',
+    'PAGE_SIZE': PAGINATION_PAGE_SIZE,
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -90,9 +161,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'jwt-secret-key-change-in-production')
 
+# Проверенных JWT-токенов в кэше процесса (tasks.tokencache), 0 — кэш выключен.
+JWT_TOKEN_CACHE_SIZE = int(os.environ.get('JWT_TOKEN_CACHE_SIZE', '10000'))
+
 AUTH_SERVICE_URL = os.environ.get('AUTH_SERVICE_URL', 'http://auth-service:8000')
 NOTIFICATION_SERVICE_URL = os.environ.get('NOTIFICATION_SERVICE_URL', 'http://notification-service:8000')
 
+# Доставка событий outbox (manage.py dispatch_outbox).
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '1.0'))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '10'))
+OUTBOX_BACKOFF_BASE = float(os.environ.get('OUTBOX_BACKOFF_BASE', '2'))
+OUTBOX_BACKOFF_MAX = float(os.environ.get('OUTBOX_BACKOFF_MAX', '300'))
+OUTBOX_HTTP_TIMEOUT = float(os.environ.get('OUTBOX_HTTP_TIMEOUT', '5'))
+# Аренда захваченной пачки: должна перекрывать доставку всей пачки
+# (до OUTBOX_BATCH_SIZE запросов с таймаутом на соединение и на ответ).
+OUTBOX_LEASE_SECONDS = float(os.environ.get('OUTBOX_LEASE_SECONDS', '1200'))
+OUTBOX_HTTP_POOL_SIZE = int(os.environ.get('OUTBOX_HTTP_POOL_SIZE', '10'))
+OUTBOX_RETENTION_HOURS = int(os.environ.get('OUTBOX_RETENTION_HOURS', '72'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
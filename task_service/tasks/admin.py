@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, Task, Comment
+from .models import Project, Task, Comment, OutboxEvent
 
 
 @admin.register(Project)
@@ -19,3 +19,9 @@ class TaskAdmin(admin.ModelAdmin):
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('task', 'author_id', 'created_at')
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('event_type', 'actor_id', 'attempts', 'created_at', 'dispatched_at')
+    list_filter = ('event_type',)
@@ -1,7 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
     verbose_name = 'Управление задачами'
+
+    def ready(self):
+        from .counters import install_sqlite_triggers
+        post_migrate.connect(install_sqlite_triggers, sender=self)
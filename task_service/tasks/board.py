@@ -0,0 +1,93 @@
+"""Канбан-доска проекта: задачи по колонкам статусов одним запросом.
+
+Задачи нумеруются оконной функцией ROW_NUMBER() в пределах статуса в
+ручном порядке (см. tasks.ranking), а размер колонки считается
+COUNT(*) OVER (PARTITION BY status); в ответ попадают первые ``limit``
+задач каждой колонки. Догрузка колонки —
+тот же запрос с ``?status=`` и курсором последней показанной задачи.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .fastpath import task_row_encoder
+from .models import Task
+from .ranking import COLUMN_ORDERING
+
+
+class InvalidCursor(ValueError):
+    """Курсор колонки повреждён."""
+
+
+def encode_cursor(row):
+    raw = json.dumps([row.rank, row.created_at.isoformat(), row.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        rank, created_at, pk = json.loads(raw)
+        if not isinstance(rank, str):
+            raise TypeError(rank)
+        return rank, datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError,
+            TypeError, ValueError, AttributeError):
+        raise InvalidCursor(cursor)
+
+
+def build_board(project, names, limit, status=None, cursor=None, subtree=None):
+    """Колонки доски проекта.
+
+    ``names`` — поля карточек (как в TaskSerializer), ``status`` и
+    ``cursor`` — догрузка одной колонки после последней показанной задачи,
+    ``subtree`` — условие поддерева (см. tasks.hierarchy).
+    """
+    queryset = Task.objects.filter(project=project)
+    if subtree is not None:
+        queryset = queryset.filter(subtree)
+    if status is not None:
+        queryset = queryset.filter(status=status)
+    if cursor is not None:
+        rank, created_at, pk = decode_cursor(cursor)
+        # Позиция после курсора в порядке (rank, -created_at, -id).
+        queryset = queryset.filter(
+            Q(rank__gt=rank)
+            | Q(rank=rank, created_at__lt=created_at)
+            | Q(rank=rank, created_at=created_at, id__lt=pk),
+        )
+
+    ordering = [
+        F(name[1:]).desc() if name.startswith('-') else F(name).asc()
+        for name in COLUMN_ORDERING
+    ]
+    queryset = queryset.annotate(
+        board_position=Window(RowNumber(), partition_by=[F('status')], order_by=ordering),
+        board_remaining=Window(Count('id'), partition_by=[F('status')]),
+    ).filter(board_position__lte=limit).order_by('status', 'board_position')
+
+    encoder = task_row_encoder(names)
+    rows = queryset.values_list(
+        *encoder.query_columns(('status', 'rank', 'created_at', 'id', 'board_remaining')),
+        named=True,
+    )
+    columns = {
+        value: {'status': value, 'title': label, 'count': 0, 'tasks': [], 'next_cursor': None}
+        for value, label in Task.Status.choices
+        if status is None or value == status
+    }
+    last_rows = {}
+    for row in rows:
+        column = columns[row.status]
+        column['count'] = row.board_remaining
+        column['tasks'].append(encoder.encode(row))
+        last_rows[row.status] = row
+    for value, row in last_rows.items():
+        column = columns[value]
+        if column['count'] > len(column['tasks']):
+            column['next_cursor'] = encode_cursor(row)
+    return list(columns.values())
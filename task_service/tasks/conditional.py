@@ -0,0 +1,74 @@
+"""Условные HTTP-запросы (ETag / Last-Modified) для ресурсов сервиса задач."""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = 412
+    default_detail = 'Ресурс был изменён другим запросом.'
+    default_code = 'precondition_failed'
+
+
+def make_etag(*parts):
+    """Сильный ETag, вычисленный из составляющих представления ресурса."""
+    raw = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def _isoformat(value):
+    return value.isoformat() if value else ''
+
+
+def task_etag(task):
+    """ETag задачи: updated_at и агрегаты по комментариям.
+
+    Счётчик ``comments_count`` хранится в строке задачи, а
+    ``comments_last_at`` аннотируется в queryset детального представления,
+    поэтому ETag вычисляется из уже загруженной строки без дополнительных
+    запросов.
+    """
+    return make_etag(
+        'task', task.pk, _isoformat(task.updated_at),
+        getattr(task, 'comments_count', ''),
+        _isoformat(getattr(task, 'comments_last_at', None)),
+    )
+
+
+def project_etag(project):
+    """ETag детального представления проекта (проект, задачи и комментарии)."""
+    return make_etag(
+        'project', project.pk, _isoformat(project.updated_at),
+        project.tasks_count, _isoformat(project.tasks_last_at),
+        project.comments_total, _isoformat(project.comments_last_at),
+    )
+
+
+def if_match_passes(request, etag):
+    """Проверка заголовка If-Match (отсутствующий заголовок — проверка пройдена)."""
+    etags = parse_etags(request.headers.get('If-Match', ''))
+    return not etags or '*' in etags or etag in etags
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """Проставление заголовков ETag и Last-Modified в ответ."""
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """Ответ 304/412 по условным заголовкам запроса либо None.
+
+    Проверка выполняется до сериализации, поэтому при совпадении
+    валидаторов тело ответа не строится вовсе.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
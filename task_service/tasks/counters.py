@@ -0,0 +1,209 @@
+"""Денормализованные счётчики: комментарии задачи и задачи проекта по статусам.
+
+``Task.comments_count`` и ``Project.tasks_<status>_count`` изменяются
+триггерами БД в той же транзакции, что и вставка, изменение или удаление
+комментария/задачи, поэтому чтение счётчиков не требует агрегатов.
+В PostgreSQL триггеры уровня оператора с переходными таблицами (массовые
+операции обновляют каждую родительскую строку один раз) создаёт миграция
+``0008_counters``. В SQLite (тесты) триггеры построчные и создаются после
+всех миграций обработчиком post_migrate: миграции SQLite пересоздают
+таблицы при ALTER TABLE, а триггеры, ссылающиеся на них, этому мешают.
+
+Расхождения (например, после ручных правок в БД) находит и исправляет
+команда ``manage.py verify_counters``.
+"""
+import logging
+
+from django.db import connections
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Project, Task
+
+logger = logging.getLogger(__name__)
+
+
+def _status_columns():
+    return [(status, Project.task_count_field(status)) for status in Task.Status.values]
+
+
+def _postgresql_statements():
+    columns = _status_columns()
+    set_clause = ', '.join(f'{column} = p.{column} + d.{status}' for status, column in columns)
+    sums = ', '.join(
+        f"sum(CASE WHEN status = '{status}' THEN delta ELSE 0 END) AS {status}"
+        for status, _ in columns
+    )
+    changed = ' OR '.join(f'd.{status} <> 0' for status, _ in columns)
+
+    def update_projects(rows):
+        return (
+            f'UPDATE tasks_project p SET {set_clause} '
+            f'FROM (SELECT project_id, {sums} FROM ({rows}) r GROUP BY project_id) d '
+            f'WHERE p.id = d.project_id AND ({changed});'
+        )
+
+    def update_tasks(rows):
+        return (
+            'UPDATE tasks_task t SET comments_count = t.comments_count + d.delta '
+            f'FROM (SELECT task_id, sum(delta) AS delta FROM ({rows}) r '
+            'GROUP BY task_id HAVING sum(delta) <> 0) d '
+            'WHERE t.id = d.task_id;'
+        )
+
+    new_tasks = 'SELECT project_id, status, 1 AS delta FROM new_tasks'
+    old_tasks = 'SELECT project_id, status, -1 AS delta FROM old_tasks'
+    new_comments = 'SELECT task_id, 1 AS delta FROM new_comments'
+    old_comments = 'SELECT task_id, -1 AS delta FROM old_comments'
+    statements = [
+        f"""
+        CREATE OR REPLACE FUNCTION tasks_task_counter_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {update_projects(new_tasks)}
+            ELSIF TG_OP = 'DELETE' THEN
+                {update_projects(old_tasks)}
+            ELSE
+                {update_projects(f'{new_tasks} UNION ALL {old_tasks}')}
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        f"""
+        CREATE OR REPLACE FUNCTION tasks_comment_counter_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {update_tasks(new_comments)}
+            ELSIF TG_OP = 'DELETE' THEN
+                {update_tasks(old_comments)}
+            ELSE
+                {update_tasks(f'{new_comments} UNION ALL {old_comments}')}
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+    ]
+    for table, function, alias in (
+        ('tasks_task', 'tasks_task_counter_trigger', 'tasks'),
+        ('tasks_comment', 'tasks_comment_counter_trigger', 'comments'),
+    ):
+        for event, referencing in (
+            ('INSERT', f'NEW TABLE AS new_{alias}'),
+            ('DELETE', f'OLD TABLE AS old_{alias}'),
+            ('UPDATE', f'OLD TABLE AS old_{alias} NEW TABLE AS new_{alias}'),
+        ):
+            name = f'{table}_counter_{event.lower()}'
+            statements += [
+                f'DROP TRIGGER IF EXISTS {name} ON {table}',
+                f'CREATE TRIGGER {name} AFTER {event} ON {table} REFERENCING {referencing} '
+                f'FOR EACH STATEMENT EXECUTE FUNCTION {function}()',
+            ]
+    return statements
+
+
+def _sqlite_statements():
+    def project_delta(row, sign):
+        return ', '.join(
+            f"{column} = {column} {sign} (CASE WHEN {row}.status = '{status}' THEN 1 ELSE 0 END)"
+            for status, column in _status_columns()
+        )
+
+    triggers = {
+        'tasks_task_counter_insert': (
+            'AFTER INSERT ON tasks_task',
+            f'UPDATE tasks_project SET {project_delta("NEW", "+")} WHERE id = NEW.project_id;',
+        ),
+        'tasks_task_counter_delete': (
+            'AFTER DELETE ON tasks_task',
+            f'UPDATE tasks_project SET {project_delta("OLD", "-")} WHERE id = OLD.project_id;',
+        ),
+        'tasks_task_counter_update': (
+            'AFTER UPDATE OF status, project_id ON tasks_task '
+            'WHEN OLD.status <> NEW.status OR OLD.project_id <> NEW.project_id',
+            f'UPDATE tasks_project SET {project_delta("OLD", "-")} WHERE id = OLD.project_id; '
+            f'UPDATE tasks_project SET {project_delta("NEW", "+")} WHERE id = NEW.project_id;',
+        ),
+        'tasks_comment_counter_insert': (
+            'AFTER INSERT ON tasks_comment',
+            'UPDATE tasks_task SET comments_count = comments_count + 1 WHERE id = NEW.task_id;',
+        ),
+        'tasks_comment_counter_delete': (
+            'AFTER DELETE ON tasks_comment',
+            'UPDATE tasks_task SET comments_count = comments_count - 1 WHERE id = OLD.task_id;',
+        ),
+        'tasks_comment_counter_update': (
+            'AFTER UPDATE OF task_id ON tasks_comment WHEN OLD.task_id <> NEW.task_id',
+            'UPDATE tasks_task SET comments_count = comments_count - 1 WHERE id = OLD.task_id; '
+            'UPDATE tasks_task SET comments_count = comments_count + 1 WHERE id = NEW.task_id;',
+        ),
+    }
+    statements = []
+    for name, (when, body) in triggers.items():
+        statements += [
+            f'DROP TRIGGER IF EXISTS {name}',
+            f'CREATE TRIGGER {name} {when} BEGIN {body} END',
+        ]
+    return statements
+
+
+TRIGGER_STATEMENTS = {
+    'postgresql': _postgresql_statements,
+    'sqlite': _sqlite_statements,
+}
+
+
+def install_counter_triggers(db):
+    """Создание (пересоздание) триггеров счётчиков на соединении ``db``."""
+    build = TRIGGER_STATEMENTS.get(db.vendor)
+    if build is None:
+        logger.warning('Триггеры счётчиков для СУБД %s не поддерживаются', db.vendor)
+        return
+    with db.cursor() as cursor:
+        for statement in build():
+            cursor.execute(statement)
+
+
+def install_sqlite_triggers(sender, using='default', **kwargs):
+    """Обработчик post_migrate: триггеры счётчиков в SQLite."""
+    db = connections[using]
+    if db.vendor == 'sqlite':
+        install_counter_triggers(db)
+
+
+def _count_subquery(queryset, outer_field):
+    return Coalesce(Subquery(
+        queryset.filter(**{outer_field: OuterRef('pk')})
+        .order_by().values(outer_field).annotate(count=Count('id')).values('count'),
+    ), 0)
+
+
+def expected_counters(model):
+    """Фактические значения счётчиков модели в виде выражений для annotate/update."""
+    if model is Task:
+        return {'comments_count': _count_subquery(Comment.objects.all(), 'task')}
+    return {
+        column: _count_subquery(Task.objects.filter(status=status), 'project')
+        for status, column in _status_columns()
+    }
+
+
+def find_drift(model, batch_size=10000):
+    """Строки с неверными счётчиками: итератор списков id по диапазонам ключей."""
+    expected = expected_counters(model)
+    annotations = {f'expected_{name}': value for name, value in expected.items()}
+    mismatch = Q()
+    for name in expected:
+        mismatch |= ~Q(**{name: F(f'expected_{name}')})
+    max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    for start in range(0, max_id, batch_size):
+        ids = list(
+            model.objects.filter(id__gt=start, id__lte=start + batch_size)
+            .annotate(**annotations).filter(mismatch).values_list('id', flat=True)
+        )
+        if ids:
+            yield ids
+
+
+def repair(model, ids):
+    """Пересчёт счётчиков указанных строк одним UPDATE."""
+    return model.objects.filter(id__in=ids).update(**expected_counters(model))
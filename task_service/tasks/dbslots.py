@@ -0,0 +1,80 @@
+"""Ограничение числа соединений процесса с PostgreSQL.
+
+Под uvicorn каждый одновременный синхронный запрос выполняется в своём
+потоке со своим соединением с БД. Лимит LOAD_SHED_MAX_IN_FLIGHT
+выключается вместе с RATE_LIMIT_ENABLED, поэтому число соединений
+ограничивается отдельно, на уровне бэкенда БД (``tasks.postgresql``): не
+больше ``DB_MAX_CONNECTIONS`` открытых соединений в процессе (0 — без
+ограничения). Поток, которому не хватило соединения, ждёт до
+``DB_CONNECTION_WAIT`` секунд, пока другой запрос закроет своё (Django
+закрывает соединение в конце запроса), и затем получает OperationalError.
+"""
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import OperationalError
+
+
+class ConnectionSlots:
+    """Счётчик открытых соединений с ожиданием свободного места."""
+
+    def __init__(self):
+        self.in_use = 0
+        self.counters = Counter()
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        limit = settings.DB_MAX_CONNECTIONS
+        with self.condition:
+            if limit > 0 and self.in_use >= limit:
+                self.counters['waited'] += 1
+                if not self.condition.wait_for(
+                    lambda: self.in_use < settings.DB_MAX_CONNECTIONS,
+                    settings.DB_CONNECTION_WAIT,
+                ):
+                    self.counters['timeouts'] += 1
+                    raise OperationalError(
+                        f'Нет свободного соединения с БД (DB_MAX_CONNECTIONS={limit}).'
+                    )
+            self.in_use += 1
+
+    def release(self):
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify()
+
+    def metrics(self):
+        with self.condition:
+            return {
+                **dict.fromkeys(('waited', 'timeouts'), 0),
+                **self.counters,
+                'in_use': self.in_use,
+                'limit': settings.DB_MAX_CONNECTIONS,
+            }
+
+
+connection_slots = ConnectionSlots()
+
+
+class ConnectionLimitMixin:
+    """Примесь к DatabaseWrapper: соединение открывается только при свободном месте."""
+    slots = connection_slots
+
+    def get_new_connection(self, conn_params):
+        self.slots.acquire()
+        try:
+            connection = super().get_new_connection(conn_params)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.holds_slot = True
+        return connection
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            if getattr(self, 'holds_slot', False):
+                self.holds_slot = False
+                self.slots.release()
@@ -0,0 +1,57 @@
+"""Быстрый путь чтения списка задач без сериализаторов DRF.
+
+Строки читаются через ``values_list()`` кортежами и превращаются в
+словари ответа заранее скомпилированным кодировщиком ``RowEncoder``: для
+набора полей один раз вычисляются имена, столбцы и преобразователи, а на
+строку остаются только zip и форматирование дат. Результат рендерится тем
+же JSONRenderer, что и обычный ответ, и побайтно совпадает с выводом
+``TaskSerializer``.
+"""
+from functools import lru_cache
+
+from .export import format_datetime
+
+# Поля TaskSerializer, которые читаются не из одноимённого столбца.
+TASK_FIELD_COLUMNS = {
+    'project': 'project_id',
+    'parent': 'parent_id',
+}
+DATETIME_FIELDS = frozenset({'created_at', 'updated_at', 'deadline'})
+
+# Столбцы, по которым курсорная пагинация вычисляет позицию.
+CURSOR_COLUMNS = ('created_at', 'id')
+
+
+class RowEncoder:
+    """Кодировщик кортежей ``values_list(*columns)`` в словари ответа."""
+    __slots__ = ('names', 'columns', 'converters')
+
+    def __init__(self, names, columns, converters):
+        self.names = names
+        self.columns = columns
+        self.converters = converters
+
+    def encode(self, row):
+        values = list(row[:len(self.names)])
+        for position, convert in self.converters:
+            values[position] = convert(values[position])
+        return dict(zip(self.names, values))
+
+    def encode_all(self, rows):
+        encode = self.encode
+        return [encode(row) for row in rows]
+
+    def query_columns(self, extra=()):
+        """Столбцы для values_list: поля ответа, затем недостающие служебные."""
+        return self.columns + tuple(column for column in extra if column not in self.columns)
+
+
+@lru_cache(maxsize=64)
+def task_row_encoder(names):
+    """Кодировщик для кортежа имён полей TaskSerializer (кэшируется)."""
+    columns = tuple(TASK_FIELD_COLUMNS.get(name, name) for name in names)
+    converters = tuple(
+        (position, format_datetime)
+        for position, name in enumerate(names) if name in DATETIME_FIELDS
+    )
+    return RowEncoder(names, columns, converters)
@@ -0,0 +1,139 @@
+"""Иерархия задач (эпик → история → подзадача) на материализованном пути.
+
+В ``Task.path`` хранятся id предков от корня, каждый с завершающим ``/``
+(у задачи верхнего уровня путь пустой). Поддерево задачи ``T`` — сама
+``T`` и задачи, путь которых начинается с ``T.path + 'T.id/'``, поэтому
+выборка поддерева, сводка прогресса и перенос ветки выполняются
+фиксированным числом запросов независимо от глубины и размера ветки.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+
+from .models import Task
+
+PATH_MAX_LENGTH = Task._meta.get_field('path').max_length
+
+
+class HierarchyError(ValueError):
+    """Недопустимое положение задачи в иерархии."""
+
+
+def child_path(parent):
+    """Путь дочерних задач ``parent`` (None — верхний уровень)."""
+    return f'{parent.path}{parent.pk}/' if parent is not None else ''
+
+
+def subtree_q(root_id, path, prefix=''):
+    """Условие «задача в поддереве root_id»; ``prefix`` — путь к задаче (``tasks__``)."""
+    return Q(**{f'{prefix}pk': root_id}) | Q(**{f'{prefix}path__startswith': f'{path}{root_id}/'})
+
+
+def subtree_condition(root_id, prefix=''):
+    """Условие поддерева по id корня (один запрос за путём корня).
+
+    Для несуществующей задачи условие не выполняется ни для одной строки.
+    """
+    path = Task.objects.filter(pk=root_id).values_list('path', flat=True).first()
+    if path is None:
+        return Q(**{f'{prefix}pk__in': []})
+    return subtree_q(root_id, path, prefix)
+
+
+def validate_parent(parent, project):
+    if parent is None:
+        return
+    if parent.project_id != project.pk:
+        raise HierarchyError('Родительская задача должна быть в том же проекте.')
+    if len(child_path(parent)) > PATH_MAX_LENGTH:
+        raise HierarchyError('Превышена глубина вложенности задач.')
+
+
+def assign_paths(tasks):
+    """Пути новых задач по их родителям, прочитанным под блокировкой.
+
+    Вызывается в транзакции вставки. Родители блокируются (SELECT ... FOR
+    UPDATE), поэтому параллельный reparent ветки либо дождётся вставки и
+    перепишет пути вместе с новыми задачами, либо завершится раньше, и
+    путь будет вычислен уже от нового пути родителя.
+    """
+    parent_ids = {task.parent_id for task in tasks if task.parent_id is not None}
+    parents = {}
+    if parent_ids:
+        parents = Task.objects.select_for_update().filter(pk__in=parent_ids).order_by('pk').only(
+            'id', 'project', 'path',
+        ).in_bulk()
+    for task in tasks:
+        if task.parent_id is None:
+            task.path = ''
+            continue
+        parent = parents.get(task.parent_id)
+        if parent is None:
+            raise HierarchyError('Родительская задача не найдена.')
+        validate_parent(parent, task.project)
+        task.path = child_path(parent)
+    return tasks
+
+
+def rollup(root):
+    """Прогресс поддерева ``root``: число задач по статусам одним запросом."""
+    rows = (
+        Task.objects.filter(subtree_q(root.pk, root.path))
+        .order_by().values_list('status').annotate(count=Count('id'))
+    )
+    by_status = dict.fromkeys(Task.Status.values, 0)
+    by_status.update(rows)
+    total = sum(by_status.values())
+    # Отменённые задачи не учитываются в прогрессе.
+    planned = total - by_status[Task.Status.CANCELLED]
+    return {
+        'total': total,
+        'by_status': by_status,
+        'progress': round(by_status[Task.Status.DONE] / planned, 4) if planned else None,
+    }
+
+
+def reparent(task_id, parent_id):
+    """Перенос задачи со всем поддеревом под ``parent_id`` (None — на верхний уровень).
+
+    Четыре запроса: блокировка обеих строк, блокировка потомков (с
+    проверкой длины их путей), UPDATE задачи и один UPDATE путей всех
+    потомков. Потомки блокируются до перезаписи путей: подзадача,
+    создаваемая под одним из них, ждёт переноса (см. assign_paths).
+    """
+    with transaction.atomic():
+        locked = Task.objects.select_for_update().filter(
+            pk__in=[pk for pk in (task_id, parent_id) if pk is not None],
+        ).order_by('pk').only('id', 'project', 'parent', 'path')
+        rows = {row.pk: row for row in locked}
+        task = rows.get(task_id)
+        if task is None:
+            raise Task.DoesNotExist()
+        parent = rows.get(parent_id) if parent_id is not None else None
+        if parent_id is not None and parent is None:
+            raise HierarchyError('Родительская задача не найдена.')
+        if parent is not None:
+            if parent.project_id != task.project_id:
+                raise HierarchyError('Родительская задача должна быть в том же проекте.')
+            if parent.pk == task.pk or parent.path.startswith(child_path(task)):
+                raise HierarchyError('Задачу нельзя перенести в её собственное поддерево.')
+        if parent_id == task.parent_id:
+            return task
+
+        old_prefix = child_path(task)
+        new_path = child_path(parent)
+        new_prefix = f'{new_path}{task.pk}/'
+        descendants = Task.objects.filter(path__startswith=old_prefix)
+        paths = descendants.select_for_update().order_by('pk').values_list('path', flat=True)
+        longest = max(map(len, paths), default=0)
+        if len(new_path) > PATH_MAX_LENGTH or (
+            longest and longest - len(old_prefix) + len(new_prefix) > PATH_MAX_LENGTH
+        ):
+            raise HierarchyError('Превышена глубина вложенности задач.')
+
+        now = timezone.now()
+        Task.objects.filter(pk=task.pk).update(parent=parent, path=new_path, updated_at=now)
+        descendants.update(path=Concat(Value(new_prefix), Substr('path', len(old_prefix) + 1)))
+        task.parent, task.path, task.updated_at = parent, new_path, now
+    return task
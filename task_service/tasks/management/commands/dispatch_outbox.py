@@ -0,0 +1,44 @@
+import logging
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from tasks.outbox import OutboxDispatcher
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Доставка событий outbox в notification_service.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='размер пачки событий')
+        parser.add_argument('--interval', type=float, help='пауза при пустой очереди, сек.')
+        parser.add_argument('--once', action='store_true', help='обработать одну пачку и выйти')
+
+    def handle(self, *args, **options):
+        dispatcher = OutboxDispatcher(batch_size=options['batch_size'])
+        if options['once']:
+            processed = dispatcher.dispatch_batch()
+            self.stdout.write(f'Обработано событий: {processed}')
+            return
+
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+        self.stdout.write('Запуск доставки событий outbox...')
+        while not stopping:
+            try:
+                dispatcher.run(
+                    poll_interval=options['interval'],
+                    should_stop=lambda: bool(stopping),
+                )
+            except DatabaseError as e:
+                # База ещё не готова (миграции не применены) или соединение
+                # оборвалось — переподключаемся и пробуем снова.
+                logger.warning('Ошибка базы данных в dispatch_outbox: %s', e)
+                close_old_connections()
+                time.sleep(5)
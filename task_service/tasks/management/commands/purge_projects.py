@@ -0,0 +1,48 @@
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from tasks.purge import pending_projects, purge_project
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Фоновая очистка проектов, помеченных на удаление.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='строк за одну транзакцию')
+        parser.add_argument('--interval', type=float, help='пауза при пустой очереди, сек.')
+        parser.add_argument('--once', action='store_true', help='удалить все помеченные проекты и выйти')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or settings.TASKS_PURGE_BATCH_SIZE
+        if options['once']:
+            total = 0
+            while project_ids := pending_projects(1):
+                purge_project(project_ids[0], batch_size)
+                total += 1
+            self.stdout.write(f'Удалено проектов: {total}')
+            return
+
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+        interval = options['interval'] or settings.TASKS_PURGE_INTERVAL
+
+        self.stdout.write('Запуск очистки удалённых проектов...')
+        while not stopping:
+            try:
+                project_ids = pending_projects(1)
+                if project_ids:
+                    purge_project(project_ids[0], batch_size, stopping)
+            except DatabaseError as e:
+                logger.warning('Ошибка базы данных в purge_projects: %s', e)
+                close_old_connections()
+                project_ids = []
+            if not project_ids:
+                time.sleep(interval)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tasks.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Удаление отметок удаления старше SYNC_TOMBSTONE_RETENTION_DAYS.'
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(f'Удалено отметок: {deleted}')
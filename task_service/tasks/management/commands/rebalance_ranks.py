@@ -0,0 +1,50 @@
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from tasks.ranking import pending_columns, rebalance_column
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Перебалансировка ключей ручного порядка задач в колонках доски.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='колонок за проход')
+        parser.add_argument('--interval', type=float, help='пауза между проходами, сек.')
+        parser.add_argument('--once', action='store_true', help='обработать все колонки и выйти')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['once']:
+            total = 0
+            while columns := pending_columns(batch_size):
+                for project_id, status in columns:
+                    total += rebalance_column(project_id, status)
+            self.stdout.write(f'Перезаписано ключей: {total}')
+            return
+
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+        interval = options['interval'] or settings.TASKS_RANK_REBALANCE_INTERVAL
+
+        self.stdout.write('Запуск перебалансировки порядка задач...')
+        while not stopping:
+            try:
+                columns = pending_columns(batch_size)
+                for project_id, status in columns:
+                    if stopping:
+                        break
+                    rebalance_column(project_id, status)
+            except DatabaseError as e:
+                logger.warning('Ошибка базы данных в rebalance_ranks: %s', e)
+                close_old_connections()
+                columns = []
+            if len(columns) < batch_size:
+                time.sleep(interval)
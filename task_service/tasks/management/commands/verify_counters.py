@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.counters import find_drift, repair
+from tasks.models import Project, Task
+
+
+class Command(BaseCommand):
+    help = 'Проверка (и с --repair — исправление) денормализованных счётчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='пересчитать расходящиеся счётчики')
+        parser.add_argument('--batch-size', type=int, default=10000, help='диапазон id за один запрос')
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Task, Project):
+            drifted = 0
+            for ids in find_drift(model, options['batch_size']):
+                drifted += len(ids)
+                if options['repair']:
+                    repair(model, ids)
+            total += drifted
+            self.stdout.write(f'{model._meta.verbose_name_plural}: расхождений {drifted}')
+        if total and not options['repair']:
+            raise CommandError(f'Найдено расхождений: {total}. Запустите с --repair.')
+        if total:
+            self.stdout.write(f'Исправлено расхождений: {total}')
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50, verbose_name='Тип события')),
+                ('payload', models.JSONField(default=dict, verbose_name='Данные события')),
+                ('actor_id', models.IntegerField(verbose_name='ID инициатора')),
+                ('actor_username', models.CharField(blank=True, max_length=150, verbose_name='Имя инициатора')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток доставки')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступно для отправки')),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата доставки')),
+            ],
+            options={
+                'verbose_name': 'Событие outbox',
+                'verbose_name_plural': 'События outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('dispatched_at__isnull', True)), fields=['available_at', 'id'], name='outbox_pending_idx'), models.Index(fields=['dispatched_at'], name='outbox_dispatched_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:15
+
+from django.db import migrations
+
+
+def install_search(apps, schema_editor):
+    # Столбец, индекс и триггеры поиска описаны в tasks.search (только PostgreSQL).
+    from tasks.search import install_search_triggers
+    install_search_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_comment_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
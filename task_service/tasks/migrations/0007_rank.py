@@ -0,0 +1,49 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankRebalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('todo', 'К выполнению'), ('in_progress', 'В работе'), ('review', 'На проверке'), ('done', 'Выполнена'), ('cancelled', 'Отменена')], max_length=20, verbose_name='Статус')),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата запроса')),
+            ],
+            options={
+                'verbose_name': 'Перебалансировка порядка',
+                'verbose_name_plural': 'Перебалансировки порядка',
+            },
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Порядок'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'rank'], name='task_board_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('rank', '')), fields=['project', 'status'], name='task_unranked_idx'),
+        ),
+        migrations.AddField(
+            model_name='rankrebalance',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tasks.project', verbose_name='Проект'),
+        ),
+        migrations.AddConstraint(
+            model_name='rankrebalance',
+            constraint=models.UniqueConstraint(fields=('project', 'status'), name='rank_rebalance_unique'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-18 05:15
+
+from django.db import migrations, models
+
+
+def install_counters(apps, schema_editor):
+    # Триггеры описаны в tasks.counters (в SQLite их создаёт post_migrate);
+    # существующие строки получают начальные значения одним пересчётом.
+    from tasks.counters import find_drift, install_counter_triggers, repair
+    from tasks.models import Project, Task
+    if schema_editor.connection.vendor == 'postgresql':
+        install_counter_triggers(schema_editor.connection)
+    for model in (Task, Project):
+        for ids in find_drift(model):
+            repair(model, ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_rank'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tasks_cancelled_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Отменённых задач'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_done_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Выполненных задач'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_in_progress_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Задач в работе'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_review_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Задач на проверке'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_todo_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Задач к выполнению'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comments_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.RunPython(install_counters, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,40 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 
-class Project(models.Model):
+class CounterFieldsMixin:
+    """Счётчики, которые поддерживают триггеры БД (см. tasks.counters).
+
+    При сохранении существующей строки поля ``counter_fields`` не
+    записываются: значение в памяти могло устареть, и полный UPDATE
+    затёр бы изменения, внесённые триггерами.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            skipped = set(self.counter_fields) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class ProjectQuerySet(models.QuerySet):
+    def alive(self):
+        """Проекты, не помеченные на удаление."""
+        return self.filter(deleted_at__isnull=True)
+
+
+class TaskQuerySet(models.QuerySet):
+    def alive(self):
+        """Задачи проектов, не помеченных на удаление."""
+        return self.filter(project__deleted_at__isnull=True)
+
+
+class Project(CounterFieldsMixin, models.Model):
     """Модель проекта."""
 
     class Status(models.TextChoices):
@@ -21,17 +54,57 @@ class Project(models.Model):
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField('Дата обновления', auto_now=True)
     deadline = models.DateTimeField('Крайний срок', null=True, blank=True)
+    # Число задач проекта по статусам; поддерживается триггерами.
+    tasks_todo_count = models.IntegerField('Задач к выполнению', default=0, editable=False)
+    tasks_in_progress_count = models.IntegerField('Задач в работе', default=0, editable=False)
+    tasks_review_count = models.IntegerField('Задач на проверке', default=0, editable=False)
+    tasks_done_count = models.IntegerField('Выполненных задач', default=0, editable=False)
+    tasks_cancelled_count = models.IntegerField('Отменённых задач', default=0, editable=False)
+    # Пометка удаления: проект скрыт из API, задачи и комментарии удаляет
+    # фоновая очистка (см. tasks.purge).
+    deleted_at = models.DateTimeField('Дата удаления', null=True, blank=True, editable=False)
+
+    objects = ProjectQuerySet.as_manager()
+
+    counter_fields = (
+        'tasks_todo_count', 'tasks_in_progress_count', 'tasks_review_count',
+        'tasks_done_count', 'tasks_cancelled_count',
+    )
 
     class Meta:
         verbose_name = 'Проект'
         verbose_name_plural = 'Проекты'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='project_updated_idx'),
+            # Очередь фоновой очистки удалённых проектов.
+            models.Index(
+                fields=['deleted_at'], name='project_deleted_idx',
+                condition=Q(deleted_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def task_count_field(status):
+        """Имя поля-счётчика задач проекта в статусе ``status``."""
+        return f'tasks_{status}_count'
 
-class Task(models.Model):
+    @property
+    def tasks_by_status(self):
+        return {
+            field[len('tasks_'):-len('_count')]: getattr(self, field)
+            for field in self.counter_fields
+        }
+
+    @property
+    def tasks_count(self):
+        return sum(getattr(self, field) for field in self.counter_fields)
+
+
+class Task(CounterFieldsMixin, models.Model):
     """Модель задачи."""
 
     class Priority(models.TextChoices):
@@ -66,11 +139,53 @@ class Task(models.Model):
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField('Дата обновления', auto_now=True)
     deadline = models.DateTimeField('Крайний срок', null=True, blank=True)
+    # Ключ ручного порядка в колонке доски (см. tasks.ranking).
+    rank = models.CharField('Порядок', max_length=255, default='', blank=True)
+    # Число комментариев; поддерживается триггерами.
+    comments_count = models.IntegerField('Комментариев', default=0, editable=False)
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='subtasks', verbose_name='Родительская задача',
+    )
+    # id предков от корня через «/» (см. tasks.hierarchy).
+    path = models.CharField('Путь в иерархии', max_length=255, default='', blank=True, editable=False)
+
+    counter_fields = ('comments_count',)
+
+    objects = TaskQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Задача'
         verbose_name_plural = 'Задачи'
         ordering = ['-created_at']
+        # Индексы повторяют фильтры TaskViewSet (проект / исполнитель /
+        # статус) с сортировкой по -created_at, чтобы выборка шла по индексу
+        # без отдельной сортировки. Частичные индексы покрывают самый частый
+        # случай — открытые задачи — и заметно меньше полных.
+        indexes = [
+            models.Index(fields=['project', '-created_at'], name='task_project_created_idx'),
+            models.Index(fields=['project', 'status', '-created_at'], name='task_project_status_idx'),
+            models.Index(fields=['assignee_id', 'status', '-created_at'], name='task_assignee_status_idx'),
+            models.Index(
+                fields=['project', '-created_at'], name='task_project_open_idx',
+                condition=Q(status__in=['todo', 'in_progress', 'review']),
+            ),
+            models.Index(
+                fields=['assignee_id', '-created_at'], name='task_assignee_open_idx',
+                condition=Q(status__in=['todo', 'in_progress', 'review']),
+            ),
+            # Дельта-синхронизация (/api/tasks/sync/) читает по (updated_at, id).
+            models.Index(fields=['updated_at', 'id'], name='task_updated_idx'),
+            # Колонки доски в ручном порядке; частичный индекс находит
+            # задачи, которым ещё не назначен ключ.
+            models.Index(fields=['project', 'status', 'rank'], name='task_board_rank_idx'),
+            models.Index(
+                fields=['project', 'status'], name='task_unranked_idx',
+                condition=Q(rank=''),
+            ),
+            # Поддерево задачи — LIKE 'путь%' по материализованному пути.
+            models.Index(fields=['path'], name='task_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.title
@@ -85,11 +200,94 @@ class Comment(models.Model):
     author_id = models.IntegerField('ID автора')
     text = models.TextField('Текст комментария')
     created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата обновления', auto_now=True)
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task', 'created_at'], name='comment_task_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='comment_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Комментарий к задаче #{self.task_id}"
+
+
+class RankRebalance(models.Model):
+    """Колонка доски, ключи порядка которой нужно переписать."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, verbose_name='Проект')
+    status = models.CharField('Статус', max_length=20, choices=Task.Status.choices)
+    requested_at = models.DateTimeField('Дата запроса', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Перебалансировка порядка'
+        verbose_name_plural = 'Перебалансировки порядка'
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'status'], name='rank_rebalance_unique'),
+        ]
+
+    def __str__(self):
+        return f'Проект #{self.project_id}, {self.status}'
+
+
+class Tombstone(models.Model):
+    """Отметка об удалении сущности для дельта-синхронизации.
+
+    Удаление проекта подразумевает удаление его задач и комментариев,
+    удаление задачи — её комментариев: отдельные отметки для дочерних
+    строк не создаются.
+    """
+
+    class Entity(models.TextChoices):
+        PROJECT = 'project', 'Проект'
+        TASK = 'task', 'Задача'
+        COMMENT = 'comment', 'Комментарий'
+
+    entity = models.CharField('Сущность', max_length=20, choices=Entity.choices)
+    entity_id = models.BigIntegerField('ID сущности')
+    deleted_at = models.DateTimeField('Дата удаления', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Отметка удаления'
+        verbose_name_plural = 'Отметки удаления'
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_entity_display()} #{self.entity_id}'
+
+
+class OutboxEvent(models.Model):
+    """Событие для notification_service (transactional outbox).
+
+    Записывается в той же транзакции, что и изменение задачи, и доставляется
+    отдельным процессом ``manage.py dispatch_outbox``.
+    """
+    event_type = models.CharField('Тип события', max_length=50)
+    payload = models.JSONField('Данные события', default=dict)
+    actor_id = models.IntegerField('ID инициатора')
+    actor_username = models.CharField('Имя инициатора', max_length=150, blank=True)
+    attempts = models.PositiveIntegerField('Попыток доставки', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    available_at = models.DateTimeField('Доступно для отправки', default=timezone.now)
+    dispatched_at = models.DateTimeField('Дата доставки', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Событие outbox'
+        verbose_name_plural = 'События outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'], name='outbox_pending_idx',
+                condition=Q(dispatched_at__isnull=True),
+            ),
+            models.Index(fields=['dispatched_at'], name='outbox_dispatched_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.event_type}] #{self.pk}"
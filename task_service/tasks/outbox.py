@@ -0,0 +1,210 @@
+"""Transactional outbox для событий задач.
+
+Вьюхи только записывают событие в таблицу ``OutboxEvent`` в той же
+транзакции, что и изменение задачи, — запрос пользователя не ждёт
+notification_service. Доставку выполняет ``OutboxDispatcher``, запущенный
+командой ``manage.py dispatch_outbox``.
+
+Пачка захватывается короткой транзакцией: строки блокируются с
+``skip_locked`` и сдвигом ``available_at`` арендуются на
+``OUTBOX_LEASE_SECONDS``. HTTP-запросы идут уже вне транзакции, результат
+записывается второй короткой транзакцией. Если диспетчер упал, события
+снова станут доступны после окончания аренды.
+"""
+import logging
+import random
+import time
+from datetime import timedelta
+
+import jwt
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# Ответы, после которых повтор не имеет смысла: событие сразу помечается
+# как окончательно не доставленное.
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+
+def enqueue_event(event_type, data, user):
+    """Запись события в outbox. Вызывать внутри транзакции изменения."""
+    return OutboxEvent.objects.create(
+        event_type=event_type,
+        payload=data,
+        actor_id=user.id,
+        actor_username=getattr(user, 'username', ''),
+    )
+
+
+def outbox_metrics():
+    """Состояние очереди: объём, отставание и пропускная способность."""
+    now = timezone.now()
+    max_attempts = settings.OUTBOX_MAX_ATTEMPTS
+    undelivered = OutboxEvent.objects.filter(dispatched_at__isnull=True)
+    stats = undelivered.aggregate(
+        pending=Count('id', filter=Q(attempts__lt=max_attempts)),
+        failed=Count('id', filter=Q(attempts__gte=max_attempts)),
+        oldest=Min('created_at', filter=Q(attempts__lt=max_attempts)),
+    )
+    dispatched_last_minute = OutboxEvent.objects.filter(
+        dispatched_at__gte=now - timedelta(minutes=1),
+    ).count()
+    oldest = stats['oldest']
+    return {
+        'pending': stats['pending'],
+        'failed': stats['failed'],
+        'lag_seconds': round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+        'dispatched_last_minute': dispatched_last_minute,
+    }
+
+
+class DeliveryError(Exception):
+    """Ошибка доставки события; retryable=False — повторять бессмысленно."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class OutboxDispatcher:
+    """Доставка событий outbox пачками через пул keep-alive соединений."""
+
+    def __init__(self, batch_size=None, session=None):
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.url = f'{settings.NOTIFICATION_SERVICE_URL}/api/notifications/create/'
+        self.session = session or self._make_session()
+        self.delivered = 0
+        self.failed = 0
+
+    @staticmethod
+    def _make_session():
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.OUTBOX_HTTP_POOL_SIZE,
+            max_retries=0,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def dispatch_batch(self):
+        """Доставка одной пачки событий. Возвращает число обработанных."""
+        events = self._claim()
+        tokens = {}
+        for event in events:
+            self._dispatch(event, tokens)
+        if events:
+            OutboxEvent.objects.bulk_update(
+                events, ['attempts', 'last_error', 'available_at', 'dispatched_at'],
+            )
+        return len(events)
+
+    def _claim(self):
+        """Захват пачки: аренда строк до окончания OUTBOX_LEASE_SECONDS."""
+        now = timezone.now()
+        with transaction.atomic():
+            events = list(
+                OutboxEvent.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    dispatched_at__isnull=True,
+                    available_at__lte=now,
+                    attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+                )
+                .order_by('available_at', 'id')[:self.batch_size]
+            )
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+            )
+        return events
+
+    def _dispatch(self, event, tokens):
+        event.attempts += 1
+        try:
+            self._send(event, tokens)
+        except DeliveryError as e:
+            self.failed += 1
+            event.last_error = str(e)[:1000]
+            if e.retryable:
+                event.available_at = timezone.now() + self._backoff(event.attempts)
+            else:
+                event.attempts = max(event.attempts, settings.OUTBOX_MAX_ATTEMPTS)
+            logger.warning(
+                'Событие outbox #%s не доставлено (попытка %s): %s',
+                event.pk, event.attempts, e,
+            )
+        else:
+            self.delivered += 1
+            event.dispatched_at = timezone.now()
+            event.last_error = ''
+
+    def _send(self, event, tokens):
+        if event.actor_id not in tokens:
+            tokens[event.actor_id] = self._token_for(event)
+        try:
+            resp = self.session.post(
+                self.url,
+                json={'event_type': event.event_type, **event.payload},
+                headers={'Authorization': f'Bearer {tokens[event.actor_id]}'},
+                timeout=settings.OUTBOX_HTTP_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            raise DeliveryError(e)
+        if resp.status_code >= 400:
+            retryable = resp.status_code >= 500 or resp.status_code in RETRYABLE_STATUS_CODES
+            raise DeliveryError(f'HTTP {resp.status_code}: {resp.text[:200]}', retryable)
+
+    @staticmethod
+    def _token_for(event):
+        """Короткоживущий токен от имени инициатора события."""
+        now = timezone.now()
+        payload = {
+            'user_id': event.actor_id,
+            'username': event.actor_username,
+            'exp': now + timedelta(minutes=5),
+            'iat': now,
+        }
+        return jwt.encode(payload, settings.JWT_SECRET, algorithm='HS256')
+
+    @staticmethod
+    def _backoff(attempts):
+        delay = min(
+            settings.OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1),
+            settings.OUTBOX_BACKOFF_MAX,
+        )
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def purge_dispatched(self):
+        """Удаление доставленных событий старше OUTBOX_RETENTION_HOURS."""
+        cutoff = timezone.now() - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        deleted, _ = OutboxEvent.objects.filter(dispatched_at__lt=cutoff).delete()
+        return deleted
+
+    def run(self, poll_interval=None, report_interval=60, should_stop=lambda: False):
+        """Основной цикл: пачки подряд, пока очередь не опустеет, затем ожидание."""
+        poll_interval = poll_interval or settings.OUTBOX_POLL_INTERVAL
+        last_report = time.monotonic()
+        delivered_at_report = 0
+        while not should_stop():
+            processed = self.dispatch_batch()
+            elapsed = time.monotonic() - last_report
+            if elapsed >= report_interval:
+                self.purge_dispatched()
+                metrics = outbox_metrics()
+                logger.info(
+                    'Outbox: доставлено %.1f/с, в очереди %s, отставание %.1fс, ошибок %s',
+                    (self.delivered - delivered_at_report) / elapsed,
+                    metrics['pending'], metrics['lag_seconds'], metrics['failed'],
+                )
+                last_report = time.monotonic()
+                delivered_at_report = self.delivered
+            if processed < self.batch_size:
+                time.sleep(poll_interval)
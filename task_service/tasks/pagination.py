@@ -0,0 +1,33 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class OptInCursorPagination(CursorPagination):
+    """Курсорная (keyset) пагинация по (-created_at, id).
+
+    Позиция курсора фильтрует по индексируемому created_at, поэтому
+    стоимость запроса не растёт с глубиной листания. Пагинация включается
+    только по запросу клиента (``?paginate=1``, ``?cursor=`` или
+    ``?page_size=``) — без этих параметров ответ остаётся простым списком,
+    как и раньше.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    opt_in_query_param = 'paginate'
+
+    def is_requested(self, request):
+        params = request.query_params
+        if self.cursor_query_param in params or self.page_size_query_param in params:
+            return True
+        return params.get(self.opt_in_query_param, '').lower() in ('1', 'true', 'cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CommentCursorPagination(OptInCursorPagination):
+    """Курсорная пагинация комментариев в хронологическом порядке."""
+    ordering = ('created_at', 'id')
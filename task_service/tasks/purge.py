@@ -0,0 +1,96 @@
+"""Отложенное удаление проектов.
+
+DELETE проекта только помечает его (``Project.deleted_at``) и сразу
+отвечает 202: каскадное удаление большого проекта загрузило бы все задачи
+и комментарии в память и держало бы блокировки в одной длинной
+транзакции. Помеченный проект скрыт из API вместе с задачами и
+комментариями.
+
+Строки удаляет фоновый процесс ``manage.py purge_projects`` пачками по
+``TASKS_PURGE_BATCH_SIZE``: сначала комментарии, затем задачи (от листьев
+иерархии к корням), в конце сам проект; каждая пачка — отдельная короткая транзакция. Число
+оставшихся задач видно по счётчикам проекта (см. tasks.counters).
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comment, Project, Task, Tombstone
+from .sync import record_deletions
+
+logger = logging.getLogger(__name__)
+
+
+def mark_deleted(project):
+    """Пометка проекта на удаление."""
+    with transaction.atomic():
+        project.deleted_at = timezone.now()
+        project.save(update_fields=['deleted_at', 'updated_at'])
+        record_deletions(Tombstone.Entity.PROJECT, [project.pk])
+
+
+def deletion_progress(project):
+    return {
+        'id': project.id,
+        'deleted_at': project.deleted_at,
+        'tasks_remaining': project.tasks_count,
+    }
+
+
+def pending_projects(limit):
+    """Помеченные проекты в порядке удаления."""
+    return list(
+        Project.objects.filter(deleted_at__isnull=False)
+        .order_by('deleted_at').values_list('id', flat=True)[:limit]
+    )
+
+
+def purge_batch(project_id, batch_size):
+    """Одна пачка очистки проекта.
+
+    Возвращает (удалено комментариев, удалено задач, проект удалён).
+    """
+    with transaction.atomic():
+        comment_ids = list(
+            Comment.objects.filter(task__project_id=project_id)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if comment_ids:
+            deleted, _ = Comment.objects.filter(id__in=comment_ids).delete()
+            return deleted, 0, False
+        # Только листья иерархии: каскад по Task.parent удалил бы вместе
+        # с задачей всё её поддерево сверх размера пачки.
+        task_ids = list(
+            Task.objects.filter(project_id=project_id, subtasks__isnull=True)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if task_ids:
+            # Комментариев и подзадач уже нет, поэтому каскад не загружает
+            # ничего, кроме самой пачки задач.
+            _, deleted = Task.objects.filter(id__in=task_ids).delete()
+            return 0, deleted.get(Task._meta.label, 0), False
+        Project.objects.filter(id=project_id, deleted_at__isnull=False).delete()
+        return 0, 0, True
+
+
+def purge_project(project_id, batch_size, stopping=()):
+    """Очистка проекта пачками до конца (или до непустого ``stopping``).
+
+    Возвращает True, если проект удалён полностью.
+    """
+    comments = tasks = 0
+    while not stopping:
+        deleted_comments, deleted_tasks, finished = purge_batch(project_id, batch_size)
+        comments += deleted_comments
+        tasks += deleted_tasks
+        if finished:
+            logger.info(
+                'Проект %s удалён: задач %s, комментариев %s', project_id, tasks, comments,
+            )
+            return True
+        logger.info(
+            'Очистка проекта %s: удалено задач %s, комментариев %s',
+            project_id, tasks, comments,
+        )
+    return False
@@ -0,0 +1,162 @@
+"""Ручной порядок задач в колонках доски (дробные лексикографические ключи).
+
+Порядок задаётся строкой ``Task.rank`` из цифр и строчных латинских букв
+(base36); сравниваются ключи как строки. Между любыми двумя ключами
+всегда есть третий, поэтому перемещение задачи меняет одну строку.
+Ключи не заканчиваются на ``0`` — иначе перед ключом могло бы не
+остаться места.
+
+Ключи после многократных вставок в одно место удлиняются. Как только
+ключ длиннее ``TASKS_RANK_MAX_LENGTH``, колонка ставится в очередь
+``RankRebalance``, и команда ``manage.py rebalance_ranks`` переписывает её
+ключи равномерно. Задачи с пустым ключом (созданные до появления
+порядка) упорядочиваются той же командой.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+
+from .models import RankRebalance, Task
+
+logger = logging.getLogger(__name__)
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+# Ключи после перебалансировки имеют KEY_WIDTH знаков; вставка в начало
+# или конец колонки смещает ключ на STEP, не удлиняя его.
+KEY_WIDTH = 6
+KEY_SPACE = BASE ** KEY_WIDTH
+STEP = BASE ** 3
+
+# Порядок задач в колонке: ключ, затем новые выше (для задач без ключа).
+COLUMN_ORDERING = ('rank', '-created_at', '-id')
+
+
+def _to_int(key):
+    value = 0
+    for char in key[:KEY_WIDTH].ljust(KEY_WIDTH, DIGITS[0]):
+        value = value * BASE + DIGITS.index(char)
+    return value
+
+
+def _from_int(value):
+    chars = []
+    for _ in range(KEY_WIDTH):
+        value, digit = divmod(value, BASE)
+        chars.append(DIGITS[digit])
+    return ''.join(reversed(chars)).rstrip(DIGITS[0])
+
+
+def _midpoint(a, b):
+    """Ключ строго между a и b; a == '' — начало, b is None — конец."""
+    if b is not None:
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def key_between(before, after):
+    """Ключ между соседями ``before`` < ``after`` (None — край колонки)."""
+    if before is not None and after is not None:
+        if before >= after:
+            raise ValueError(f'Ключи не упорядочены: {before!r} >= {after!r}')
+        return _midpoint(before, after)
+    if before is not None:
+        value = _to_int(before) + STEP
+        return _from_int(value) if value < KEY_SPACE else _midpoint(before, None)
+    if after is not None:
+        value = _to_int(after) - STEP
+        return _from_int(value) if value > 0 else _midpoint('', after)
+    return _from_int(KEY_SPACE // 2)
+
+
+def is_valid_key(key):
+    return bool(key) and not key.endswith(DIGITS[0]) and all(char in DIGITS for char in key)
+
+
+def top_ranks(columns):
+    """Первые ключи колонок: {(project_id, status): rank} одним запросом."""
+    project_ids = {project_id for project_id, _ in columns}
+    statuses = {status for _, status in columns}
+    rows = (
+        Task.objects.filter(project_id__in=project_ids, status__in=statuses)
+        .exclude(rank='')
+        .values_list('project_id', 'status')
+        .annotate(first=Min('rank'))
+    )
+    return {(project_id, status): first for project_id, status, first in rows}
+
+
+def assign_top_ranks(tasks):
+    """Ключи для новых задач: выше всех в своей колонке, в порядке списка."""
+    firsts = top_ranks({(task.project_id, task.status) for task in tasks})
+    touched = set()
+    for task in reversed(tasks):
+        column = (task.project_id, task.status)
+        task.rank = firsts[column] = key_between(None, firsts.get(column))
+        touched.add(column)
+    for column in touched:
+        check_key_length(firsts[column], *column)
+    return tasks
+
+
+def request_rebalance(project_id, status):
+    """Постановка колонки в очередь перебалансировки."""
+    RankRebalance.objects.bulk_create(
+        [RankRebalance(project_id=project_id, status=status)], ignore_conflicts=True,
+    )
+
+
+def check_key_length(key, project_id, status):
+    if len(key) > settings.TASKS_RANK_MAX_LENGTH:
+        request_rebalance(project_id, status)
+
+
+def rebalance_column(project_id, status):
+    """Равномерная перезапись ключей колонки. Возвращает число изменённых задач."""
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update()
+            .filter(project_id=project_id, status=status)
+            .order_by(*COLUMN_ORDERING)
+            .only('id', 'rank')
+        )
+        gap = KEY_SPACE // (len(tasks) + 1)
+        changed = []
+        for position, task in enumerate(tasks, start=1):
+            key = _from_int(gap * position)
+            if task.rank != key:
+                task.rank = key
+                changed.append(task)
+        Task.objects.bulk_update(changed, ['rank'], batch_size=1000)
+        RankRebalance.objects.filter(project_id=project_id, status=status).delete()
+    if changed:
+        logger.info(
+            'Ключи порядка перезаписаны: проект %s, статус %s, задач %s',
+            project_id, status, len(changed),
+        )
+    return len(changed)
+
+
+def pending_columns(limit):
+    """Колонки для перебалансировки: из очереди и с задачами без ключа."""
+    queued = list(
+        RankRebalance.objects.order_by('requested_at')
+        .values_list('project_id', 'status')[:limit]
+    )
+    unranked = list(
+        Task.objects.filter(rank='')
+        .values_list('project_id', 'status').distinct()[:limit]
+    )
+    return list(dict.fromkeys(queued + unranked))[:limit]
@@ -0,0 +1,161 @@
+"""Полнотекстовый поиск по задачам и комментариям.
+
+В PostgreSQL у таблицы задач есть столбец ``search_vector`` (tsvector),
+который поддерживается триггерами: заголовок (вес A), описание (вес B) и
+текст комментариев (вес C). Поиск идёт по GIN-индексу. Столбец, индекс и
+триггеры создаёт миграция ``0005_search_vector`` — модель о них не знает, и
+ORM никогда не читает tsvector в обычных запросах.
+
+На других СУБД (SQLite в тестах) используется поиск через LIKE.
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import (
+    BooleanField, Case, Exists, FloatField, OuterRef, Q, Value, When,
+)
+from django.db.models.expressions import RawSQL
+
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+HEADLINE_OPTIONS = 'MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<b>, StopSel=</b>'
+
+INSTALL_SQL = """
+ALTER TABLE tasks_task ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION tasks_task_search_vector(p_task_id bigint, p_title text, p_description text)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('{config}', coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('{config}', coalesce(p_description, '')), 'B')
+        || setweight(to_tsvector('{config}', coalesce(
+               (SELECT string_agg(text, ' ') FROM tasks_comment WHERE task_id = p_task_id), '')), 'C')
+$$;
+
+CREATE OR REPLACE FUNCTION tasks_task_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := tasks_task_search_vector(NEW.id, NEW.title, NEW.description);
+    RETURN NEW;
+END $$;
+
+DROP TRIGGER IF EXISTS tasks_task_search_insert ON tasks_task;
+CREATE TRIGGER tasks_task_search_insert BEFORE INSERT ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_trigger();
+
+DROP TRIGGER IF EXISTS tasks_task_search_update ON tasks_task;
+CREATE TRIGGER tasks_task_search_update BEFORE UPDATE OF title, description ON tasks_task
+    FOR EACH ROW
+    WHEN (OLD.title IS DISTINCT FROM NEW.title OR OLD.description IS DISTINCT FROM NEW.description)
+    EXECUTE FUNCTION tasks_task_search_trigger();
+
+-- Комментарии: триггеры уровня оператора с переходными таблицами, чтобы
+-- массовые вставки и удаления пересчитывали вектор каждой задачи один раз.
+CREATE OR REPLACE FUNCTION tasks_comment_search_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE tasks_task t SET search_vector = tasks_task_search_vector(t.id, t.title, t.description)
+        WHERE t.id IN (SELECT task_id FROM new_comments);
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE tasks_task t SET search_vector = tasks_task_search_vector(t.id, t.title, t.description)
+        WHERE t.id IN (SELECT task_id FROM old_comments);
+    ELSE
+        UPDATE tasks_task t SET search_vector = tasks_task_search_vector(t.id, t.title, t.description)
+        WHERE t.id IN (SELECT task_id FROM old_comments UNION SELECT task_id FROM new_comments);
+    END IF;
+    RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS tasks_comment_search_insert ON tasks_comment;
+CREATE TRIGGER tasks_comment_search_insert AFTER INSERT ON tasks_comment
+    REFERENCING NEW TABLE AS new_comments
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_comment_search_trigger();
+
+DROP TRIGGER IF EXISTS tasks_comment_search_delete ON tasks_comment;
+CREATE TRIGGER tasks_comment_search_delete AFTER DELETE ON tasks_comment
+    REFERENCING OLD TABLE AS old_comments
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_comment_search_trigger();
+
+DROP TRIGGER IF EXISTS tasks_comment_search_update ON tasks_comment;
+CREATE TRIGGER tasks_comment_search_update AFTER UPDATE ON tasks_comment
+    REFERENCING OLD TABLE AS old_comments NEW TABLE AS new_comments
+    FOR EACH STATEMENT EXECUTE FUNCTION tasks_comment_search_trigger();
+
+CREATE INDEX IF NOT EXISTS tasks_task_search_idx ON tasks_task USING gin (search_vector);
+"""
+
+BACKFILL_SQL = """
+UPDATE tasks_task SET search_vector = tasks_task_search_vector(id, title, description)
+WHERE search_vector IS NULL
+"""
+
+
+def search_config():
+    config = settings.TASKS_SEARCH_CONFIG
+    if not re.fullmatch(r'\w+', config):
+        raise ValueError(f'Недопустимая конфигурация полнотекстового поиска: {config!r}')
+    return config
+
+
+def install_search_triggers(db):
+    """Столбец tsvector, GIN-индекс и триггеры на соединении ``db`` (миграция)."""
+    if db.vendor != 'postgresql':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(INSTALL_SQL.format(config=search_config()))
+        cursor.execute(BACKFILL_SQL)
+        if cursor.rowcount:
+            logger.info('Поисковый индекс заполнен для %s задач', cursor.rowcount)
+
+
+def search_tasks(queryset, query):
+    """Фильтрация задач по запросу с ранжированием по релевантности.
+
+    Возвращает queryset с аннотацией ``search_rank``, упорядоченный по ней.
+    """
+    if connection.vendor == 'postgresql':
+        config = search_config()
+        tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+        return queryset.filter(
+            RawSQL(f'tasks_task.search_vector @@ {tsquery}', (config, query),
+                   output_field=BooleanField()),
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank_cd(tasks_task.search_vector, {tsquery})',
+                               (config, query), output_field=FloatField()),
+        ).order_by('-search_rank', '-created_at', '-id')
+
+    in_comments = Exists(Comment.objects.filter(task=OuterRef('pk'), text__icontains=query))
+    return queryset.filter(
+        Q(title__icontains=query) | Q(description__icontains=query) | in_comments,
+    ).annotate(
+        search_rank=Case(
+            When(title__icontains=query, then=Value(1.0)),
+            When(description__icontains=query, then=Value(0.5)),
+            default=Value(0.2),
+            output_field=FloatField(),
+        ),
+    ).order_by('-search_rank', '-created_at', '-id')
+
+
+def attach_headlines(tasks, query):
+    """Подсветка совпадений в заголовке и описании найденных задач.
+
+    ts_headline дорог, поэтому вызывается отдельным запросом только для
+    строк, попавших в ответ.
+    """
+    headlines = {}
+    if tasks and connection.vendor == 'postgresql':
+        config = search_config()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, ts_headline(%s::regconfig, title || ' ' || description, "
+                "websearch_to_tsquery(%s::regconfig, %s), %s) "
+                "FROM tasks_task WHERE id = ANY(%s)",
+                [config, config, query, HEADLINE_OPTIONS, [task.pk for task in tasks]],
+            )
+            headlines = dict(cursor.fetchall())
+    for task in tasks:
+        task.search_headline = headlines.get(task.pk)
+    return tasks
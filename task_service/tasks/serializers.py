@@ -1,28 +1,161 @@
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .conditional import PreconditionFailed
+from .hierarchy import HierarchyError, validate_parent
 from .models import Project, Task, Comment
 
 
-class CommentSerializer(serializers.ModelSerializer):
+def _split_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def sparse_field_names(names, request):
+    """Имена из ``names``, оставшиеся после ?fields= и ?omit= запроса.
+
+    Ограничения действуют только для чтения: в запросах на запись набор
+    полей сериализатора не меняется, иначе пропала бы валидация.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return list(names)
+    only = _split_param(request, 'fields')
+    omit = _split_param(request, 'omit') or set()
+    return [name for name in names if (only is None or name in only) and name not in omit]
+
+
+class SparseFieldsetMixin:
+    """Поддержка ?fields= и ?omit= в корневом сериализаторе ответа.
+
+    Вложенные сериализаторы (задачи в проекте, комментарии в задаче)
+    выводятся целиком.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        names = sparse_field_names(fields, self.context.get('request'))
+        return {name: fields[name] for name in names}
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'task', 'author_id', 'text', 'created_at']
         read_only_fields = ['id', 'author_id', 'created_at']
-
-
-class TaskSerializer(serializers.ModelSerializer):
-    comments_count = serializers.SerializerMethodField()
+        extra_kwargs = {'task': {'queryset': Task.objects.alive()}}
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PK-поле, которое берёт объекты из словаря ``context[prefetched_key]``.
+
+    Используется при пакетной валидации: все связанные объекты загружаются
+    одним запросом, а не по запросу на каждый элемент.
+    """
+
+    def __init__(self, prefetched_key, **kwargs):
+        self.prefetched_key = prefetched_key
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get(self.prefetched_key)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return prefetched[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    project = PrefetchedPrimaryKeyRelatedField(
+        'projects', queryset=Project.objects.alive(), label='Проект',
+    )
+    parent = PrefetchedPrimaryKeyRelatedField(
+        'parents', queryset=Task.objects.alive(), label='Родительская задача',
+        allow_null=True, required=False,
+    )
 
     class Meta:
         model = Task
         fields = [
             'id', 'project', 'title', 'description', 'priority',
             'status', 'assignee_id', 'creator_id', 'created_at',
-            'updated_at', 'deadline', 'comments_count',
+            'updated_at', 'deadline', 'rank', 'comments_count', 'parent',
         ]
-        read_only_fields = ['id', 'creator_id', 'created_at', 'updated_at']
-
-    def get_comments_count(self, obj):
-        return obj.comments.count()
+        read_only_fields = ['id', 'creator_id', 'created_at', 'updated_at', 'rank']
+
+    def validate(self, attrs):
+        """Положение в иерархии: родитель задаётся при создании, меняется через reparent.
+
+        Путь новой задачи вычисляется при вставке (hierarchy.assign_paths).
+        """
+        if self.instance is None:
+            try:
+                validate_parent(attrs.get('parent'), attrs['project'])
+            except HierarchyError as e:
+                raise serializers.ValidationError({'parent': [str(e)]})
+            return attrs
+
+        if 'parent' in attrs:
+            parent_id = attrs['parent'].pk if attrs['parent'] is not None else None
+            if parent_id != self.instance.parent_id:
+                raise serializers.ValidationError({'parent': [
+                    'Родитель меняется через POST /api/tasks/tasks/{id}/reparent/.',
+                ]})
+        project = attrs.get('project')
+        if project is not None and project.pk != self.instance.project_id and (
+            self.instance.parent_id is not None or self.instance.subtasks.exists()
+        ):
+            raise serializers.ValidationError({'project': [
+                'Задачу из иерархии нельзя перенести в другой проект.',
+            ]})
+        return attrs
+
+    def update(self, instance, validated_data):
+        """Запись только изменившихся столбцов одним UPDATE.
+
+        Если в контексте передан ``expected_updated_at``, обновление
+        выполняется условно (compare-and-set по updated_at): при
+        параллельном изменении строки возвращается 412.
+        """
+        expected = self.context.get('expected_updated_at')
+        changes = self.apply_changes(instance, validated_data)
+        if not changes:
+            return instance
+
+        now = timezone.now()
+        queryset = Task.objects.filter(pk=instance.pk)
+        if expected is not None:
+            queryset = queryset.filter(updated_at=expected)
+        if not queryset.update(updated_at=now, **changes):
+            raise PreconditionFailed()
+        instance.updated_at = now
+        return instance
+
+    @staticmethod
+    def apply_changes(instance, validated_data):
+        """Перенос validated_data в объект; возвращает изменённые столбцы."""
+        changes = {}
+        for name, value in validated_data.items():
+            field = Task._meta.get_field(name)
+            current = getattr(instance, field.attname)
+            new = value.pk if field.is_relation and value is not None else value
+            if current != new:
+                changes[field.attname] = new
+                setattr(instance, name, value)
+        return changes
 
 
 class TaskDetailSerializer(TaskSerializer):
@@ -32,19 +165,32 @@ class TaskDetailSerializer(TaskSerializer):
         fields = TaskSerializer.Meta.fields + ['comments']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
-    tasks_count = serializers.SerializerMethodField()
+class TaskSearchSerializer(TaskSerializer):
+    search_rank = serializers.FloatField(read_only=True)
+    search_headline = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ['search_rank', 'search_headline']
+
+
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Счётчики хранятся в строке проекта (см. tasks.counters).
+    tasks_count = serializers.IntegerField(read_only=True)
+    tasks_by_status = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
     class Meta:
         model = Project
         fields = [
             'id', 'name', 'description', 'status', 'owner_id',
-            'created_at', 'updated_at', 'deadline', 'tasks_count',
+            'created_at', 'updated_at', 'deadline', 'tasks_count', 'tasks_by_status',
         ]
         read_only_fields = ['id', 'owner_id', 'created_at', 'updated_at']
-
-    def get_tasks_count(self, obj):
-        return obj.tasks.count()
+        # Столбцы модели, из которых вычисляются поля, не являющиеся
+        # столбцами (для ?fields= / ?omit=).
+        sparse_columns = {
+            'tasks_count': Project.counter_fields,
+            'tasks_by_status': Project.counter_fields,
+        }
 
 
 class ProjectDetailSerializer(ProjectSerializer):
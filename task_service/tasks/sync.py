@@ -0,0 +1,149 @@
+"""Дельта-синхронизация проектов, задач и комментариев.
+
+Клиент передаёт непрозрачный watermark и получает всё, что было создано,
+изменено или удалено после него, и новый watermark. Внутри watermark —
+позиция (updated_at, id) по каждой сущности и (deleted_at, id) по
+отметкам удаления; выборка идёт по индексам (updated_at, id), поэтому
+стоимость запроса зависит от объёма изменений, а не от размера таблиц.
+
+Строки моложе ``SYNC_SAFETY_WINDOW`` секунд не отдаются: updated_at
+проставляется до фиксации транзакции, и без этого окна строка, записанная
+параллельной транзакцией чуть раньше границы, могла бы быть пропущена.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .fastpath import task_row_encoder
+from .models import Comment, Project, Task, Tombstone
+from .serializers import CommentSerializer, ProjectSerializer, TaskSerializer
+
+ENTITY_KEYS = {
+    Tombstone.Entity.PROJECT: 'projects',
+    Tombstone.Entity.TASK: 'tasks',
+    Tombstone.Entity.COMMENT: 'comments',
+}
+WATERMARK_VERSION = 1
+
+
+class InvalidWatermark(ValueError):
+    """Watermark повреждён или выдан другой версией сервиса."""
+
+
+class WatermarkExpired(Exception):
+    """Отметки удаления после watermark уже очищены — нужна полная синхронизация."""
+
+
+def record_deletions(entity, ids):
+    """Отметки удаления; вызывать в транзакции удаления."""
+    Tombstone.objects.bulk_create(Tombstone(entity=entity, entity_id=pk) for pk in ids)
+
+
+def purge_tombstones():
+    """Удаление отметок старше SYNC_TOMBSTONE_RETENTION_DAYS."""
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def encode_watermark(positions):
+    data = {
+        key: [value.isoformat(), pk] if value else None
+        for key, (value, pk) in positions.items()
+    }
+    data['v'] = WATERMARK_VERSION
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_watermark(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        if data.pop('v') != WATERMARK_VERSION:
+            raise InvalidWatermark(token)
+        positions = {}
+        for key in ('projects', 'tasks', 'comments', 'deleted'):
+            value = data[key]
+            positions[key] = (datetime.fromisoformat(value[0]), int(value[1])) if value else (None, 0)
+        return positions
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError,
+            KeyError, IndexError, TypeError, ValueError, AttributeError):
+        raise InvalidWatermark(token)
+
+
+def _changed_after(queryset, field, position, upper):
+    value, pk = position
+    queryset = queryset.filter(**{f'{field}__lte': upper})
+    if value is not None:
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}),
+        )
+    return queryset.order_by(field, 'id')
+
+
+def _next_position(rows, field, limit, upper):
+    """Позиция после пачки: последняя строка либо граница выборки, если всё выбрано."""
+    if len(rows) < limit:
+        return upper, 0
+    last = rows[-1]
+    return getattr(last, field), last.id
+
+
+def sync_changes(token=None, limit=None):
+    """Изменения после watermark ``token`` (None — полная синхронизация)."""
+    limit = limit or settings.SYNC_PAGE_SIZE
+    now = timezone.now()
+    upper = now - timedelta(seconds=settings.SYNC_SAFETY_WINDOW)
+    if token:
+        positions = decode_watermark(token)
+        deleted_since = positions['deleted'][0]
+        retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if deleted_since is None or deleted_since < now - retention:
+            raise WatermarkExpired()
+    else:
+        # Новому клиенту удаления до начала синхронизации не нужны.
+        positions = {key: (None, 0) for key in ('projects', 'tasks', 'comments')}
+        positions['deleted'] = (upper, 0)
+
+    projects = list(_changed_after(
+        Project.objects.alive(), 'updated_at', positions['projects'], upper,
+    )[:limit])
+
+    encoder = task_row_encoder(tuple(TaskSerializer.Meta.fields))
+    tasks = list(_changed_after(
+        Task.objects.alive(), 'updated_at', positions['tasks'], upper,
+    ).values_list(*encoder.query_columns(('id', 'updated_at')), named=True)[:limit])
+
+    comments = list(_changed_after(
+        Comment.objects.filter(task__project__deleted_at__isnull=True), 'updated_at', positions['comments'], upper,
+    )[:limit])
+
+    tombstones = list(_changed_after(
+        Tombstone.objects.all(), 'deleted_at', positions['deleted'], upper,
+    )[:limit])
+    deleted = {key: [] for key in ENTITY_KEYS.values()}
+    for tombstone in tombstones:
+        deleted[ENTITY_KEYS[tombstone.entity]].append(tombstone.entity_id)
+
+    watermark = encode_watermark({
+        'projects': _next_position(projects, 'updated_at', limit, upper),
+        'tasks': _next_position(tasks, 'updated_at', limit, upper),
+        'comments': _next_position(comments, 'updated_at', limit, upper),
+        'deleted': _next_position(tombstones, 'deleted_at', limit, upper),
+    })
+    return {
+        'projects': ProjectSerializer(projects, many=True).data,
+        'tasks': encoder.encode_all(tasks),
+        'comments': CommentSerializer(comments, many=True).data,
+        'deleted': deleted,
+        'watermark': watermark,
+        'has_more': any(
+            len(rows) == limit for rows in (projects, tasks, comments, tombstones)
+        ),
+    }
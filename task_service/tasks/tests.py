@@ -1,10 +1,34 @@
 from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
+from unittest.mock import MagicMock, patch
+import csv
+import io
+import json
 import jwt
+import random
+import tempfile
+import threading
+import time
+import warnings
+import requests
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteWrapper
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
 
-from .models import Project, Task, Comment
+from .authentication import decode_token
+from .dbslots import ConnectionLimitMixin, ConnectionSlots
+from .hierarchy import reparent, validate_parent
+from .models import Project, Task, Comment, OutboxEvent, RankRebalance, Tombstone
+from .outbox import OutboxDispatcher
+from .views import TaskViewSet
+from .ranking import is_valid_key, key_between
+from .tokencache import token_cache
 
 
 TEST_DATABASES = {
@@ -132,6 +156,51 @@ class ProjectAPITest(TestCase):
         self.assertEqual(response.data['todo'], 1)
         self.assertEqual(response.data['done'], 1)
 
+    def test_project_statistics_single_query(self):
+        """Статистика со всеми разрезами считается одним запросом."""
+        project = Project.objects.create(name='Проект', owner_id=1)
+        past = timezone.now() - timedelta(days=1)
+        Task.objects.create(project=project, title='T1', creator_id=1, priority='high', deadline=past)
+        Task.objects.create(project=project, title='T2', creator_id=1, priority='high', status='done', deadline=past)
+        Task.objects.create(project=project, title='T3', creator_id=1, status='review')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/tasks/projects/{project.id}/statistics/')
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['review'], 1)
+        self.assertEqual(response.data['in_progress'], 0)
+        self.assertEqual(response.data['by_priority'], {
+            'low': 0, 'medium': 1, 'high': 2, 'critical': 0,
+        })
+        self.assertEqual(response.data['overdue'], 1)
+
+    def test_project_statistics_not_modified(self):
+        """Повторный запрос с If-None-Match получает 304."""
+        project = Project.objects.create(name='Проект', owner_id=1)
+        task = Task.objects.create(project=project, title='T1', creator_id=1)
+        url = f'/api/tasks/projects/{project.id}/statistics/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        task.status = Task.Status.DONE
+        task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Удаление задачи не сдвигает отметки времени оставшихся задач.
+        Task.objects.create(project=project, title='T2', creator_id=1)
+        etag = self.client.get(url)['ETag']
+        task.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 1)
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_unauthenticated_access(self):
         """Тест доступа без авторизации."""
         client = APIClient()
@@ -201,3 +270,1439 @@ class TaskAPITest(TestCase):
         response = self.client.delete(f'/api/tasks/tasks/{task.id}/')
         self.assertEqual(response.status_code, 204)
         self.assertFalse(Task.objects.filter(id=task.id).exists())
+
+    def test_search_tasks(self):
+        """Тест поиска по заголовку, описанию и комментариям с ранжированием."""
+        by_title = Task.objects.create(project=self.project, title='Квартальный отчёт', creator_id=1)
+        by_description = Task.objects.create(
+            project=self.project, title='Задача', description='Собрать отчёт', creator_id=1,
+        )
+        by_comment = Task.objects.create(project=self.project, title='Другая', creator_id=1)
+        Comment.objects.create(task=by_comment, author_id=1, text='Жду отчёт')
+        Task.objects.create(project=self.project, title='Лишняя', creator_id=1)
+
+        response = self.client.get('/api/tasks/tasks/', {'q': 'отчёт'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [task['id'] for task in response.data],
+            [by_title.id, by_description.id, by_comment.id],
+        )
+        self.assertIn('search_rank', response.data[0])
+        self.assertIn('search_headline', response.data[0])
+
+    def test_search_tasks_with_filters(self):
+        """Тест поиска вместе с фильтрами и ограничением ?page_size=."""
+        project2 = Project.objects.create(name='Проект 2', owner_id=1)
+        for i in range(3):
+            Task.objects.create(project=self.project, title=f'Релиз {i}', creator_id=1)
+        Task.objects.create(project=project2, title='Релиз', creator_id=1)
+
+        response = self.client.get(
+            '/api/tasks/tasks/', {'q': 'Релиз', 'project': self.project.id, 'page_size': 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertTrue(all(task['project'] == self.project.id for task in response.data))
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class QueryCountTest(TestCase):
+    """Число SQL-запросов не зависит от количества строк в ответе."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+
+    def _create_tasks(self, count):
+        for i in range(count):
+            task = Task.objects.create(
+                project=self.project, title=f'Task {i}', creator_id=1,
+            )
+            Comment.objects.create(task=task, author_id=1, text='Комментарий')
+
+    def test_task_list_query_count(self):
+        """Список задач выполняется одним запросом."""
+        self._create_tasks(2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/tasks/')
+        self._create_tasks(10)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/tasks/')
+        self.assertEqual(len(response.data), 12)
+        self.assertTrue(all(item['comments_count'] == 1 for item in response.data))
+
+    def test_task_retrieve_query_count(self):
+        """Детали задачи: задача и её комментарии."""
+        self._create_tasks(1)
+        task = Task.objects.get()
+        Comment.objects.create(task=task, author_id=2, text='Ещё один')
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/tasks/tasks/{task.id}/')
+        self.assertEqual(response.data['comments_count'], 2)
+        self.assertEqual(len(response.data['comments']), 2)
+
+    def test_project_list_query_count(self):
+        """Список проектов выполняется одним запросом."""
+        self._create_tasks(3)
+        Project.objects.create(name='Пустой проект', owner_id=1)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/projects/')
+        counts = {item['name']: item['tasks_count'] for item in response.data}
+        self.assertEqual(counts, {'Проект': 3, 'Пустой проект': 0})
+
+    def test_project_detail_query_count(self):
+        """Детали проекта: проект и задачи с числом комментариев."""
+        self._create_tasks(2)
+        with self.assertNumQueries(2):
+            self.client.get(f'/api/tasks/projects/{self.project.id}/')
+        self._create_tasks(10)
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/tasks/projects/{self.project.id}/')
+        self.assertEqual(response.data['tasks_count'], 12)
+        self.assertEqual(len(response.data['tasks']), 12)
+        self.assertEqual(response.data['tasks'][0]['comments_count'], 1)
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class CursorPaginationTest(TestCase):
+    """Тесты курсорной пагинации."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+
+    def test_unpaginated_by_default(self):
+        """Без параметров пагинации ответ остаётся списком."""
+        Task.objects.create(project=self.project, title='Task', creator_id=1)
+        response = self.client.get('/api/tasks/tasks/')
+        self.assertIsInstance(response.data, list)
+
+    def test_walk_task_pages(self):
+        """Обход всех страниц возвращает каждую задачу ровно один раз."""
+        tasks = [
+            Task.objects.create(project=self.project, title=f'Task {i}', creator_id=1)
+            for i in range(5)
+        ]
+        seen = []
+        url = '/api/tasks/tasks/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [task.id for task in reversed(tasks)])
+
+    def test_comments_paginated_in_chronological_order(self):
+        """Комментарии листаются от старых к новым."""
+        task = Task.objects.create(project=self.project, title='Task', creator_id=1)
+        comments = [
+            Comment.objects.create(task=task, author_id=1, text=f'Комментарий {i}')
+            for i in range(3)
+        ]
+        response = self.client.get(f'/api/tasks/tasks/{task.id}/comments/?paginate=1&page_size=2')
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [comments[0].id, comments[1].id],
+        )
+        self.assertIsNotNone(response.data['next'])
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class OutboxTest(TestCase):
+    """Тесты transactional outbox."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+
+    def test_task_events_written_to_outbox(self):
+        """Создание и смена статуса задачи записывают события в outbox."""
+        response = self.client.post('/api/tasks/tasks/', {
+            'project': self.project.id, 'title': 'Задача',
+        }, format='json')
+        task_id = response.data['id']
+        self.client.patch(f'/api/tasks/tasks/{task_id}/', {'status': 'done'}, format='json')
+
+        events = list(OutboxEvent.objects.all())
+        self.assertEqual([e.event_type for e in events], ['task_created', 'task_status_changed'])
+        self.assertEqual(events[0].actor_id, 1)
+        self.assertEqual(events[1].payload['new_status'], 'done')
+        self.assertIsNone(events[0].dispatched_at)
+
+    def test_dispatch_success(self):
+        """Успешно доставленные события помечаются отправленными."""
+        OutboxEvent.objects.create(event_type='task_created', payload={'task_id': 1}, actor_id=1)
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=201)
+        self.assertEqual(OutboxDispatcher(session=session).dispatch_batch(), 1)
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNotNone(event.dispatched_at)
+        self.assertEqual(session.post.call_args.kwargs['json'], {
+            'event_type': 'task_created', 'task_id': 1,
+        })
+
+    def test_dispatch_failure_is_retried_later(self):
+        """Недоставленное событие откладывается с backoff."""
+        OutboxEvent.objects.create(event_type='task_created', payload={}, actor_id=1)
+        session = MagicMock()
+        session.post.side_effect = requests.ConnectionError('connection refused')
+        dispatcher = OutboxDispatcher(session=session)
+        dispatcher.dispatch_batch()
+
+        event = OutboxEvent.objects.get()
+        self.assertIsNone(event.dispatched_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertEqual(dispatcher.dispatch_batch(), 0)
+
+    def test_delivery_outside_transaction(self):
+        """HTTP-запрос идёт вне транзакции захвата, пачка арендована."""
+        OutboxEvent.objects.create(event_type='task_created', payload={}, actor_id=1)
+        atomic_blocks = len(connection.atomic_blocks)
+        seen = []
+
+        def post(*args, **kwargs):
+            seen.append(len(connection.atomic_blocks))
+            # Второй диспетчер не получает арендованное событие.
+            seen.append(OutboxDispatcher(session=MagicMock()).dispatch_batch())
+            return MagicMock(status_code=201)
+
+        session = MagicMock()
+        session.post.side_effect = post
+        self.assertEqual(OutboxDispatcher(session=session).dispatch_batch(), 1)
+        self.assertEqual(seen, [atomic_blocks, 0])
+        self.assertIsNotNone(OutboxEvent.objects.get().dispatched_at)
+
+    def test_metrics(self):
+        """Метрики показывают размер очереди и отставание."""
+        OutboxEvent.objects.create(event_type='task_created', payload={}, actor_id=1)
+        response = self.client.get('/api/tasks/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['outbox']['pending'], 1)
+        self.assertGreaterEqual(response.data['outbox']['lag_seconds'], 0)
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class ConditionalUpdateTest(TestCase):
+    """Тесты частичного и условного обновления задачи."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.task = Task.objects.create(
+            project=self.project, title='Task', description='Описание', creator_id=1,
+        )
+        self.url = f'/api/tasks/tasks/{self.task.id}/'
+
+    def test_patch_loads_once_and_writes_changed_columns(self):
+        """PATCH читает строку один раз и обновляет только изменённые столбцы."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {'title': 'Новый заголовок'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        selects = [q['sql'] for q in queries if q['sql'].startswith('SELECT')]
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"description"', updates[0])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'Новый заголовок')
+
+    def test_if_match(self):
+        """Устаревший ETag в If-Match отклоняется с 412."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(self.url, {'title': 'A'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.patch(self.url, {'title': 'B'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.title, 'A')
+
+    def test_updated_at_precondition(self):
+        """Устаревший updated_at в теле запроса отклоняется с 412."""
+        stale = self.client.get(self.url).data['updated_at']
+        self.client.patch(self.url, {'status': 'review'}, format='json')
+        response = self.client.patch(
+            self.url, {'status': 'done', 'updated_at': stale}, format='json',
+        )
+        self.assertEqual(response.status_code, 412)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'review')
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class BulkTaskAPITest(TestCase):
+    """Тесты пакетных операций над задачами."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.url = '/api/tasks/tasks/bulk/'
+
+    def test_bulk_create(self):
+        """Пакет задач создаётся с постоянным числом запросов и одним событием."""
+        items = [{'project': self.project.id, 'title': f'Task {i}'} for i in range(20)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(Task.objects.count(), 20)
+        self.assertLess(len(queries), 10)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.event_type, 'tasks_bulk_created')
+        self.assertEqual(len(event.payload['task_ids']), 20)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Ошибки возвращаются по элементам, ничего не записывается."""
+        items = [
+            {'project': self.project.id, 'title': 'OK'},
+            {'project': 999, 'title': 'Нет проекта'},
+            {'project': self.project.id},
+        ]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('project', errors[1])
+        self.assertIn('title', errors[2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update(self):
+        """Пакетное обновление статусов порождает одно сводное событие."""
+        tasks = [
+            Task.objects.create(project=self.project, title=f'Task {i}', creator_id=1)
+            for i in range(3)
+        ]
+        items = [
+            {'id': tasks[0].id, 'status': 'done'},
+            {'id': tasks[1].id, 'status': 'review'},
+            {'id': tasks[2].id, 'title': 'Переименована'},
+        ]
+        response = self.client.patch(self.url, items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Task.objects.order_by('id').values_list('status', 'title')),
+            [('done', 'Task 0'), ('review', 'Task 1'), ('todo', 'Переименована')],
+        )
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.event_type, 'tasks_bulk_status_changed')
+        self.assertEqual(len(event.payload['changes']), 2)
+
+    def test_bulk_update_unknown_task(self):
+        """Неизвестный id отклоняет весь пакет."""
+        task = Task.objects.create(project=self.project, title='Task', creator_id=1)
+        items = [{'id': task.id, 'status': 'done'}, {'id': 999, 'status': 'done'}]
+        response = self.client.patch(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0], {})
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'todo')
+
+    def test_bulk_delete(self):
+        """Пакетное удаление сообщает об удалённых и ненайденных задачах."""
+        task = Task.objects.create(project=self.project, title='Task', creator_id=1)
+        Comment.objects.create(task=task, author_id=1, text='Комментарий')
+        response = self.client.delete(self.url, {'ids': [task.id, 999]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'deleted': [task.id], 'not_found': [999]})
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class ConditionalGetTest(TestCase):
+    """Тесты условных GET-запросов к задаче и проекту."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.task = Task.objects.create(project=self.project, title='Task', creator_id=1)
+
+    def test_task_not_modified(self):
+        """Задача без изменений отдаёт 304 одним запросом без сериализации."""
+        url = f'/api/tasks/tasks/{self.task.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        comment = Comment.objects.create(task=self.task, author_id=1, text='Новый')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        comment.text = 'Исправленный'
+        comment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # Удаление комментария не сдвигает отметки времени: валидатор — только ETag.
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        comment.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_project_not_modified(self):
+        """Детали проекта без изменений отдают 304 без загрузки задач."""
+        url = f'/api/tasks/projects/{self.project.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.task.status = Task.Status.DONE
+        self.task.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tasks'][0]['status'], 'done')
+        etag = response['ETag']
+
+        Comment.objects.create(task=self.task, author_id=1, text='Комментарий')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class ExportTest(TestCase):
+    """Тесты потоковой выгрузки задач и комментариев."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.url = '/api/tasks/tasks/export/'
+
+    @staticmethod
+    def content(response):
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_ndjson(self):
+        """Выгрузка задач проекта в NDJSON совпадает с представлением API."""
+        other = Project.objects.create(name='Другой', owner_id=1)
+        tasks = [
+            Task.objects.create(project=self.project, title=f'Задача {i}', creator_id=1)
+            for i in range(3)
+        ]
+        Task.objects.create(project=other, title='Чужая', creator_id=1)
+
+        response = self.client.get(self.url, {'project': self.project.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [task.id for task in tasks])
+
+        detail = self.client.get(f'/api/tasks/tasks/{tasks[0].id}/').data
+        self.assertEqual(rows[0]['title'], detail['title'])
+        self.assertEqual(rows[0]['created_at'], detail['created_at'])
+        self.assertEqual(rows[0]['project_id'], detail['project'])
+
+    def test_export_comments_csv(self):
+        """Выгрузка комментариев в CSV с заголовком."""
+        task = Task.objects.create(project=self.project, title='Задача', creator_id=1)
+        Comment.objects.create(task=task, author_id=2, text='Текст, с запятой')
+
+        response = self.client.get(
+            self.url, {'output': 'csv', 'entity': 'comments'}, HTTP_ACCEPT='text/csv',
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(self.content(response))))
+        self.assertEqual(rows[0], ['id', 'task_id', 'author_id', 'text', 'created_at', 'updated_at'])
+        self.assertEqual(rows[1][1:4], [str(task.id), '2', 'Текст, с запятой'])
+
+    def test_export_updated_since(self):
+        """Инкрементальная выгрузка отдаёт только изменённые задачи."""
+        old = Task.objects.create(project=self.project, title='Старая', creator_id=1)
+        Task.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        new = Task.objects.create(project=self.project, title='Новая', creator_id=1)
+
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(self.url, {'updated_since': since})
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [new.id])
+        self.assertIn('X-Export-Started-At', response)
+
+    def test_export_invalid_params(self):
+        """Неизвестный формат и некорректная дата отклоняются с 400."""
+        self.assertEqual(self.client.get(self.url, {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'entity': 'projects'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'updated_since': 'вчера'}).status_code, 400)
+
+    @override_settings(TASKS_EXPORT_CHUNK_SIZE=2)
+    async def test_export_streams_under_asgi(self):
+        """Под ASGI выгрузка отдаётся пачками без сборки ответа в памяти."""
+        tasks = [
+            await Task.objects.acreate(project=self.project, title=f'Задача {i}', creator_id=1)
+            for i in range(5)
+        ]
+        response = await self.async_client.get(
+            self.url, headers={'Authorization': f'Bearer {self.token}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        # ASGIHandler читает ответ через __aiter__: синхронный итератор
+        # там собирается в список с предупреждением.
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            chunks = [chunk async for chunk in response]
+        self.assertEqual(caught, [])
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [task.id for task in tasks])
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class SparseFieldsetTest(TestCase):
+    """Тесты ?fields= и ?omit=."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.task = Task.objects.create(
+            project=self.project, title='Задача', description='Длинное описание', creator_id=1,
+        )
+        Comment.objects.create(task=self.task, author_id=1, text='Комментарий')
+
+    def test_task_fields(self):
+        """Неотобранные столбцы не читаются, comments_count не считается."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/tasks/', {'fields': 'id,title,status'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{'id': self.task.id, 'title': 'Задача', 'status': 'todo'}])
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('COUNT', sql)
+
+    def test_task_omit(self):
+        """?omit= исключает поля, остальные выводятся как обычно."""
+        response = self.client.get(
+            f'/api/tasks/tasks/{self.task.id}/', {'omit': 'description,comments'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('description', response.data)
+        self.assertNotIn('comments', response.data)
+        self.assertEqual(response.data['comments_count'], 1)
+        self.assertEqual(response.data['title'], 'Задача')
+
+    def test_task_fields_with_pagination(self):
+        """Курсорная пагинация работает с урезанным набором полей."""
+        Task.objects.create(project=self.project, title='Вторая', creator_id=1)
+        response = self.client.get('/api/tasks/tasks/', {'fields': 'id', 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results'][0]), ['id'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'id': self.task.id}])
+
+    def test_project_fields(self):
+        """Список проектов без tasks_count обходится без агрегата."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/projects/', {'fields': 'id,name'})
+        self.assertEqual(response.data, [{'id': self.project.id, 'name': 'Проект'}])
+        self.assertNotIn('COUNT', queries[0]['sql'])
+
+        response = self.client.get(
+            f'/api/tasks/projects/{self.project.id}/', {'fields': 'id,tasks_count'},
+        )
+        self.assertEqual(response.data, {'id': self.project.id, 'tasks_count': 1})
+
+    def test_comment_fields(self):
+        """Комментарии задачи с ?fields=."""
+        response = self.client.get(
+            f'/api/tasks/tasks/{self.task.id}/comments/', {'fields': 'text'},
+        )
+        self.assertEqual(response.data, [{'text': 'Комментарий'}])
+
+    def test_fields_ignored_on_write(self):
+        """В запросах на запись ?fields= не отключает валидацию полей."""
+        response = self.client.post(
+            '/api/tasks/tasks/?fields=id', {'project': self.project.id}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('title', response.data)
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class FastListPathTest(TestCase):
+    """Быстрый путь списка задач побайтно совпадает с TaskSerializer."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        now = timezone.now()
+        for i in range(5):
+            task = Task.objects.create(
+                project=self.project, title=f'Задача "{i}"', description='Описание\nс переносом',
+                creator_id=1, assignee_id=i or None, priority='high',
+                deadline=now + timedelta(days=i) if i % 2 else None,
+            )
+            Task.objects.filter(pk=task.pk).update(created_at=now - timedelta(minutes=i))
+            for j in range(i):
+                Comment.objects.create(task=task, author_id=1, text=f'Комментарий {j}')
+
+    def assertSameAsSerializer(self, params):
+        response = self.client.get('/api/tasks/tasks/', params)
+        self.assertEqual(response.status_code, 200)
+        with override_settings(TASKS_LIST_FAST_PATH=False):
+            expected = self.client.get('/api/tasks/tasks/', params)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        self.assertEqual(response.get('Vary'), expected.get('Vary'))
+        return response
+
+    def test_plain_list(self):
+        self.assertSameAsSerializer({})
+        self.assertSameAsSerializer({'project': self.project.id, 'status': 'todo'})
+
+    def test_sparse_fields(self):
+        self.assertSameAsSerializer({'fields': 'id,title,deadline'})
+        self.assertSameAsSerializer({'omit': 'description,comments_count'})
+
+    def test_paginated(self):
+        response = self.assertSameAsSerializer({'page_size': 2})
+        self.assertSameAsSerializer({'page_size': 2, 'fields': 'id'})
+        next_url = response.data['next']
+        response = self.client.get(next_url)
+        with override_settings(TASKS_LIST_FAST_PATH=False):
+            expected = self.client.get(next_url)
+        self.assertEqual(response.content, expected.content)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/tasks/tasks/')
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+    SYNC_SAFETY_WINDOW=0,
+)
+class SyncTest(TestCase):
+    """Тесты дельта-синхронизации."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.task = Task.objects.create(project=self.project, title='Задача', creator_id=1)
+        self.url = '/api/tasks/sync/'
+
+    def test_initial_and_delta(self):
+        """Полная выгрузка, затем только изменения и удаления."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in response.data['projects']], [self.project.id])
+        self.assertEqual([t['id'] for t in response.data['tasks']], [self.task.id])
+        self.assertFalse(response.data['has_more'])
+        watermark = response.data['watermark']
+
+        response = self.client.get(self.url, {'since': watermark})
+        self.assertEqual(response.data['tasks'], [])
+        self.assertEqual(response.data['deleted'], {'projects': [], 'tasks': [], 'comments': []})
+        watermark = response.data['watermark']
+
+        other = Task.objects.create(project=self.project, title='Новая', creator_id=1)
+        comment = Comment.objects.create(task=other, author_id=1, text='Комментарий')
+        self.client.delete(f'/api/tasks/tasks/{self.task.id}/')
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {'since': watermark})
+        self.assertEqual([t['id'] for t in response.data['tasks']], [other.id])
+        self.assertEqual(response.data['tasks'][0]['comments_count'], 1)
+        self.assertEqual([c['id'] for c in response.data['comments']], [comment.id])
+        self.assertEqual(response.data['deleted']['tasks'], [self.task.id])
+
+    def test_paging_with_limit(self):
+        """При ограничении ?limit= изменения догружаются по has_more."""
+        for i in range(4):
+            Task.objects.create(project=self.project, title=f'Задача {i}', creator_id=1)
+        seen = []
+        watermark = None
+        while True:
+            params = {'limit': 2, **({'since': watermark} if watermark else {})}
+            data = self.client.get(self.url, params).data
+            seen += [task['id'] for task in data['tasks']]
+            watermark = data['watermark']
+            if not data['has_more']:
+                break
+        self.assertEqual(sorted(seen), sorted(Task.objects.values_list('id', flat=True)))
+
+    def test_bulk_delete_tombstones(self):
+        """Пакетное удаление оставляет отметки для каждой задачи."""
+        watermark = self.client.get(self.url).data['watermark']
+        self.client.delete('/api/tasks/tasks/bulk/', {'ids': [self.task.id]}, format='json')
+        self.client.delete(f'/api/tasks/projects/{self.project.id}/')
+        data = self.client.get(self.url, {'since': watermark}).data
+        self.assertEqual(data['deleted']['tasks'], [self.task.id])
+        self.assertEqual(data['deleted']['projects'], [self.project.id])
+
+    def test_invalid_and_expired_watermark(self):
+        """Повреждённый watermark — 400, устаревший — 410."""
+        self.assertEqual(self.client.get(self.url, {'since': 'мусор'}).status_code, 400)
+        watermark = self.client.get(self.url).data['watermark']
+        with override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=-1):
+            self.assertEqual(self.client.get(self.url, {'since': watermark}).status_code, 410)
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class BoardTest(TestCase):
+    """Тесты канбан-доски проекта."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.url = f'/api/tasks/projects/{self.project.id}/board/'
+        now = timezone.now()
+        self.todo = []
+        for i in range(5):
+            task = Task.objects.create(project=self.project, title=f'todo {i}', creator_id=1)
+            Task.objects.filter(pk=task.pk).update(created_at=now - timedelta(minutes=i))
+            self.todo.append(task.id)
+        self.done = Task.objects.create(
+            project=self.project, title='done', creator_id=1, status='done',
+        )
+        Comment.objects.create(task=self.done, author_id=1, text='Комментарий')
+        other = Project.objects.create(name='Другой', owner_id=1)
+        Task.objects.create(project=other, title='Чужая', creator_id=1)
+
+    def test_board(self):
+        """Все колонки с размерами и первыми задачами — двумя запросами."""
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        columns = {column['status']: column for column in response.data['columns']}
+        self.assertEqual(list(columns), Task.Status.values)
+        self.assertEqual(columns['todo']['count'], 5)
+        self.assertEqual([t['id'] for t in columns['todo']['tasks']], self.todo[:2])
+        self.assertIsNotNone(columns['todo']['next_cursor'])
+        self.assertEqual(columns['done']['count'], 1)
+        self.assertEqual(columns['done']['tasks'][0]['comments_count'], 1)
+        self.assertIsNone(columns['done']['next_cursor'])
+        self.assertEqual(columns['review'], {
+            'status': 'review', 'title': 'На проверке', 'count': 0,
+            'tasks': [], 'next_cursor': None,
+        })
+
+    def test_load_more(self):
+        """Колонка догружается по курсору до конца."""
+        column = self.client.get(self.url, {'limit': 2}).data['columns'][0]
+        seen = [t['id'] for t in column['tasks']]
+        while column['next_cursor']:
+            response = self.client.get(
+                self.url, {'limit': 2, 'status': 'todo', 'cursor': column['next_cursor']},
+            )
+            self.assertEqual(len(response.data['columns']), 1)
+            column = response.data['columns'][0]
+            seen += [t['id'] for t in column['tasks']]
+        self.assertEqual(seen, self.todo)
+
+    def test_board_invalid_params(self):
+        self.assertEqual(self.client.get(self.url, {'status': 'unknown'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'abc'}).status_code, 400)
+        self.assertEqual(
+            self.client.get(self.url, {'status': 'todo', 'cursor': 'мусор'}).status_code, 400,
+        )
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class RankingTest(TestCase):
+    """Тесты дробных ключей порядка."""
+
+    def test_key_between(self):
+        """Ключи всегда строго между соседями и без завершающего нуля."""
+        rng = random.Random(1)
+        keys = [key_between(None, None)]
+        for _ in range(500):
+            position = rng.randint(0, len(keys))
+            before = keys[position - 1] if position > 0 else None
+            after = keys[position] if position < len(keys) else None
+            key = key_between(before, after)
+            self.assertTrue(is_valid_key(key), key)
+            self.assertTrue((before is None or before < key) and (after is None or key < after))
+            keys.insert(position, key)
+        self.assertEqual(keys, sorted(keys))
+
+    def test_edges_do_not_grow(self):
+        """Вставки в начало и конец колонки не удлиняют ключ."""
+        first = last = key_between(None, None)
+        for _ in range(1000):
+            first = key_between(None, first)
+            last = key_between(last, None)
+        self.assertLessEqual(len(first), 6)
+        self.assertLessEqual(len(last), 6)
+
+
+@override_settings(
+    DATABASES=TEST_DATABASES,
+    NOTIFICATION_SERVICE_URL='http://localhost:9999',
+)
+class TaskMoveTest(TestCase):
+    """Тесты перемещения задач на доске."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.tasks = [
+            self.client.post('/api/tasks/tasks/', {
+                'project': self.project.id, 'title': f'Задача {i}',
+            }, format='json').data['id']
+            for i in range(3)
+        ]
+
+    def board_ids(self, status_value='todo'):
+        response = self.client.get(f'/api/tasks/projects/{self.project.id}/board/')
+        column = next(c for c in response.data['columns'] if c['status'] == status_value)
+        return [task['id'] for task in column['tasks']]
+
+    def move(self, task_id, **data):
+        return self.client.post(f'/api/tasks/tasks/{task_id}/move/', data, format='json')
+
+    def test_new_tasks_on_top(self):
+        self.assertEqual(self.board_ids(), self.tasks[::-1])
+
+    def test_move_writes_one_row(self):
+        """Перемещение внутри колонки — один UPDATE."""
+        newest, middle, oldest = self.tasks[::-1]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(newest, prev_id=middle, next_id=oldest)
+        self.assertEqual(response.status_code, 200)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.board_ids(), [middle, newest, oldest])
+
+        self.move(oldest)
+        self.assertEqual(self.board_ids(), [oldest, middle, newest])
+
+    def test_move_to_other_column(self):
+        """Перенос в другую колонку меняет статус и пишет событие."""
+        task_id = self.tasks[0]
+        response = self.move(task_id, status='in_progress')
+        self.assertEqual(response.data['status'], 'in_progress')
+        self.assertEqual(self.board_ids('in_progress'), [task_id])
+        self.assertTrue(OutboxEvent.objects.filter(event_type='task_status_changed').exists())
+
+    def test_move_with_unranked_neighbors(self):
+        """Соседи без ключа: колонка уходит в фоновую перебалансировку, затем перемещение проходит."""
+        Task.objects.update(rank='')
+        newest, middle, oldest = self.tasks[::-1]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(oldest, prev_id=newest, next_id=middle)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('Retry-After', response)
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in queries))
+        self.assertTrue(RankRebalance.objects.filter(project=self.project, status='todo').exists())
+
+        call_command('rebalance_ranks', once=True, stdout=io.StringIO())
+        response = self.move(oldest, prev_id=newest, next_id=middle)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.board_ids(), [newest, oldest, middle])
+
+    def test_move_edge_neighbors(self):
+        """Сосед у края колонки должен быть крайним."""
+        newest, middle, oldest = self.tasks[::-1]
+        response = self.move(newest, prev_id=middle)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('next_id', response.data)
+        response = self.move(oldest, next_id=middle)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('prev_id', response.data)
+        self.assertEqual(self.move(newest, prev_id=oldest).status_code, 200)
+        self.assertEqual(self.move(newest, next_id=middle).status_code, 200)
+        self.assertEqual(self.board_ids(), [newest, middle, oldest])
+
+    def test_move_invalid(self):
+        other = Project.objects.create(name='Другой', owner_id=1)
+        foreign = Task.objects.create(project=other, title='Чужая', creator_id=1)
+        self.assertEqual(self.move(self.tasks[0], prev_id=foreign.id).status_code, 400)
+        self.assertEqual(self.move(self.tasks[0], status='unknown').status_code, 400)
+        self.assertEqual(self.move(self.tasks[0], next_id=self.tasks[0]).status_code, 400)
+
+    def test_move_invalid_neighbors(self):
+        """Соседи в обратном порядке или не рядом — 400, порядок не меняется."""
+        newest, middle, oldest = self.tasks[::-1]
+        extra = self.client.post('/api/tasks/tasks/', {
+            'project': self.project.id, 'title': 'Задача 3',
+        }, format='json').data['id']
+        order = self.board_ids()
+        self.assertEqual(order, [extra, newest, middle, oldest])
+
+        response = self.move(extra, prev_id=oldest, next_id=newest)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('next_id', response.data)
+        response = self.move(extra, prev_id=newest, next_id=oldest)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('next_id', response.data)
+
+        # После перебалансировки проверка та же.
+        Task.objects.update(rank='')
+        call_command('rebalance_ranks', once=True, stdout=io.StringIO())
+        order = self.board_ids()
+        response = self.move(order[0], prev_id=order[3], next_id=order[1])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.board_ids(), order)
+
+    def test_rebalance_long_keys(self):
+        """Длинные ключи ставят колонку в очередь; команда выравнивает ключи."""
+        newest, middle, oldest = self.tasks[::-1]
+        with override_settings(TASKS_RANK_MAX_LENGTH=3):
+            for _ in range(10):
+                self.move(oldest, prev_id=newest, next_id=middle)
+                self.move(middle, prev_id=newest, next_id=oldest)
+        self.assertTrue(RankRebalance.objects.exists())
+        order = self.board_ids()
+        call_command('rebalance_ranks', once=True, stdout=io.StringIO())
+        self.assertFalse(RankRebalance.objects.exists())
+        self.assertEqual(self.board_ids(), order)
+        self.assertTrue(all(len(rank) <= 6 for rank in Task.objects.values_list('rank', flat=True)))
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class CounterTest(TestCase):
+    """Тесты счётчиков, поддерживаемых триггерами."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.task = Task.objects.create(project=self.project, title='Задача', creator_id=1)
+
+    def test_comment_counter(self):
+        first = Comment.objects.create(task=self.task, author_id=1, text='Первый')
+        Comment.objects.bulk_create(
+            Comment(task=self.task, author_id=1, text=f'Комментарий {i}') for i in range(3)
+        )
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comments_count, 4)
+
+        other = Task.objects.create(project=self.project, title='Другая', creator_id=1)
+        Comment.objects.filter(pk=first.pk).update(task=other)
+        Comment.objects.filter(task=self.task)[:1].get().delete()
+        self.task.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.task.comments_count, other.comments_count), (2, 1))
+
+    def test_project_counters(self):
+        Task.objects.create(project=self.project, title='Готова', creator_id=1, status='done')
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.tasks_by_status['todo'], 1)
+        self.assertEqual(self.project.tasks_by_status['done'], 1)
+        self.assertEqual(self.project.tasks_count, 2)
+
+        self.task.status = Task.Status.REVIEW
+        self.task.save()
+        Task.objects.filter(status='done').delete()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.tasks_by_status, {
+            'todo': 0, 'in_progress': 0, 'review': 1, 'done': 0, 'cancelled': 0,
+        })
+
+    def test_save_keeps_counters(self):
+        """Сохранение устаревшего экземпляра не затирает счётчики."""
+        project = Project.objects.get(pk=self.project.pk)
+        task = Task.objects.get(pk=self.task.pk)
+        Task.objects.create(project=self.project, title='Ещё', creator_id=1)
+        Comment.objects.create(task=self.task, author_id=1, text='Текст')
+        project.name = 'Новое имя'
+        project.save()
+        task.title = 'Новый заголовок'
+        task.save()
+        self.project.refresh_from_db()
+        self.task.refresh_from_db()
+        self.assertEqual(self.project.tasks_count, 2)
+        self.assertEqual(self.task.comments_count, 1)
+
+    def test_serializers_read_stored_counts(self):
+        Comment.objects.create(task=self.task, author_id=1, text='Текст')
+        with CaptureQueriesContext(connection) as queries:
+            projects = self.client.get('/api/tasks/projects/')
+            tasks = self.client.get('/api/tasks/tasks/')
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries))
+        self.assertEqual(projects.data[0]['tasks_count'], 1)
+        self.assertEqual(projects.data[0]['tasks_by_status']['todo'], 1)
+        self.assertEqual(tasks.data[0]['comments_count'], 1)
+
+        response = self.client.get('/api/tasks/projects/?fields=id,tasks_count')
+        self.assertEqual(response.data[0], {'id': self.project.id, 'tasks_count': 1})
+
+    def test_verify_counters(self):
+        Comment.objects.create(task=self.task, author_id=1, text='Текст')
+        Task.objects.filter(pk=self.task.pk).update(comments_count=5)
+        Project.objects.filter(pk=self.project.pk).update(tasks_todo_count=0, tasks_done_count=3)
+        with self.assertRaises(CommandError):
+            call_command('verify_counters', stdout=io.StringIO())
+
+        call_command('verify_counters', repair=True, stdout=io.StringIO())
+        self.task.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(self.task.comments_count, 1)
+        self.assertEqual(self.project.tasks_by_status['todo'], 1)
+        self.assertEqual(self.project.tasks_by_status['done'], 0)
+        call_command('verify_counters', stdout=io.StringIO())
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class ProjectDeletionTest(TestCase):
+    """Тесты отложенного удаления проектов."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Большой проект', owner_id=1)
+        self.other = Project.objects.create(name='Другой проект', owner_id=1)
+        tasks = Task.objects.bulk_create(
+            Task(project=self.project, title=f'Задача {i}', creator_id=1) for i in range(5)
+        )
+        Comment.objects.bulk_create(
+            Comment(task=task, author_id=1, text=f'Комментарий {i}')
+            for task in tasks for i in range(3)
+        )
+        self.kept = Task.objects.create(project=self.other, title='Остаётся', creator_id=1)
+        Comment.objects.create(task=self.kept, author_id=1, text='Остаётся')
+
+    def test_delete_marks_project(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'/api/tasks/projects/{self.project.id}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['tasks_remaining'], 5)
+        self.assertTrue(response['Location'].endswith(f'/projects/{self.project.id}/deletion/'))
+        self.assertFalse(any(q['sql'].startswith('DELETE') for q in queries))
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 5)
+
+        projects = self.client.get('/api/tasks/projects/').data
+        self.assertEqual([p['id'] for p in projects], [self.other.id])
+        tasks = self.client.get('/api/tasks/tasks/').data
+        self.assertEqual([t['id'] for t in tasks], [self.kept.id])
+        self.assertEqual(len(self.client.get('/api/tasks/comments/').data), 1)
+        self.assertEqual(self.client.get(f'/api/tasks/projects/{self.project.id}/').status_code, 404)
+        self.assertEqual(
+            self.client.get(f'/api/tasks/projects/{self.project.id}/board/').status_code, 404,
+        )
+        response = self.client.post('/api/tasks/tasks/', {
+            'project': self.project.id, 'title': 'Поздно',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        with override_settings(SYNC_SAFETY_WINDOW=0):
+            sync = self.client.get('/api/tasks/sync/').data
+        self.assertEqual([p['id'] for p in sync['projects']], [self.other.id])
+        self.assertEqual([t['id'] for t in sync['tasks']], [self.kept.id])
+
+    def test_purge_in_batches(self):
+        self.client.delete(f'/api/tasks/projects/{self.project.id}/')
+        with override_settings(TASKS_PURGE_BATCH_SIZE=4):
+            call_command('purge_projects', once=True, stdout=io.StringIO())
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(Task.objects.filter(project_id=self.project.pk).exists())
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(
+            self.client.get(f'/api/tasks/projects/{self.project.id}/deletion/').status_code, 404,
+        )
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.tasks_count, 1)
+
+    def test_deletion_progress(self):
+        from .purge import purge_batch
+
+        self.client.delete(f'/api/tasks/projects/{self.project.id}/')
+        self.assertEqual(purge_batch(self.project.id, 10), (10, 0, False))
+        self.assertEqual(purge_batch(self.project.id, 10), (5, 0, False))
+        self.assertEqual(purge_batch(self.project.id, 3), (0, 3, False))
+        response = self.client.get(f'/api/tasks/projects/{self.project.id}/deletion/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tasks_remaining'], 2)
+        self.assertEqual(
+            self.client.get(f'/api/tasks/projects/{self.other.id}/deletion/').status_code, 404,
+        )
+
+    def test_purge_deep_tree(self):
+        """Пачка не удаляет поддеревья каскадом сверх batch_size."""
+        from .purge import purge_batch
+
+        Comment.objects.filter(task__project=self.project).delete()
+        parent = None
+        for depth in range(12):
+            parent = Task.objects.create(
+                project=self.project, title=f'Уровень {depth}', creator_id=1, parent=parent,
+                path=f'{parent.path}{parent.pk}/' if parent else '',
+            )
+            # Корни — самые новые и идут первыми в порядке Meta.ordering.
+            Task.objects.filter(pk=parent.pk).update(
+                created_at=timezone.now() + timedelta(minutes=100 - depth),
+            )
+        self.client.delete(f'/api/tasks/projects/{self.project.id}/')
+        batches = []
+        finished = False
+        while not finished:
+            _, deleted, finished = purge_batch(self.project.id, 3)
+            batches.append(deleted)
+        self.assertLessEqual(max(batches), 3)
+        self.assertEqual(sum(batches), 17)
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class TaskHierarchyTest(TestCase):
+    """Тесты иерархии задач на материализованном пути."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.token = make_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        self.epic = self.create('Эпик')
+        self.story = self.create('История', parent=self.epic)
+        self.subtask = self.create('Подзадача', parent=self.story)
+        self.other_epic = self.create('Другой эпик')
+
+    def create(self, title, parent=None, **data):
+        response = self.client.post('/api/tasks/tasks/', {
+            'project': self.project.id, 'title': title, 'parent': parent, **data,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def subtree_ids(self, root):
+        response = self.client.get(f'/api/tasks/tasks/{root}/subtree/')
+        return [task['id'] for task in response.data['tasks']]
+
+    def test_create_with_parent(self):
+        subtask = Task.objects.get(pk=self.subtask)
+        self.assertEqual(subtask.parent_id, self.story)
+        self.assertEqual(subtask.path, f'{self.epic}/{self.story}/')
+
+        other = Project.objects.create(name='Другой', owner_id=1)
+        response = self.client.post('/api/tasks/tasks/', {
+            'project': other.id, 'title': 'Чужой родитель', 'parent': self.epic,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('parent', response.data)
+
+        response = self.client.post('/api/tasks/tasks/bulk/', [
+            {'project': self.project.id, 'title': f'Пакет {i}', 'parent': self.story}
+            for i in range(2)
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.subtree_ids(self.story)), 4)
+
+    def test_create_during_reparent(self):
+        """Путь новой подзадачи вычисляется при вставке, а не при валидации.
+
+        Перенос ветки между валидацией и вставкой (в PostgreSQL его
+        упорядочивает блокировка родителя) не оставляет задачу со старым
+        префиксом пути.
+        """
+        def validate_then_reparent(parent, project):
+            validate_parent(parent, project)
+            reparent(self.story, self.other_epic)
+
+        with patch('tasks.serializers.validate_parent', side_effect=validate_then_reparent):
+            task_id = self.create('Под подзадачей', parent=self.subtask)
+        self.assertEqual(
+            Task.objects.get(pk=task_id).path, f'{self.other_epic}/{self.story}/{self.subtask}/',
+        )
+        self.assertIn(task_id, self.subtree_ids(self.other_epic))
+
+    def test_subtree_constant_queries(self):
+        with CaptureQueriesContext(connection) as shallow:
+            self.assertEqual(self.subtree_ids(self.epic), [self.epic, self.story, self.subtask])
+        parent = self.subtask
+        for depth in range(5):
+            parent = self.create(f'Уровень {depth}', parent=parent)
+        with CaptureQueriesContext(connection) as deep:
+            self.assertEqual(len(self.subtree_ids(self.epic)), 8)
+        self.assertEqual(len(deep), len(shallow))
+
+    def test_progress(self):
+        self.create('Готово', parent=self.story, status='done')
+        self.create('Отменена', parent=self.story, status='cancelled')
+        response = self.client.get(f'/api/tasks/tasks/{self.epic}/progress/')
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual(response.data['by_status']['done'], 1)
+        self.assertEqual(response.data['progress'], 0.25)
+
+    def test_reparent(self):
+        url = f'/api/tasks/tasks/{self.story}/reparent/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'parent': self.other_epic}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['parent'], self.other_epic)
+        moved_queries = len(queries)
+        self.assertEqual(self.subtree_ids(self.epic), [self.epic])
+        self.assertEqual(
+            self.subtree_ids(self.other_epic), [self.other_epic, self.story, self.subtask],
+        )
+        self.assertEqual(Task.objects.get(pk=self.subtask).path, f'{self.other_epic}/{self.story}/')
+
+        for title in ('Ещё', 'И ещё'):
+            self.create(title, parent=self.subtask)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'parent': None}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), moved_queries)
+        self.assertEqual(Task.objects.get(pk=self.subtask).path, f'{self.story}/')
+
+    def test_reparent_invalid(self):
+        url = f'/api/tasks/tasks/{self.epic}/reparent/'
+        self.assertEqual(self.client.post(url, {'parent': self.subtask}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'parent': self.epic}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'parent': 'x'}, format='json').status_code, 400)
+        response = self.client.patch(
+            f'/api/tasks/tasks/{self.story}/', {'parent': self.other_epic}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_subtree_filters(self):
+        self.client.patch(f'/api/tasks/tasks/{self.subtask}/', {'status': 'done'}, format='json')
+        ids = [task['id'] for task in self.client.get(f'/api/tasks/tasks/?subtree={self.story}').data]
+        self.assertEqual(sorted(ids), [self.story, self.subtask])
+        self.assertEqual(self.client.get('/api/tasks/tasks/?subtree=x').status_code, 400)
+
+        base = f'/api/tasks/projects/{self.project.id}'
+        stats = self.client.get(f'{base}/statistics/?subtree={self.epic}').data
+        self.assertEqual((stats['total'], stats['done'], stats['todo']), (3, 1, 2))
+
+        board = self.client.get(f'{base}/board/?subtree={self.story}').data
+        counts = {column['status']: column['count'] for column in board['columns']}
+        self.assertEqual((counts['todo'], counts['done']), (1, 1))
+
+        response = self.client.get('/api/tasks/tasks/export/', {'subtree': self.epic})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(sorted(row['id'] for row in rows), [self.epic, self.story, self.subtask])
+        self.assertEqual({row['parent_id'] for row in rows}, {None, self.epic, self.story})
+
+    def test_delete_subtree(self):
+        response = self.client.delete(f'/api/tasks/tasks/{self.epic}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Task.objects.values_list('id', flat=True)), [self.other_epic])
+        self.assertEqual(
+            sorted(Tombstone.objects.values_list('entity_id', flat=True)),
+            [self.epic, self.story, self.subtask],
+        )
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class LoadSheddingTest(TestCase):
+    """Тесты ограничения частоты запросов и сброса нагрузки."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {make_token()}')
+
+    @override_settings(RATE_LIMIT_ROUTES={'GET /api/tasks/projects/{id}/': (0.5, 2)})
+    def test_route_limit(self):
+        project = Project.objects.create(name='Проект', owner_id=1)
+        url = f'/api/tasks/projects/{project.id}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        # Другой маршрут и другой пользователь ограничены отдельно.
+        self.assertEqual(self.client.get('/api/tasks/projects/').status_code, 200)
+        other = APIClient(HTTP_AUTHORIZATION=f'Bearer {make_token(user_id=2)}')
+        other.handler = self.client.handler
+        self.assertEqual(other.get(url).status_code, 200)
+
+    @override_settings(RATE_LIMIT_USER_RATE=1, RATE_LIMIT_USER_BURST=3)
+    def test_user_limit(self):
+        for url in ('/api/tasks/projects/', '/api/tasks/tasks/', '/api/tasks/comments/'):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get('/api/tasks/projects/').status_code, 429)
+        # Без токена ключом служит IP-адрес.
+        anonymous = APIClient()
+        anonymous.handler = self.client.handler
+        self.assertEqual(anonymous.get('/api/tasks/projects/').status_code, 403)
+
+    def test_load_shedding(self):
+        response = self.client.get(
+            '/api/tasks/projects/', HTTP_X_REQUEST_START=f't={time.time() - 60:.3f}',
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        response = self.client.get(
+            '/api/tasks/projects/', HTTP_X_REQUEST_START=f't={time.time():.3f}',
+        )
+        self.assertEqual(response.status_code, 200)
+        with override_settings(LOAD_SHED_MAX_IN_FLIGHT=0):
+            self.assertEqual(self.client.get('/api/tasks/projects/').status_code, 503)
+
+        metrics = self.client.get('/api/tasks/metrics/').data['throttling']
+        self.assertEqual(metrics['admitted'], 1)
+        self.assertEqual(metrics['shed_queue_wait'], 1)
+        self.assertEqual(metrics['shed_in_flight'], 1)
+        self.assertEqual(metrics['in_flight'], 0)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class AsyncTaskListTest(TestCase):
+    """Тесты async-представления списка задач."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {make_token()}')
+        self.project = Project.objects.create(name='Проект', owner_id=1)
+        for i in range(3):
+            Task.objects.create(project=self.project, title=f'Задача {i}', creator_id=1)
+
+    def test_async_list_matches_viewset(self):
+        url = f'/api/tasks/tasks/?project={self.project.id}&omit=description'
+        with patch.object(TaskViewSet, 'fast_list', side_effect=AssertionError):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(len(response.data), 3)
+        # ?format=json обслуживает TaskViewSet.
+        self.assertEqual(response.content, self.client.get(f'{url}&format=json').content)
+
+    def test_fallback_to_viewset(self):
+        self.assertIn('results', self.client.get('/api/tasks/tasks/?paginate=1').data)
+        self.assertEqual(APIClient().get('/api/tasks/tasks/').status_code, 403)
+        response = self.client.post(
+            '/api/tasks/tasks/', {'title': 'Новая', 'project': self.project.id}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+
+    async def test_asgi_request(self):
+        url = f'/api/tasks/tasks/?project={self.project.id}'
+        headers = {'Authorization': f'Bearer {make_token()}'}
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        response = await self.async_client.get(url, headers={**headers, 'X-Request-Start': 't=1'})
+        self.assertEqual(response.status_code, 503)
+
+
+@override_settings(DATABASES=TEST_DATABASES)
+class TokenCacheTest(TestCase):
+    """Тесты кэша проверенных JWT-токенов."""
+
+    def setUp(self):
+        token_cache.clear()
+
+    def test_cached_until_exp(self):
+        """Подпись проверяется один раз, пользователь берётся из кэша до exp."""
+        token = make_token(user_id=7, username='cached')
+        with patch('tasks.authentication.jwt.decode', wraps=jwt.decode) as decode:
+            user = decode_token(token)
+            self.assertIs(decode_token(token), user)
+            self.assertEqual(decode.call_count, 1)
+        self.assertEqual((user.pk, user.username), (7, 'cached'))
+        with self.assertRaises(AttributeError):
+            user.id = 8
+        self.assertFalse(hasattr(user, '__dict__'))
+
+        token_cache.put(token, user, time.time() - 1)
+        self.assertIsNone(token_cache.get(token))
+
+    def test_invalid_tokens_not_cached(self):
+        """Просроченный и поддельный токены отклоняются и не кэшируются."""
+        expired = jwt.encode(
+            {'user_id': 1, 'username': 'old', 'exp': datetime.utcnow() - timedelta(seconds=1)},
+            settings.JWT_SECRET, algorithm='HS256',
+        )
+        client = APIClient()
+        for token in (expired, make_token() + 'x'):
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(client.get('/api/tasks/projects/').status_code, 403)
+        self.assertEqual(token_cache.metrics()['size'], 0)
+
+    @override_settings(JWT_TOKEN_CACHE_SIZE=2)
+    def test_bounded(self):
+        """Давно не использованные токены вытесняются."""
+        tokens = [make_token(user_id=user_id) for user_id in (1, 2, 3)]
+        for token in tokens:
+            decode_token(token)
+        self.assertEqual(token_cache.metrics()['size'], 2)
+        self.assertIsNone(token_cache.get(tokens[0]))
+        self.assertIsNotNone(token_cache.get(tokens[2]))
+
+
+class ConnectionSlotsTest(TestCase):
+    """Тесты ограничения числа соединений процесса с БД."""
+
+    @override_settings(DB_MAX_CONNECTIONS=1, DB_CONNECTION_WAIT=0.05)
+    def test_limit(self):
+        """Второе соединение ждёт закрытия первого и по таймауту не открывается."""
+        slots = ConnectionSlots()
+        wrapper_class = type('LimitedWrapper', (ConnectionLimitMixin, SQLiteWrapper), {'slots': slots})
+        # Соединение с базой в памяти SQLite-бэкенд Django не закрывает.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        first, second = (
+            wrapper_class({**connection.settings_dict, 'NAME': f'{directory.name}/slots.db'})
+            for _ in range(2)
+        )
+        first.ensure_connection()
+        with self.assertRaises(OperationalError):
+            second.ensure_connection()
+        self.assertEqual(slots.metrics()['timeouts'], 1)
+
+        first.inc_thread_sharing()
+        closer = threading.Timer(0.01, first.close)
+        with override_settings(DB_CONNECTION_WAIT=5):
+            closer.start()
+            second.ensure_connection()
+        closer.join()
+        self.assertEqual(slots.metrics()['in_use'], 1)
+        second.close()
+        second.close()
+        self.assertEqual(slots.metrics()['in_use'], 0)
@@ -0,0 +1,69 @@
+"""Кэш проверенных JWT-токенов.
+
+Frontend отправляет один и тот же токен в течение всего срока его жизни
+(до 24 часов), а JWTAuthentication раньше на каждом запросе заново
+проверял подпись и разбирал claims. Кэш хранит пользователя, построенного
+из проверенных claims, до ``exp`` токена: не более ``JWT_TOKEN_CACHE_SIZE``
+записей в процессе (вытесняются давно не использованные, 0 — кэш
+выключен). Ключ — SHA-256 токена, сами токены в памяти не хранятся.
+Недействительные и просроченные токены не кэшируются.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+
+class TokenCache:
+    """LRU-кэш пользователей по хэшу токена со сроком до exp."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        """Закэшированное значение для токена или None."""
+        key = self._key(token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self.entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]
+            self.counters['misses'] += 1
+            return None
+
+    def put(self, token, value, expires_at):
+        """Сохраняет значение до ``expires_at`` (Unix time, claim exp)."""
+        if settings.JWT_TOKEN_CACHE_SIZE <= 0 or expires_at is None:
+            return
+        key = self._key(token)
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.JWT_TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def metrics(self):
+        with self.lock:
+            return {
+                **dict.fromkeys(('hits', 'misses'), 0),
+                **self.counters,
+                'size': len(self.entries),
+            }
+
+
+token_cache = TokenCache()
@@ -8,5 +8,8 @@ router.register(r'tasks', views.TaskViewSet, basename='task')
 router.register(r'comments', views.CommentViewSet, basename='comment')
 
 urlpatterns = [
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('sync/', views.sync_view, name='sync'),
+    path('tasks/', views.task_collection_view, name='task-list'),
     path('', include(router.urls)),
 ]
@@ -1,31 +1,160 @@
 import logging
-import requests
+import math
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Max, Q, prefetch_related_objects
+from django.utils import timezone
+from rest_framework import exceptions, serializers, viewsets, status
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from .models import Project, Task, Comment
+from .board import InvalidCursor, build_board
+from .conditional import (
+    PreconditionFailed, conditional_response, if_match_passes,
+    make_etag, project_etag, set_validators, task_etag,
+)
+from .dbslots import connection_slots
+from .export import (
+    EXPORT_ENTITIES, EXPORT_FORMATS, IgnoreClientContentNegotiation,
+    export_response, format_datetime,
+)
+from .fastpath import CURSOR_COLUMNS, task_row_encoder
+from .middleware import throttling_metrics
+from .hierarchy import (
+    HierarchyError, assign_paths, child_path, reparent, rollup, subtree_condition, subtree_q,
+)
+from .models import Project, Task, Comment, Tombstone
+from .outbox import enqueue_event, outbox_metrics
+from .pagination import CommentCursorPagination
+from .purge import deletion_progress, mark_deleted
+from .search import attach_headlines, search_tasks
+from .ranking import (
+    COLUMN_ORDERING, assign_top_ranks, check_key_length, is_valid_key, key_between,
+    request_rebalance,
+)
+from .sync import InvalidWatermark, WatermarkExpired, record_deletions, sync_changes
+from .tokencache import token_cache
 from .serializers import (
     ProjectSerializer, ProjectDetailSerializer,
-    TaskSerializer, TaskDetailSerializer,
-    CommentSerializer,
+    TaskSerializer, TaskDetailSerializer, TaskSearchSerializer,
+    CommentSerializer, sparse_field_names,
 )
 
 logger = logging.getLogger(__name__)
 
 
-def notify_service(event_type, data, token):
-    """Отправка уведомления через notification_service."""
+def sparse_queryset(queryset, serializer_class, request, always=()):
+    """Загрузка только тех столбцов модели, что попадут в ответ (?fields= / ?omit=).
+
+    ``always`` — столбцы, нужные самой вьюхе (ETag, позиция курсора).
+    """
+    names = serializer_class.Meta.fields
+    fields = sparse_field_names(names, request)
+    if len(fields) == len(names):
+        return queryset
+    concrete = {field.name for field in queryset.model._meta.concrete_fields}
+    sources = getattr(serializer_class.Meta, 'sparse_columns', {})
+    columns = []
+    for name in fields:
+        if name in concrete:
+            columns.append(name)
+        columns.extend(sources.get(name, ()))
+    return queryset.only('id', *always, *columns)
+
+
+@api_view(['GET'])
+def metrics_view(request):
+    """Метрики сервиса для мониторинга."""
+    return Response({
+        'outbox': outbox_metrics(),
+        'throttling': throttling_metrics(),
+        'token_cache': token_cache.metrics(),
+        'database': connection_slots.metrics(),
+    })
+
+
+@api_view(['GET'])
+def sync_view(request):
+    """Дельта-синхронизация: изменения и удаления после ?since=<watermark>."""
+    limit = settings.SYNC_PAGE_SIZE
+    try:
+        limit = min(int(request.query_params.get('limit', limit)), limit)
+    except ValueError:
+        pass
     try:
-        requests.post(
-            f"{settings.NOTIFICATION_SERVICE_URL}/api/notifications/create/",
-            json={'event_type': event_type, **data},
-            headers={'Authorization': f'Bearer {token}'},
-            timeout=5,
+        data = sync_changes(request.query_params.get('since'), max(limit, 1))
+    except InvalidWatermark:
+        return Response(
+            {'error': 'Некорректный watermark.'},
+            status=status.HTTP_400_BAD_REQUEST,
         )
-    except requests.RequestException as e:
-        logger.warning('Не удалось отправить уведомление: %s', e)
+    except WatermarkExpired:
+        return Response(
+            {'error': 'Watermark устарел, выполните полную синхронизацию без since.'},
+            status=status.HTTP_410_GONE,
+        )
+    return Response(data)
+
+
+def _assign_paths(tasks):
+    """hierarchy.assign_paths с ошибкой валидации DRF (родителя удалили или перенесли)."""
+    try:
+        return assign_paths(tasks)
+    except HierarchyError as e:
+        raise serializers.ValidationError({'parent': [str(e)]})
+
+
+def _int_values(values):
+    """Целочисленные значения из пользовательского ввода (прочие отбрасываются)."""
+    result = []
+    for value in values:
+        if isinstance(value, bool):
+            continue
+        try:
+            result.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return result
+
+
+def subtree_param(request, prefix=''):
+    """Условие ?subtree=<id задачи> (задача и её потомки) или None без параметра."""
+    value = request.query_params.get('subtree')
+    if not value:
+        return None
+    try:
+        root_id = int(value)
+    except ValueError:
+        raise serializers.ValidationError({'subtree': ['Ожидается id задачи.']})
+    return subtree_condition(root_id, prefix)
+
+
+def statistics_annotations(scope=None):
+    """Агрегаты статистики проекта, вычисляемые одним GROUP BY.
+
+    ``scope`` — дополнительное условие на задачи (например, поддерево).
+    """
+    scope = scope or Q()
+    closed = [Task.Status.DONE, Task.Status.CANCELLED]
+    annotations = {
+        'stat_total': Count('tasks', filter=scope),
+        'stat_overdue': Count('tasks', filter=(
+            scope & Q(tasks__deadline__lt=timezone.now()) & ~Q(tasks__status__in=closed)
+        )),
+        'stat_last_modified': Max('tasks__updated_at', filter=scope),
+    }
+    for value in Task.Status.values:
+        annotations[f'stat_status_{value}'] = Count(
+            'tasks', filter=scope & Q(tasks__status=value),
+        )
+    for value in Task.Priority.values:
+        annotations[f'stat_priority_{value}'] = Count(
+            'tasks', filter=scope & Q(tasks__priority=value),
+        )
+    return annotations
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
@@ -33,30 +162,138 @@ class ProjectViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
 
     def get_queryset(self):
-        return Project.objects.all()
+        if self.action == 'deletion':
+            return Project.objects.filter(deleted_at__isnull=False)
+        if self.action == 'statistics':
+            scope = subtree_param(self.request, prefix='tasks__')
+            return Project.objects.alive().annotate(**statistics_annotations(scope))
+        if self.action == 'board':
+            return Project.objects.alive()
+        if self.action == 'retrieve':
+            # Временные отметки дочерних строк нужны для ETag; задачи
+            # подгружаются только после проверки If-None-Match.
+            queryset = Project.objects.alive().annotate(
+                tasks_last_at=Max('tasks__updated_at'),
+                comments_total=Count('tasks__comments'),
+                comments_last_at=Max('tasks__comments__updated_at'),
+            )
+            return sparse_queryset(
+                queryset, ProjectDetailSerializer, self.request,
+                always=('updated_at', *Project.counter_fields),
+            )
+        queryset = Project.objects.alive()
+        if self.action == 'list':
+            queryset = sparse_queryset(
+                queryset, ProjectSerializer, self.request, always=('created_at',),
+            )
+        return queryset
+
+    def response_fields(self):
+        return sparse_field_names(self.get_serializer_class().Meta.fields, self.request)
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProjectDetailSerializer
         return ProjectSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        project = self.get_object()
+        # Без Last-Modified: удаление задачи или комментария не сдвигает
+        # отметки времени, а счётчики в ETag его учитывают.
+        etag = project_etag(project)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        if 'tasks' in self.response_fields():
+            prefetch_related_objects([project], 'tasks')
+        serializer = self.get_serializer(project)
+        return set_validators(Response(serializer.data), etag)
+
     def perform_create(self, serializer):
         serializer.save(owner_id=self.request.user.id)
 
+    def destroy(self, request, *args, **kwargs):
+        """Пометка проекта на удаление; задачи и комментарии удаляются в фоне."""
+        project = self.get_object()
+        mark_deleted(project)
+        location = reverse('project-deletion', args=[project.pk], request=request)
+        return Response(
+            deletion_progress(project), status=status.HTTP_202_ACCEPTED,
+            headers={'Location': location},
+        )
+
+    @action(detail=True, methods=['get'])
+    def deletion(self, request, pk=None):
+        """Ход фонового удаления проекта; 404 — проект удалён полностью."""
+        return Response(deletion_progress(self.get_object()))
+
+    @action(detail=True, methods=['get'])
+    def board(self, request, pk=None):
+        """Канбан-доска: задачи по статусам с размером колонок (один оконный запрос).
+
+        ``?limit=`` — задач в колонке; ``?status=&cursor=`` — догрузка
+        колонки по ``next_cursor``. ``count`` — число задач колонки начиная
+        с текущей позиции (для первой страницы — всего в колонке).
+        """
+        project = self.get_object()
+        status_filter = request.query_params.get('status')
+        cursor = request.query_params.get('cursor')
+        if status_filter is not None and status_filter not in Task.Status.values:
+            return Response(
+                {'error': f'Неизвестный статус: {status_filter}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if cursor is not None and status_filter is None:
+            return Response(
+                {'error': 'Курсор колонки передаётся вместе с ?status=.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = settings.TASKS_BOARD_COLUMN_LIMIT
+        try:
+            limit = int(request.query_params.get('limit', limit))
+        except ValueError:
+            pass
+        limit = min(max(limit, 1), settings.PAGINATION_MAX_PAGE_SIZE)
+
+        names = tuple(sparse_field_names(TaskSerializer.Meta.fields, request))
+        try:
+            columns = build_board(
+                project, names, limit, status_filter, cursor, subtree_param(request),
+            )
+        except InvalidCursor:
+            return Response(
+                {'error': 'Некорректный курсор.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'project': project.id, 'columns': columns})
+
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        """Статистика проекта по задачам."""
+        """Статистика проекта по задачам (один агрегирующий запрос)."""
         project = self.get_object()
-        tasks = project.tasks.all()
-        stats = {
-            'total': tasks.count(),
-            'todo': tasks.filter(status=Task.Status.TODO).count(),
-            'in_progress': tasks.filter(status=Task.Status.IN_PROGRESS).count(),
-            'review': tasks.filter(status=Task.Status.REVIEW).count(),
-            'done': tasks.filter(status=Task.Status.DONE).count(),
-            'cancelled': tasks.filter(status=Task.Status.CANCELLED).count(),
+        stats = {'total': project.stat_total}
+        for value in Task.Status.values:
+            stats[value] = getattr(project, f'stat_status_{value}')
+        stats['by_priority'] = {
+            value: getattr(project, f'stat_priority_{value}')
+            for value in Task.Priority.values
         }
-        return Response(stats)
+        stats['overdue'] = project.stat_overdue
+
+        # Только ETag: последний updated_at задач не меняется при удалении
+        # задачи, поэтому Last-Modified давал бы устаревший 304, а счётчики
+        # в ETag удаление учитывают.
+        last_modified = project.stat_last_modified or project.updated_at
+        etag = make_etag(
+            project.pk, request.query_params.get('subtree', ''), last_modified.isoformat(),
+            *(stats[value] for value in Task.Status.values),
+            *stats['by_priority'].values(), stats['overdue'],
+        )
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(stats), etag)
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -64,7 +301,18 @@ class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
 
     def get_queryset(self):
-        queryset = Task.objects.select_related('project').all()
+        queryset = Task.objects.alive()
+        if self.action in ('list', 'retrieve'):
+            queryset = sparse_queryset(
+                queryset, self.get_serializer_class(), self.request,
+                always=('created_at', 'updated_at', 'comments_count'),
+            )
+        if self.action in ('retrieve', 'update', 'partial_update'):
+            queryset = queryset.annotate(comments_last_at=Max('comments__updated_at'))
+        return self.filter_tasks(queryset)
+
+    def filter_tasks(self, queryset):
+        """Фильтры списка задач: ?project=, ?assignee=, ?status=, ?subtree=."""
         project_id = self.request.query_params.get('project')
         if project_id:
             queryset = queryset.filter(project_id=project_id)
@@ -74,6 +322,9 @@ class TaskViewSet(viewsets.ModelViewSet):
         status_filter = self.request.query_params.get('status')
         if status_filter:
             queryset = queryset.filter(status=status_filter)
+        subtree = subtree_param(self.request)
+        if subtree is not None:
+            queryset = queryset.filter(subtree)
         return queryset
 
     def get_serializer_class(self):
@@ -81,35 +332,513 @@ class TaskViewSet(viewsets.ModelViewSet):
             return TaskDetailSerializer
         return TaskSerializer
 
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if query:
+            return self.search(request, query)
+        if settings.TASKS_LIST_FAST_PATH:
+            return self.fast_list(request)
+        return super().list(request, *args, **kwargs)
+
+    def fast_list(self, request):
+        """Список задач из кортежей values_list() без TaskSerializer.
+
+        Ответ побайтно совпадает с обычным путём, включая ?fields= / ?omit=
+        и курсорную пагинацию (позиция курсора берётся из именованных
+        кортежей).
+        """
+        names = tuple(sparse_field_names(TaskSerializer.Meta.fields, request))
+        encoder = task_row_encoder(names)
+        queryset = self.get_queryset()
+        paginated = self.paginator.is_requested(request)
+        rows = queryset.values_list(
+            *encoder.query_columns(CURSOR_COLUMNS if paginated else ()), named=paginated,
+        )
+        if paginated:
+            page = self.paginator.paginate_queryset(rows, request, view=self)
+            return self.paginator.get_paginated_response(encoder.encode_all(page))
+        return Response(encoder.encode_all(rows))
+
+    def async_list_allowed(self):
+        """Можно ли отдать список из task_collection_view без потока.
+
+        Async-ветка — это fast_list() без пагинации для аутентифицированного
+        запроса; поиск, ?subtree= (путь корня читается отдельным запросом),
+        HTML-представление DRF и ошибки аутентификации остаются ViewSet'у.
+        """
+        request = self.request
+        params = request.query_params
+        if (
+            not settings.TASKS_LIST_FAST_PATH
+            or params.get('q', '').strip() or 'subtree' in params or 'format' in params
+            or 'text/html' in request.headers.get('Accept', '')
+            or self.paginator.is_requested(request)
+        ):
+            return False
+        try:
+            return request.user.is_authenticated
+        except exceptions.APIException:
+            return False
+
+    async def async_list(self):
+        """fast_list() на async ORM; ответ побайтно совпадает с синхронным."""
+        names = tuple(sparse_field_names(TaskSerializer.Meta.fields, self.request))
+        encoder = task_row_encoder(names)
+        rows = [row async for row in self.get_queryset().values_list(*encoder.query_columns())]
+        # Заголовки, согласование формата и Vary — как в APIView.dispatch().
+        self.headers = self.default_response_headers
+        response = self.finalize_response(self.request, Response(encoder.encode_all(rows)))
+        return response.render()
+
+    def search(self, request, query):
+        """Полнотекстовый поиск: ?q= вместе с обычными фильтрами списка.
+
+        Результаты упорядочены по релевантности, поэтому курсорная
+        пагинация не применяется — возвращается не более ?page_size=
+        лучших совпадений.
+        """
+        limit = self.paginator.get_page_size(request)
+        tasks = list(search_tasks(self.get_queryset(), query)[:limit])
+        attach_headlines(tasks, query)
+        serializer = TaskSearchSerializer(tasks, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        task = serializer.save(creator_id=self.request.user.id)
-        token = self.request.auth
-        notify_service('task_created', {
+        data = serializer.validated_data
+        new_task = Task(
+            project=data['project'], status=data.get('status', Task.Status.TODO),
+            parent=data.get('parent'),
+        )
+        assign_top_ranks(_assign_paths([new_task]))
+        task = serializer.save(
+            creator_id=self.request.user.id, rank=new_task.rank, path=new_task.path,
+        )
+        enqueue_event('task_created', {
             'task_id': task.id,
             'title': task.title,
             'project_id': task.project_id,
             'creator_id': task.creator_id,
-        }, token)
+        }, self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = task_etag(instance)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag)
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return set_validators(Response(serializer.data), task_etag(serializer.instance))
+
+    def check_update_preconditions(self, task):
+        """Проверка If-Match / updated_at из тела запроса.
 
+        Возвращает версию (updated_at), относительно которой должен
+        выполниться условный UPDATE, или None, если клиент не передал
+        предусловий.
+        """
+        has_precondition = False
+        if 'If-Match' in self.request.headers:
+            has_precondition = True
+            if not if_match_passes(self.request, task_etag(task)):
+                raise PreconditionFailed()
+        if 'updated_at' in self.request.data:
+            has_precondition = True
+            expected = serializers.DateTimeField().to_internal_value(
+                self.request.data['updated_at'],
+            )
+            if expected != task.updated_at:
+                raise PreconditionFailed()
+        return task.updated_at if has_precondition else None
+
+    @transaction.atomic
     def perform_update(self, serializer):
-        old_status = self.get_object().status
+        task = serializer.instance
+        old_status = task.status
+        serializer.context['expected_updated_at'] = self.check_update_preconditions(task)
         task = serializer.save()
         if task.status != old_status:
-            token = self.request.auth
-            notify_service('task_status_changed', {
+            enqueue_event('task_status_changed', {
                 'task_id': task.id,
                 'title': task.title,
                 'old_status': old_status,
                 'new_status': task.status,
-            }, token)
+            }, self.request.user)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Подзадачи удаляются каскадом вместе с задачей.
+        ids = [instance.pk, *Task.objects.filter(
+            path__startswith=child_path(instance),
+        ).values_list('id', flat=True)]
+        record_deletions(Tombstone.Entity.TASK, ids)
+        instance.delete()
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        """Пакетное создание (POST), обновление (PATCH) и удаление (DELETE) задач.
+
+        Все элементы валидируются за один проход; при ошибке хотя бы в одном
+        ничего не записывается, а в ответе возвращается список ошибок,
+        выровненный по элементам запроса.
+        """
+        if request.method == 'DELETE':
+            return self._bulk_delete(request)
+
+        items = request.data
+        limit = settings.TASKS_BULK_MAX_ITEMS
+        if not isinstance(items, list) or not items or not all(isinstance(i, dict) for i in items):
+            return Response(
+                {'error': 'Ожидается непустой список объектов задач.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > limit:
+            return Response(
+                {'error': f'Не более {limit} задач за один запрос.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        context = self.get_serializer_context()
+        context['projects'] = Project.objects.alive().in_bulk(
+            _int_values(item.get('project') for item in items),
+        )
+        context['parents'] = Task.objects.alive().in_bulk(
+            _int_values(item.get('parent') for item in items),
+        )
+        if request.method == 'POST':
+            return self._bulk_create(items, context)
+        return self._bulk_update(items, context)
+
+    def _bulk_create(self, items, context):
+        serializer = TaskSerializer(data=items, many=True, context=context)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = self.request.user
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(assign_top_ranks(_assign_paths([
+                Task(creator_id=user.id, **data) for data in serializer.validated_data
+            ])))
+            enqueue_event('tasks_bulk_created', {
+                'task_ids': [task.id for task in tasks],
+                'project_ids': sorted({task.project_id for task in tasks}),
+            }, user)
+        return Response(
+            TaskSerializer(tasks, many=True, context=context).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    def _bulk_update(self, items, context):
+        ids = [item.get('id') for item in items]
+        tasks = Task.objects.alive().in_bulk(_int_values(ids))
+
+        errors, updates, seen = [], [], set()
+        for task_id, item in zip(ids, items):
+            task = tasks.get(task_id) if type(task_id) is int else None
+            if task is None or task_id in seen:
+                errors.append({'id': ['Задача не найдена или указана повторно.']})
+                continue
+            seen.add(task_id)
+            serializer = TaskSerializer(task, data=item, partial=True, context=context)
+            if serializer.is_valid():
+                errors.append({})
+                updates.append((task, serializer.validated_data))
+            else:
+                errors.append(serializer.errors)
+        if any(errors):
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        changed, fields, status_changes = [], set(), []
+        for task, data in updates:
+            old_status = task.status
+            changes = TaskSerializer.apply_changes(task, data)
+            if not changes:
+                continue
+            task.updated_at = now
+            changed.append(task)
+            fields.update(changes)
+            if task.status != old_status:
+                status_changes.append({
+                    'task_id': task.id,
+                    'title': task.title,
+                    'old_status': old_status,
+                    'new_status': task.status,
+                })
+
+        with transaction.atomic():
+            if changed:
+                Task.objects.bulk_update(changed, sorted(fields) + ['updated_at'])
+            if status_changes:
+                enqueue_event('tasks_bulk_status_changed', {
+                    'changes': status_changes,
+                }, self.request.user)
+        return Response(TaskSerializer([task for task, _ in updates], many=True, context=context).data)
+
+    def _bulk_delete(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids:
+            return Response(
+                {'error': 'Ожидается непустой список ids.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(ids) > settings.TASKS_BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'Не более {settings.TASKS_BULK_MAX_ITEMS} задач за один запрос.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        requested = _int_values(ids)
+        with transaction.atomic():
+            existing = list(
+                Task.objects.alive().filter(id__in=requested).values_list('id', 'path')
+            )
+            # Вместе с задачами каскадом удаляются их подзадачи.
+            subtrees = Q(id__in=[pk for pk, _ in existing])
+            for pk, path in existing:
+                subtrees |= Q(path__startswith=f'{path}{pk}/')
+            deleted = set(Task.objects.filter(subtrees).values_list('id', flat=True))
+            Task.objects.filter(id__in=deleted).delete()
+            record_deletions(Tombstone.Entity.TASK, deleted)
+            existing = {pk for pk, _ in existing}
+        return Response({
+            'deleted': sorted(existing),
+            'not_found': sorted(set(requested) - existing),
+        })
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """Перемещение задачи на доске: меняет ключ порядка (и статус) одной строки.
+
+        Тело: ``status`` — колонка (по умолчанию текущая), ``prev_id`` и
+        ``next_id`` — соседи в новой позиции (null — край колонки; оба
+        null — в начало колонки).
+        """
+        task = self.get_object()
+        new_status = request.data.get('status', task.status)
+        if new_status not in Task.Status.values:
+            return Response(
+                {'status': [f'Неизвестный статус: {new_status}.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        neighbor_ids = {}
+        for name in ('prev_id', 'next_id'):
+            value = request.data.get(name)
+            if value is not None and (type(value) is not int or value == task.pk):
+                return Response(
+                    {name: ['Ожидается id другой задачи или null.']},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            neighbor_ids[name] = value
+
+        column = Task.objects.filter(project_id=task.project_id, status=new_status).exclude(pk=task.pk)
+        prev_id, next_id = neighbor_ids['prev_id'], neighbor_ids['next_id']
+        to_top = prev_id is None and next_id is None
+        if to_top:
+            # В начало колонки: сосед — текущая первая задача.
+            next_id = column.exclude(rank='').order_by('rank').values_list('pk', flat=True).first()
+
+        old_status = task.status
+        now = timezone.now()
+        with transaction.atomic():
+            # Задача и соседи блокируются до чтения ключей (в порядке, в
+            # котором их блокирует rebalance_column): параллельные
+            # перемещения в тот же промежуток выполняются по очереди и не
+            # получают одинаковых ключей.
+            list(
+                Task.objects.select_for_update()
+                .filter(pk__in=[pk for pk in (task.pk, prev_id, next_id) if pk is not None])
+                .order_by(*COLUMN_ORDERING).values_list('pk', flat=True)
+            )
+            try:
+                key = self._move_key(column, prev_id, next_id)
+            except Task.DoesNotExist:
+                return Response(
+                    {'error': 'Соседние задачи должны быть в той же колонке проекта.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            except ValueError as e:
+                if to_top:
+                    # Первая задача колонки сменилась после чтения.
+                    return Response(
+                        {'error': 'Колонка изменилась, повторите перемещение.'},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                field, message = e.args
+                return Response({field: [message]}, status=status.HTTP_400_BAD_REQUEST)
+            if key is None:
+                # Соседи без ключей, с совпадающими или слишком длинными
+                # ключами: колонку перезапишет фоновый rebalance_ranks.
+                request_rebalance(task.project_id, new_status)
+                return Response(
+                    {'error': 'Порядок колонки перестраивается, повторите перемещение позже.'},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': str(math.ceil(settings.TASKS_RANK_REBALANCE_INTERVAL))},
+                )
+
+            Task.objects.filter(pk=task.pk).update(rank=key, status=new_status, updated_at=now)
+            check_key_length(key, task.project_id, new_status)
+            if new_status != old_status:
+                enqueue_event('task_status_changed', {
+                    'task_id': task.id,
+                    'title': task.title,
+                    'old_status': old_status,
+                    'new_status': new_status,
+                }, request.user)
+        task.rank, task.status, task.updated_at = key, new_status, now
+        return Response(self.get_serializer(task).data)
+
+    @staticmethod
+    def _move_key(column, prev_id, next_id):
+        """Ключ между соседями либо None, если их ключи не позволяют вставку.
+
+        ValueError(поле, сообщение) — соседи переданы в обратном порядке,
+        между ними в колонке есть другие задачи или сосед у края колонки
+        не крайний.
+        """
+        ids = [pk for pk in (prev_id, next_id) if pk is not None]
+        prev_rank = next_rank = None
+        if ids:
+            ranks = dict(column.filter(id__in=ids).values_list('id', 'rank'))
+            if len(ranks) != len(ids):
+                raise Task.DoesNotExist
+            prev_rank, next_rank = ranks.get(prev_id), ranks.get(next_id)
+        for rank in (prev_rank, next_rank):
+            if rank is not None and not is_valid_key(rank):
+                return None
+        if prev_rank is not None and next_rank is not None:
+            if prev_rank == next_rank:
+                return None
+            if prev_rank > next_rank:
+                raise ValueError('next_id', 'Задача next_id стоит в колонке раньше prev_id.')
+            if column.filter(rank__gt=prev_rank, rank__lt=next_rank).exists():
+                raise ValueError(
+                    'next_id', 'Задача next_id должна идти в колонке сразу за prev_id.',
+                )
+        elif prev_rank is not None:
+            if column.filter(rank__gt=prev_rank).exists():
+                raise ValueError(
+                    'next_id', 'За задачей prev_id в колонке есть другие задачи: укажите next_id.',
+                )
+        elif next_rank is not None:
+            if column.exclude(rank='').filter(rank__lt=next_rank).exists():
+                raise ValueError(
+                    'prev_id', 'Перед задачей next_id в колонке есть другие задачи: укажите prev_id.',
+                )
+        key = key_between(prev_rank, next_rank)
+        if len(key) > Task._meta.get_field('rank').max_length:
+            return None
+        return key
+
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, pk=None):
+        """Задача со всеми потомками и сводкой прогресса (три запроса при любой глубине).
+
+        Задачи упорядочены по пути — каждая идёт после своих предков;
+        структура восстанавливается по полю ``parent``. Поддерживаются
+        ?fields= / ?omit=.
+        """
+        task = self.get_object()
+        encoder = task_row_encoder(tuple(sparse_field_names(TaskSerializer.Meta.fields, request)))
+        rows = Task.objects.filter(subtree_q(task.pk, task.path)).order_by('path', 'id')
+        return Response({
+            'task': task.pk,
+            'progress': rollup(task),
+            'tasks': encoder.encode_all(rows.values_list(*encoder.query_columns())),
+        })
+
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """Сводка прогресса поддерева задачи (один агрегирующий запрос)."""
+        task = self.get_object()
+        return Response({'task': task.pk, **rollup(task)})
+
+    @action(detail=True, methods=['post'])
+    def reparent(self, request, pk=None):
+        """Перенос задачи с поддеревом: ``parent`` — новый родитель (null — верхний уровень)."""
+        task = self.get_object()
+        parent_id = request.data.get('parent')
+        if parent_id is not None and type(parent_id) is not int:
+            return Response(
+                {'parent': ['Ожидается id задачи или null.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            moved = reparent(task.pk, parent_id)
+        except HierarchyError as e:
+            return Response({'parent': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        task.parent_id, task.path, task.updated_at = moved.parent_id, moved.path, moved.updated_at
+        return Response(TaskSerializer(task, context=self.get_serializer_context()).data)
+
+    @action(
+        detail=False, methods=['get'], url_path='export',
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def export(self, request):
+        """Потоковая выгрузка задач или комментариев (NDJSON / CSV).
+
+        Параметры: ``?output=ndjson|csv``, ``?entity=tasks|comments``,
+        фильтры списка задач и ``?updated_since=`` для инкрементальной
+        выгрузки. Заголовок X-Export-Started-At можно передать в
+        updated_since следующего запроса.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'Неизвестный формат: {output}. Допустимые: {", ".join(EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        entity = request.query_params.get('entity', 'tasks')
+        if entity not in EXPORT_ENTITIES:
+            return Response(
+                {'error': f'Неизвестная сущность: {entity}. Допустимые: {", ".join(EXPORT_ENTITIES)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = serializers.DateTimeField().to_internal_value(updated_since)
+            except serializers.ValidationError as e:
+                return Response({'updated_since': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        started_at = timezone.now()
+        tasks = self.filter_tasks(Task.objects.alive())
+        model, columns = EXPORT_ENTITIES[entity]
+        if model is Task:
+            queryset = tasks
+        else:
+            queryset = Comment.objects.filter(task__in=tasks.values('id'))
+        if updated_since:
+            queryset = queryset.filter(updated_at__gt=updated_since)
+
+        response = export_response(
+            queryset, columns, output, entity,
+            asynchronous=isinstance(request._request, ASGIRequest),
+        )
+        response['X-Export-Started-At'] = format_datetime(started_at)
+        return response
 
     @action(detail=True, methods=['get', 'post'])
     def comments(self, request, pk=None):
         """Комментарии к задаче."""
         task = self.get_object()
         if request.method == 'GET':
-            comments = task.comments.all()
-            serializer = CommentSerializer(comments, many=True)
+            comments = sparse_queryset(
+                task.comments.all(), CommentSerializer, request, always=('created_at',),
+            )
+            context = self.get_serializer_context()
+            paginator = CommentCursorPagination()
+            page = paginator.paginate_queryset(comments, request, view=self)
+            if page is not None:
+                serializer = CommentSerializer(page, many=True, context=context)
+                return paginator.get_paginated_response(serializer.data)
+            serializer = CommentSerializer(comments, many=True, context=context)
             return Response(serializer.data)
         else:
             serializer = CommentSerializer(data={**request.data, 'task': task.id})
@@ -120,8 +849,45 @@ class TaskViewSet(viewsets.ModelViewSet):
 
 class CommentViewSet(viewsets.ModelViewSet):
     """ViewSet для комментариев."""
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.filter(task__project__deleted_at__isnull=True)
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = sparse_queryset(
+                queryset, CommentSerializer, self.request, always=('created_at',),
+            )
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(author_id=self.request.user.id)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        record_deletions(Tombstone.Entity.COMMENT, [instance.pk])
+        instance.delete()
+
+
+task_list_view = TaskViewSet.as_view({'get': 'list', 'post': 'create'})
+
+
+async def task_collection_view(request, *args, **kwargs):
+    """/api/tasks/tasks/: список задач — async, остальное — TaskViewSet в потоке.
+
+    Под ASGI синхронное представление целиком занимает общий поток воркера,
+    а здесь в нём выполняется только запрос к БД (async ORM Django 4.2
+    работает через sync_to_async): аутентификация, кодирование и рендеринг
+    идут в цикле событий (см. TaskViewSet.async_list_allowed).
+    """
+    if request.method == 'GET':
+        view = TaskViewSet(action_map={'get': 'list'}, format_kwarg=None, args=args, kwargs=kwargs)
+        view.request = view.initialize_request(request, *args, **kwargs)
+        if view.async_list_allowed():
+            return await view.async_list()
+    return await sync_to_async(task_list_view)(request, *args, **kwargs)
+
+
+# csrf_exempt() в Django 4.2 превращает корутину в синхронную функцию.
+task_collection_view.csrf_exempt = True